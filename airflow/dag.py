@@ -0,0 +1,96 @@
+"""
+Airflow DAG for the PDF ingest pipeline.
+
+One run ingests every PDF under ``source`` (an input directory or manifest,
+see pipeline/batch.py). Documents fan out with dynamic task mapping; each
+stage task delegates to pipeline/orchestrator.py, so a retried or re-run
+task skips work whose checkpoint is still valid (OCR is never repeated for
+an unchanged document and configuration).
+
+Pipeline modules are imported inside the tasks to keep DAG parsing light.
+"""
+import os
+import sys
+from datetime import datetime
+from pathlib import Path
+
+from airflow.decorators import dag, task
+from airflow.models.param import Param
+
+PIPELINE_DIR = Path(__file__).resolve().parent.parent / "pipeline"
+
+# Documents processed at the same time per stage; OCR processes are split between them
+BATCH_WORKERS = int(os.getenv("BATCH_WORKERS", 2))
+
+
+def _pipeline_path():
+    if str(PIPELINE_DIR) not in sys.path:
+        sys.path.insert(0, str(PIPELINE_DIR))
+
+
+def _document_pipeline(job, force=False):
+    _pipeline_path()
+    from config import OCR_WORKERS
+    from orchestrator import DocumentPipeline
+
+    return DocumentPipeline(
+        job["source"], job["work_dir"],
+        content_hash=job["content_hash"],
+        ocr_workers=max(1, OCR_WORKERS // BATCH_WORKERS),
+        force=force
+    )
+
+
+@dag(
+    dag_id="pdf_ingest",
+    schedule=None,
+    start_date=datetime(2025, 1, 1),
+    catchup=False,
+    max_active_runs=1,
+    params={
+        "source": Param(None, type=["null", "string"], description="Input directory or manifest (default: data/input)"),
+        "force": Param(False, type="boolean", description="Re-run every stage and re-ingest loaded documents"),
+    },
+    default_args={"retries": 1},
+    tags=["etl", "pdf"],
+)
+def pdf_ingest():
+    @task
+    def plan(params=None):
+        """Hash the inputs and return the documents that still need ingesting."""
+        _pipeline_path()
+        from batch import BatchRunner, discover_documents, work_dir_for
+        from config import INPUT_DIR
+
+        source = Path(params["source"]) if params.get("source") else INPUT_DIR
+        runner = BatchRunner(force=params["force"])
+        try:
+            jobs = runner.plan(discover_documents(source))
+        finally:
+            runner.close()
+        return [
+            {**job, "work_dir": str(work_dir_for(job["content_hash"]))}
+            for job in jobs if job["status"] == "pending"
+        ]
+
+    @task(max_active_tis_per_dag=BATCH_WORKERS)
+    def extract(job, params=None):
+        _document_pipeline(job, params["force"]).run_stage("extract")
+        return job
+
+    @task(max_active_tis_per_dag=BATCH_WORKERS)
+    def transform(job, params=None):
+        _document_pipeline(job, params["force"]).run_stage("transform")
+        return job
+
+    # One load at a time: loads append to the shared vector index
+    @task(max_active_tis_per_dag=1)
+    def load(job, params=None):
+        stage = _document_pipeline(job, params["force"]).run_stage("load")
+        return {**job, "document_id": stage["result"]["document_id"]}
+
+    jobs = plan()
+    load.expand(job=transform.expand(job=extract.expand(job=jobs)))
+
+
+pdf_ingest()
@@ -0,0 +1,513 @@
+import asyncio
+import base64
+import json
+import os
+import time
+from contextlib import aclosing, asynccontextmanager
+from typing import Optional, List, Dict, Any, AsyncIterator, Awaitable, Callable, Tuple
+
+import asyncpg
+from dotenv import load_dotenv
+
+from pipeline.metrics import metrics
+
+from .fusion import fuse_rankings
+
+# Load environment variables
+load_dotenv()
+
+QUERY_LATENCY = metrics.histogram(
+    "db_query_duration_seconds", "Database query latency, by statement"
+)
+
+CHARTS_JSON = """
+    COALESCE(json_agg(
+        json_build_object(
+            'image_path', c.image_path,
+            'confidence', c.confidence,
+            'characteristics', c.characteristics,
+            'page_number', c.page_number,
+            'bbox', c.bbox,
+            'type', 'chart'
+        )
+    ) FILTER (WHERE c.id IS NOT NULL), '[]'::json) as charts
+"""
+
+GET_DOCUMENTS_SQL = f"""
+    SELECT
+        d.id,
+        d.content,
+        d.entities,
+        d.keywords,
+        {CHARTS_JSON}
+    FROM documents d
+    LEFT JOIN charts c ON d.id = c.document_id
+    WHERE d.id = ANY($1::int[])
+    GROUP BY d.id
+"""
+
+GET_DOCUMENT_SQL = f"""
+    SELECT
+        d.id,
+        d.content,
+        d.entities,
+        d.keywords,
+        {CHARTS_JSON}
+    FROM documents d
+    LEFT JOIN charts c ON d.id = c.document_id
+    WHERE d.id = $1
+    GROUP BY d.id
+"""
+
+RANK_DOCUMENTS_SQL = """
+    SELECT
+        d.id,
+        ts_rank_cd(d.document_vector, q) as rank
+    FROM documents d,
+         plainto_tsquery('pg_catalog.english', $1) q
+    WHERE d.document_vector @@ q
+    ORDER BY rank DESC
+    LIMIT $2
+"""
+
+GET_SENTENCES_SQL = """
+    SELECT
+        h.document_id,
+        h.start,
+        substring(d.content FROM h.start + 1 FOR h.stop - h.start) AS sentence
+    FROM unnest($1::int[], $2::int[], $3::int[]) AS h(document_id, start, stop)
+    JOIN documents d ON d.id = h.document_id
+"""
+
+# Run through asyncpg's statement cache: each statement is prepared once per
+# pooled connection and reused by name for later executions
+CONTENT_LENGTH_SQL = """
+    SELECT octet_length(content) AS length FROM documents WHERE id = $1
+"""
+
+# Byte offsets refer to the UTF-8 encoding of the content, which is encoded
+# once per request; the chunks of [$2, $3), $4 bytes each, are read through
+# one cursor
+CONTENT_CHUNKS_SQL = """
+    WITH doc AS MATERIALIZED (
+        SELECT convert_to(content, 'UTF8') AS bytes FROM documents WHERE id = $1
+    )
+    SELECT substring(doc.bytes FROM s + 1 FOR LEAST($4::int, $3::int - s)) AS chunk
+    FROM doc, generate_series($2::int, $3::int - 1, $4::int) AS s
+    ORDER BY s
+"""
+
+# Fields a search hit can be projected to
+SEARCH_FIELDS = ("id", "rank", "snippet", "content", "entities", "keywords", "charts")
+DEFAULT_SEARCH_FIELDS = ("id", "rank", "snippet", "charts")
+
+SEARCH_FIELD_COLUMNS = {
+    "content": "d.content",
+    "entities": "d.entities",
+    "keywords": "d.keywords[1:{max_keywords}] AS keywords",
+    "snippet": "ts_headline('english', d.content, plainto_tsquery('pg_catalog.english', $1), {options}) AS snippet",
+    "charts": f"""(
+        SELECT {CHARTS_JSON}
+        FROM charts c
+        WHERE c.document_id = d.id
+    ) AS charts""",
+}
+
+# Hits are ordered by (rank DESC, id ASC); a page starts strictly after the
+# cursor's (rank, id), so pages stay stable without OFFSET scans
+SEARCH_PAGE_SQL = """
+    WITH search_results AS (
+        SELECT
+            d.id,
+            ts_rank_cd(d.document_vector, q) as rank
+        FROM documents d,
+             plainto_tsquery('pg_catalog.english', $1) q
+        WHERE d.document_vector @@ q
+    ),
+    page AS (
+        SELECT id, rank
+        FROM search_results
+        WHERE {after}
+        ORDER BY rank DESC, id ASC
+        LIMIT $2
+    )
+    SELECT
+        p.id,
+        p.rank{columns}
+    FROM page p
+    JOIN documents d ON d.id = p.id
+    ORDER BY p.rank DESC, p.id ASC
+"""
+
+DATA_VERSION_SQL = """
+    SELECT version FROM data_version
+"""
+
+PREPARED_STATEMENTS = {
+    "get_document": GET_DOCUMENT_SQL,
+    "get_documents": GET_DOCUMENTS_SQL,
+    "rank_documents_lexical": RANK_DOCUMENTS_SQL,
+    "get_sentences": GET_SENTENCES_SQL,
+    "data_version": DATA_VERSION_SQL,
+    "content_length": CONTENT_LENGTH_SQL,
+    "content_chunks": CONTENT_CHUNKS_SQL,
+}
+
+def encode_cursor(rank: float, doc_id: int) -> str:
+    """Opaque keyset cursor for the hit after (rank, id)."""
+    raw = json.dumps([rank, doc_id]).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+def decode_cursor(cursor: str) -> Tuple[float, int]:
+    """Inverse of encode_cursor; raises ValueError for malformed cursors."""
+    try:
+        rank, doc_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return float(rank), int(doc_id)
+    except Exception:
+        raise ValueError("Invalid search cursor")
+
+def build_search_page_sql(fields, cursor: Optional[str], max_keywords: int) -> Tuple[str, list]:
+    """SQL and extra arguments (after query and limit) for one page of search hits."""
+    args: list = []
+    after = "TRUE"
+    if cursor:
+        rank, doc_id = decode_cursor(cursor)
+        args.extend([rank, doc_id])
+        after = "(rank, -id) < ($3::float4, -$4::int)"
+
+    columns = []
+    for field in SEARCH_FIELDS:
+        if field in ("id", "rank") or field not in fields:
+            continue
+        columns.append(SEARCH_FIELD_COLUMNS[field].format(
+            max_keywords=int(max_keywords),
+            options="'StartSel=<mark>, StopSel=</mark>, MaxWords=35, MinWords=15, MaxFragments=3'"
+        ))
+    sql = SEARCH_PAGE_SQL.format(
+        after=after,
+        columns="".join(f",\n        {column}" for column in columns)
+    )
+    return sql, args
+
+async def _init_connection(conn: asyncpg.Connection) -> None:
+    """Decode json/jsonb columns to Python objects, like psycopg2 does."""
+    for type_name in ("json", "jsonb"):
+        await conn.set_type_codec(
+            type_name,
+            encoder=json.dumps,
+            decoder=json.loads,
+            schema="pg_catalog"
+        )
+
+class _RecycleConnection(Exception):
+    """Raised by the checkout hook; asyncpg then closes the connection."""
+
+class AsyncDatabaseConnection:
+    """
+    asyncpg connection pool manager.
+
+    Connections are health-checked on checkout and retired once they exceed
+    ``max_lifetime`` seconds; a recycled connection is closed by asyncpg and
+    the checkout retried, so callers only see working connections.
+    """
+
+    def __init__(self, server_settings: Optional[Dict[str, str]] = None):
+        """
+        Initialize database configuration; the pool is created by open().
+        ``server_settings`` (e.g. ``{"search_path": ...}``) are applied to every
+        pooled connection; asyncpg ignores PGOPTIONS.
+        """
+        self.db_url = os.getenv("DATABASE_URL")
+        if not self.db_url:
+            raise ValueError("DATABASE_URL environment variable is not set")
+        self.min_size = int(os.getenv("DB_POOL_MIN_SIZE", 1))
+        self.max_size = int(os.getenv("DB_POOL_MAX_SIZE", 10))
+        self.max_idle = float(os.getenv("DB_POOL_MAX_IDLE", 300))
+        self.max_lifetime = float(os.getenv("DB_POOL_MAX_LIFETIME", 1800))
+        self.timeout = float(os.getenv("DB_POOL_TIMEOUT", 30))
+        self.health_check = os.getenv("DB_POOL_HEALTH_CHECK", "1") == "1"
+        # Prepared statements kept per connection; set to 0 behind a
+        # transaction-mode pgbouncer, which cannot hold them
+        self.statement_cache_size = int(os.getenv("DB_STATEMENT_CACHE_SIZE", 100))
+        self.server_settings = server_settings
+        self.pool: Optional[asyncpg.Pool] = None
+        self._listener: Optional[asyncpg.Connection] = None
+        self._open_lock = asyncio.Lock()
+        self._created_at: Dict[int, float] = {}  # backend pid -> creation time
+
+        self._checkouts = 0
+        self._waits = 0
+        self._wait_seconds = 0.0
+        self._timeouts = 0
+        self._opened = 0
+        self._closed = 0
+        self._failed_checks = 0
+
+    def _count(self, counter: str, value: float = 1) -> None:
+        """Add to a pool counter, also exported on /metrics as ``db_pool_<counter>_total``."""
+        setattr(self, f"_{counter}", getattr(self, f"_{counter}") + value)
+        metrics.increment(f"db_pool_{counter}", value)
+
+    async def open(self) -> None:
+        """Create the pool (called on application startup)."""
+        async with self._open_lock:
+            if self.pool is not None:
+                return
+            self.pool = await asyncpg.create_pool(
+                self.db_url,
+                min_size=self.min_size,
+                max_size=self.max_size,
+                max_inactive_connection_lifetime=self.max_idle,
+                statement_cache_size=self.statement_cache_size,
+                server_settings=self.server_settings,
+                init=self._init_connection,
+                setup=self._check_connection
+            )
+
+    async def _init_connection(self, conn: asyncpg.Connection) -> None:
+        """Set up a new pooled connection and remember when it was opened."""
+        await _init_connection(conn)
+        pid = conn.get_server_pid()
+        self._created_at[pid] = time.monotonic()
+        self._count("opened")
+        conn.add_termination_listener(lambda conn: self._connection_closed(pid))
+
+    def _connection_closed(self, pid: int) -> None:
+        self._created_at.pop(pid, None)
+        self._count("closed")
+
+    async def _check_connection(self, conn) -> None:
+        """Checkout hook: recycle expired connections and ones failing ``SELECT 1``."""
+        created = self._created_at.get(conn.get_server_pid())
+        if created is not None and time.monotonic() - created > self.max_lifetime:
+            raise _RecycleConnection()
+        if not self.health_check:
+            return
+        try:
+            await conn.fetchval("SELECT 1", timeout=self.timeout)
+        except (asyncpg.PostgresError, asyncpg.InterfaceError, OSError, asyncio.TimeoutError):
+            self._count("failed_checks")
+            conn.terminate()
+            raise _RecycleConnection()
+
+    @asynccontextmanager
+    async def acquire(self) -> AsyncIterator[asyncpg.Connection]:
+        """Check out a healthy connection, waiting up to ``timeout`` seconds."""
+        if self.pool is None:
+            await self.open()
+        start = time.monotonic()
+        deadline = start + self.timeout
+        # Every connection is checked out: this checkout has to wait
+        waited = self.pool.get_size() - self.pool.get_idle_size() >= self.max_size
+        while True:
+            try:
+                conn = await self.pool.acquire(timeout=max(deadline - time.monotonic(), 0))
+            except _RecycleConnection:
+                continue
+            except asyncio.TimeoutError:
+                self._count("timeouts")
+                raise
+            break
+        self._count("checkouts")
+        if waited:
+            self._count("waits")
+            self._count("wait_seconds", time.monotonic() - start)
+        try:
+            yield conn
+        finally:
+            await self.pool.release(conn)
+
+    async def close(self) -> None:
+        """Close the pool (called on application shutdown)."""
+        if self._listener is not None:
+            listener, self._listener = self._listener, None
+            await listener.close()
+        if self.pool is not None:
+            pool, self.pool = self.pool, None
+            await pool.close()
+
+    async def fetch(self, statement: str, *args) -> List[Dict[str, Any]]:
+        """Run a prepared statement and return all rows as dicts."""
+        return await self.fetch_sql(PREPARED_STATEMENTS[statement], *args, statement=statement)
+
+    async def fetch_sql(self, sql: str, *args, statement: str = "sql") -> List[Dict[str, Any]]:
+        """
+        Run SQL (prepared and cached per connection) and return rows as dicts.
+        Latency, including the wait for a pooled connection, is recorded
+        under ``statement``.
+        """
+        start = time.perf_counter()
+        try:
+            async with self.acquire() as conn:
+                rows = await conn.fetch(sql, *args)
+                return [dict(row) for row in rows]
+        finally:
+            QUERY_LATENCY.observe(time.perf_counter() - start, statement=statement)
+
+    async def iterate(self, statement: str, *args, prefetch: int = 4) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Stream the rows of a prepared statement through a server-side cursor.
+        One pooled connection and one read-only transaction are held until
+        the last row, so every row comes from the same snapshot; close the
+        generator (``contextlib.aclosing``) if it may be abandoned early.
+        """
+        start = time.perf_counter()
+        try:
+            async with self.acquire() as conn:
+                async with conn.transaction(readonly=True):
+                    async for row in conn.cursor(PREPARED_STATEMENTS[statement], *args, prefetch=prefetch):
+                        yield dict(row)
+        finally:
+            QUERY_LATENCY.observe(time.perf_counter() - start, statement=statement)
+
+    async def fetch_data_version(self) -> int:
+        """Data version bumped by the loader; 0 before the first load."""
+        try:
+            rows = await self.fetch("data_version")
+        except asyncpg.UndefinedTableError:
+            return 0
+        return rows[0]["version"] if rows else 0
+
+    async def listen(self, channel: str, on_notify: Callable[[str], None],
+                     on_lost: Optional[Callable[[], None]] = None) -> None:
+        """
+        LISTEN on ``channel`` over a dedicated connection (pooled connections
+        are shared and would drop the subscription when released).
+        """
+        if self._listener is None or self._listener.is_closed():
+            self._listener = await asyncpg.connect(self.db_url, server_settings=self.server_settings)
+            if on_lost is not None:
+                self._listener.add_termination_listener(lambda conn: on_lost())
+        await self._listener.add_listener(
+            channel, lambda conn, pid, channel, payload: on_notify(payload)
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        """Pool size and checkout metrics."""
+        if self.pool is None:
+            return {"closed": True}
+        return {
+            "min_size": self.pool.get_min_size(),
+            "max_size": self.pool.get_max_size(),
+            "size": self.pool.get_size(),
+            "idle": self.pool.get_idle_size(),
+            "in_use": self.pool.get_size() - self.pool.get_idle_size(),
+            "checkouts": self._checkouts,
+            "waits": self._waits,
+            "avg_wait_ms": round(self._wait_seconds / self._waits * 1000, 2) if self._waits else 0.0,
+            "timeouts": self._timeouts,
+            "connections_opened": self._opened,
+            "connections_closed": self._closed,
+            "failed_health_checks": self._failed_checks,
+            "closed": False,
+        }
+
+class AsyncDocumentRepository:
+    """Repository for document-related database operations used by the API endpoints."""
+
+    def __init__(self, server_settings: Optional[Dict[str, str]] = None):
+        """Initialize the repository."""
+        self.db = AsyncDatabaseConnection(server_settings)
+
+    async def get_document(self, doc_id: int) -> Optional[Dict[str, Any]]:
+        """Retrieve document and its associated charts by ID."""
+        rows = await self.db.fetch("get_document", doc_id)
+        return rows[0] if rows else None
+
+    async def search_page(
+        self,
+        query: str,
+        limit: int = 10,
+        fields=DEFAULT_SEARCH_FIELDS,
+        cursor: Optional[str] = None,
+        max_keywords: int = 20
+    ) -> Dict[str, Any]:
+        """
+        One page of full-text hits projected to ``fields``.
+
+        Hits carry a highlighted ``snippet`` rather than the whole content
+        unless ``content`` is requested. Returns ``{"results", "next_cursor"}``;
+        pass ``next_cursor`` back to fetch the following page.
+        """
+        sql, extra_args = build_search_page_sql(fields, cursor, max_keywords)
+        rows = await self.db.fetch_sql(sql, query, limit, *extra_args, statement="search_page")
+
+        next_cursor = None
+        if len(rows) == limit:
+            next_cursor = encode_cursor(rows[-1]["rank"], rows[-1]["id"])
+        results = [
+            {field: row[field] for field in SEARCH_FIELDS if field in fields}
+            for row in rows
+        ]
+        return {"results": results, "next_cursor": next_cursor}
+
+    async def get_content_length(self, doc_id: int) -> Optional[int]:
+        """Size of the document content in UTF-8 bytes, None if it does not exist."""
+        rows = await self.db.fetch("content_length", doc_id)
+        return rows[0]["length"] if rows else None
+
+    async def iter_content(self, doc_id: int, start: int, end: int,
+                           chunk_size: int = 256 * 1024) -> AsyncIterator[bytes]:
+        """
+        Yield content bytes [start, end) in chunks. The content is encoded
+        once and all chunks are read in one transaction.
+        """
+        if end <= start:
+            return
+        # Closing this generator must also close the cursor's, releasing its connection
+        async with aclosing(self.db.iterate("content_chunks", doc_id, start, end, chunk_size)) as rows:
+            async for row in rows:
+                if not row["chunk"]:
+                    return
+                yield row["chunk"]
+
+    async def rank_documents_lexical(self, query: str, limit: int = 50) -> List[Tuple[int, float]]:
+        """Rank document IDs by full-text relevance without fetching their content."""
+        rows = await self.db.fetch("rank_documents_lexical", query, limit)
+        return [(row["id"], row["rank"]) for row in rows]
+
+    async def get_documents(self, doc_ids: List[int]) -> Dict[int, Dict[str, Any]]:
+        """Retrieve several documents with their charts, keyed by ID."""
+        if not doc_ids:
+            return {}
+        rows = await self.db.fetch("get_documents", list(doc_ids))
+        return {row["id"]: row for row in rows}
+
+    async def hybrid_search(
+        self,
+        query: str,
+        vector_search: Callable[[str, int], Awaitable[List[int]]],
+        limit: int = 10,
+        lexical_weight: float = 1.0,
+        vector_weight: float = 1.0,
+        rrf_k: int = 60,
+        candidates: int = 50
+    ) -> List[Dict[str, Any]]:
+        """
+        Hybrid lexical + vector retrieval fused with weighted reciprocal rank fusion.
+
+        The full-text ranking and the awaitable ``vector_search`` run concurrently.
+        """
+        lexical, vector_ids = await asyncio.gather(
+            self.rank_documents_lexical(query, candidates),
+            vector_search(query, candidates)
+        )
+        lexical_ids = [doc_id for doc_id, _ in lexical]
+
+        fusion = fuse_rankings(lexical_ids, vector_ids, lexical_weight, vector_weight, rrf_k)
+        return await fusion.hydrate(self.get_documents, limit)
+
+    async def get_sentences(self, hits: List[Dict[str, Any]]) -> Dict[tuple, str]:
+        """Fetch the text of matched sentences, keyed by (document_id, start)."""
+        if not hits:
+            return {}
+        rows = await self.db.fetch(
+            "get_sentences",
+            [hit["document_id"] for hit in hits],
+            [hit["start"] for hit in hits],
+            [hit["end"] for hit in hits]
+        )
+        return {(row["document_id"], row["start"]): row["sentence"] for row in rows}
+
+# Create global repository instance
+async_document_repository = AsyncDocumentRepository()
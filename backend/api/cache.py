@@ -0,0 +1,282 @@
+import abc
+import asyncio
+import hashlib
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from dotenv import load_dotenv
+
+from pipeline.metrics import metrics
+
+# Load environment variables
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Channel the loader notifies after committing new documents
+INVALIDATION_CHANNEL = "documents_changed"
+
+# (body, etag) of a serialized response
+CachedResponse = Tuple[bytes, str]
+
+
+class CacheStore(abc.ABC):
+    """Key/value store interface for cached responses."""
+
+    @abc.abstractmethod
+    def get(self, key: str) -> Optional[CachedResponse]:
+        """Return the cached value for ``key``, or None on a miss."""
+
+    @abc.abstractmethod
+    def set(self, key: str, value: CachedResponse, ttl: float) -> None:
+        """Store ``value`` for ``ttl`` seconds."""
+
+    @abc.abstractmethod
+    def clear(self) -> None:
+        """Drop every cached value."""
+
+    def stats(self) -> Dict[str, Any]:
+        return {}
+
+
+class MemoryStore(CacheStore):
+    """In-process LRU store with per-entry expiry."""
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, CachedResponse]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: CachedResponse, ttl: float) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"entries": len(self._entries), "evictions": self.evictions}
+
+
+class RedisStore(CacheStore):
+    """
+    Shared store for several API workers. Entries expire through Redis TTLs;
+    stale versions are never read because the data version is part of the key.
+    """
+
+    def __init__(self, url: str, prefix: str = "api-cache:"):
+        import redis  # optional dependency, only needed for a shared store
+        self.client = redis.Redis.from_url(url)
+        self.prefix = prefix
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        values = self.client.hmget(self.prefix + key, "body", "etag")
+        if values[0] is None:
+            return None
+        return values[0], values[1].decode("ascii")
+
+    def set(self, key: str, value: CachedResponse, ttl: float) -> None:
+        body, etag = value
+        with self.client.pipeline() as pipe:
+            pipe.hset(self.prefix + key, mapping={"body": body, "etag": etag})
+            pipe.expire(self.prefix + key, max(1, int(ttl)))
+            pipe.execute()
+
+    def clear(self) -> None:
+        # Old versions simply age out; nothing to do eagerly
+        pass
+
+
+def etag_for(body: bytes) -> str:
+    """Strong ETag derived from the response body."""
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Evaluate an If-None-Match header against an ETag."""
+    if not if_none_match:
+        return False
+    candidates = [value.strip() for value in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+
+
+class ResponseCache:
+    """
+    Serialized-response cache for document and search endpoints.
+
+    Keys carry the current data version, which the loader bumps (and
+    announces with NOTIFY) whenever it commits new documents, so a load
+    invalidates every cached response at once. The TTL bounds staleness if
+    a notification is missed. A lost listener connection is re-established
+    with exponential backoff.
+    """
+
+    def __init__(self, store: Optional[CacheStore] = None, ttl: float = 300.0, enabled: bool = True,
+                 reconnect_delay: float = 1.0, max_reconnect_delay: float = 60.0):
+        """Initialize the cache; invalidation starts with start_invalidation()."""
+        self.store = store or MemoryStore()
+        self.ttl = ttl
+        self.enabled = enabled
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+        self.version = 0
+        self.listening = False
+        self.reconnects = 0
+        self._db = None
+        self._reconnect_task: Optional[asyncio.Task] = None
+        self._stopped = False
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+
+    def _key(self, namespace: str, key: str) -> str:
+        return f"v{self.version}:{namespace}:{key}"
+
+    def set_version(self, version: int) -> None:
+        """Switch to a new data version, dropping entries of older versions."""
+        if version != self.version:
+            self.version = version
+            self.store.clear()
+            logger.info(f"Response cache invalidated (data version {version})")
+
+    async def get_or_load(self, namespace: str, key: str,
+                          load: Callable[[], Awaitable[Optional[bytes]]]) -> Optional[CachedResponse]:
+        """
+        Return the cached (body, etag), calling ``load`` on a miss.
+
+        ``load`` returns the serialized body, or None for responses that
+        must not be cached (for example a missing document).
+        """
+        if not self.enabled:
+            body = await load()
+            return (body, etag_for(body)) if body is not None else None
+
+        cache_key = self._key(namespace, key)
+        cached = self.store.get(cache_key)
+        if cached is not None:
+            self.hits += 1
+            metrics.record_cache(f"api.response_cache.{namespace}", 1, 0)
+            return cached
+
+        self.misses += 1
+        metrics.record_cache(f"api.response_cache.{namespace}", 0, 1)
+        body = await load()
+        if body is None:
+            return None
+        value = (body, etag_for(body))
+        self.store.set(cache_key, value, self.ttl)
+        return value
+
+    async def start_invalidation(self, db) -> None:
+        """Read the current data version and listen for load notifications."""
+        self._db = db
+        self._stopped = False
+        try:
+            await self._subscribe()
+        except Exception as e:
+            logger.warning(f"Cache invalidation listener unavailable, relying on TTL: {e}")
+            self._schedule_reconnect()
+
+    async def stop_invalidation(self) -> None:
+        """Stop listening and reconnecting (called on application shutdown)."""
+        self._stopped = True
+        task, self._reconnect_task = self._reconnect_task, None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+    async def _subscribe(self) -> None:
+        # Notifications sent while not listening were missed: re-read the version
+        self.set_version(await self._db.fetch_data_version())
+        await self._db.listen(INVALIDATION_CHANNEL, self._on_notify, self._on_listener_lost)
+        self.listening = True
+
+    def _on_notify(self, payload: str) -> None:
+        try:
+            self.set_version(int(payload))
+        except ValueError:
+            self.set_version(self.version + 1)
+
+    def _on_listener_lost(self) -> None:
+        self.listening = False
+        if self._stopped:
+            return
+        self.store.clear()
+        logger.warning("Cache invalidation listener disconnected, reconnecting")
+        self._schedule_reconnect()
+
+    def _schedule_reconnect(self) -> None:
+        if self._stopped or (self._reconnect_task is not None and not self._reconnect_task.done()):
+            return
+        self._reconnect_task = asyncio.get_running_loop().create_task(self._reconnect())
+
+    async def _reconnect(self) -> None:
+        """Retry the subscription with exponential backoff until it succeeds."""
+        delay = self.reconnect_delay
+        while not self._stopped:
+            await asyncio.sleep(delay)
+            try:
+                await self._subscribe()
+            except Exception as e:
+                delay = min(delay * 2, self.max_reconnect_delay)
+                logger.warning(f"Cache invalidation listener reconnect failed, retrying in {delay:.0f}s: {e}")
+                continue
+            self.reconnects += 1
+            logger.info("Cache invalidation listener reconnected")
+            return
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit rate and store metrics."""
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "version": self.version,
+            "listening": self.listening,
+            "reconnects": self.reconnects,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "not_modified": self.not_modified,
+            **self.store.stats(),
+        }
+
+
+def _create_store() -> CacheStore:
+    url = os.getenv("RESPONSE_CACHE_URL")
+    if url:
+        return RedisStore(url)
+    return MemoryStore(int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", 1024)))
+
+
+# Create global cache instance
+response_cache = ResponseCache(
+    _create_store(),
+    ttl=float(os.getenv("RESPONSE_CACHE_TTL", 300)),
+    enabled=os.getenv("RESPONSE_CACHE_ENABLED", "1") == "1"
+)
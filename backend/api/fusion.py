@@ -0,0 +1,62 @@
+from typing import Any, Awaitable, Callable, Dict, List
+
+
+class RankFusion:
+    """Outcome of reciprocal rank fusion over a lexical and a vector ranking."""
+
+    def __init__(self, scores: Dict[int, float], lexical_ranks: Dict[int, int],
+                 vector_ranks: Dict[int, int]):
+        self.scores = scores
+        self.lexical_ranks = lexical_ranks
+        self.vector_ranks = vector_ranks
+        # Every candidate, best first; truncated only once documents are hydrated
+        self.ranked_ids = sorted(scores, key=scores.get, reverse=True)
+
+    def results(self, documents: Dict[int, Dict[str, Any]], limit: int) -> List[Dict[str, Any]]:
+        """
+        Attach fused and per-ranking positions to the best ``limit`` hydrated
+        documents; candidates without a document are skipped.
+        """
+        results = []
+        for doc_id in self.ranked_ids:
+            if len(results) == limit:
+                break
+            document = documents.get(doc_id)
+            if document is None:
+                continue
+            results.append({
+                **document,
+                "rank": self.scores[doc_id],
+                "lexical_rank": self.lexical_ranks.get(doc_id),
+                "vector_rank": self.vector_ranks.get(doc_id)
+            })
+        return results
+
+    async def hydrate(self, get_documents: Callable[[List[int]], Awaitable[Dict[int, Dict[str, Any]]]],
+                      limit: int) -> List[Dict[str, Any]]:
+        """
+        Fetch the best ``limit`` candidates that still exist. Vector hits can
+        outlive their database row, so each missing one is replaced by the
+        next candidate in fused order.
+        """
+        documents: Dict[int, Dict[str, Any]] = {}
+        fetched = 0
+        while len(documents) < limit and fetched < len(self.ranked_ids):
+            batch = self.ranked_ids[fetched:fetched + limit - len(documents)]
+            fetched += len(batch)
+            documents.update(await get_documents(batch))
+        return self.results(documents, limit)
+
+
+def fuse_rankings(lexical_ids: List[int], vector_ids: List[int],
+                  lexical_weight: float = 1.0, vector_weight: float = 1.0,
+                  rrf_k: int = 60) -> RankFusion:
+    """Weighted reciprocal rank fusion: each ranking adds ``weight / (rrf_k + rank)``."""
+    scores: Dict[int, float] = {}
+    lexical_ranks = {doc_id: rank for rank, doc_id in enumerate(lexical_ids, start=1)}
+    vector_ranks = {doc_id: rank for rank, doc_id in enumerate(vector_ids, start=1)}
+    for doc_id, rank in lexical_ranks.items():
+        scores[doc_id] = scores.get(doc_id, 0.0) + lexical_weight / (rrf_k + rank)
+    for doc_id, rank in vector_ranks.items():
+        scores[doc_id] = scores.get(doc_id, 0.0) + vector_weight / (rrf_k + rank)
+    return RankFusion(scores, lexical_ranks, vector_ranks)
@@ -1,11 +1,23 @@
-from fastapi import FastAPI, HTTPException, Query
+from fastapi import FastAPI, HTTPException, Query, Header, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from starlette.routing import Match
+import json
 import logging
-from .models import SearchQuery, DocumentResponse, SearchResult
-from .db import document_repository
-from typing import List
-from pydantic import BaseModel
+import time
+from contextlib import aclosing
+from .models import (
+    SearchQuery, SearchPage, DocumentResponse, SearchResult,
+    SemanticSearchQuery, SemanticBatchSearchQuery, SemanticSearchResult,
+    HybridSearchQuery, HybridSearchResult
+)
+from .async_db import async_document_repository
+from .semantic import semantic_searcher, group_hits_by_document
+from .cache import response_cache, etag_matches
+from pipeline.metrics import metrics
+from typing import List, Optional, Tuple
 
 # Create FastAPI application
 app = FastAPI(
@@ -23,6 +35,63 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+logger = logging.getLogger(__name__)
+
+# Endpoints whose latency is exported on /metrics
+TIMED_PREFIXES = ("/documents", "/search")
+
+REQUEST_LATENCY = metrics.histogram(
+    "http_request_duration_seconds", "Request latency, by method, route template and status"
+)
+
+def _route_template(request: Request) -> str:
+    """Route path with parameters unexpanded (/documents/{doc_id}), to bound label values."""
+    for route in app.router.routes:
+        match, _ = route.matches(request.scope)
+        if match == Match.FULL:
+            return route.path
+    return "unmatched"
+
+@app.middleware("http")
+async def record_latency(request: Request, call_next):
+    """Record request latency for the document and search endpoints."""
+    if not request.url.path.startswith(TIMED_PREFIXES):
+        return await call_next(request)
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        REQUEST_LATENCY.observe(
+            time.perf_counter() - start,
+            method=request.method, route=_route_template(request), status=str(status)
+        )
+
+@app.on_event("startup")
+async def open_database_pool():
+    """Open pooled database connections before serving requests."""
+    try:
+        await async_document_repository.db.open()
+    except Exception as e:
+        logger.warning(f"Database pool not ready at startup: {e}")
+    await response_cache.start_invalidation(async_document_repository.db)
+
+@app.on_event("shutdown")
+async def close_database_pool():
+    """Close pooled database connections."""
+    await response_cache.stop_invalidation()
+    await async_document_repository.db.close()
+
+@app.on_event("startup")
+def load_semantic_search():
+    """Load the sentence-transformer and vector index once per worker."""
+    try:
+        semantic_searcher.warm_up()
+    except Exception as e:
+        logger.warning(f"Semantic search not ready at startup: {e}")
+
 @app.get("/")
 async def root():
     """Root endpoint."""
@@ -32,6 +101,40 @@ async def root():
         "docs_url": "/docs"
     }
 
+@app.get("/health/db")
+async def database_health():
+    """Connection pool metrics."""
+    return {
+        "async": async_document_repository.db.stats(),
+        "response_cache": response_cache.stats()
+    }
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def prometheus_metrics():
+    """Request and query latency histograms and cache counters, in the Prometheus text format."""
+    return PlainTextResponse(
+        metrics.render_prometheus(), media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+def _serialize(payload, exclude_none: bool = False) -> bytes:
+    """
+    Encode a response payload once so cached bodies are served as-is.
+    Pass the endpoint's response model (and its ``response_model_exclude_none``)
+    since FastAPI does not apply them to a returned Response.
+    """
+    return json.dumps(
+        jsonable_encoder(payload, exclude_none=exclude_none), separators=(",", ":")
+    ).encode("utf-8")
+
+def _cached_response(cached, if_none_match: Optional[str]) -> Response:
+    """Serve a cached body, or 304 when the client already has this version."""
+    body, etag = cached
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag_matches(if_none_match, etag):
+        response_cache.not_modified += 1
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
 @app.get(
     "/documents/{doc_id}",
     response_model=DocumentResponse,
@@ -40,27 +143,35 @@ async def root():
         500: {"description": "Internal server error"}
     }
 )
-async def get_document_by_id(doc_id: int):
+async def get_document_by_id(doc_id: int, if_none_match: Optional[str] = Header(None)):
     """
     Retrieve a document and its associated charts by ID.
     
     Args:
         doc_id: The ID of the document to retrieve
+        if_none_match: ETag of a copy the client already has
         
     Returns:
         DocumentResponse: The document and its associated data
+        (304 Not Modified if the client's copy is current)
         
     Raises:
         HTTPException: If document is not found or server error occurs
     """
-    try:
-        document = document_repository.get_document(doc_id)
+    async def load():
+        document = await async_document_repository.get_document(doc_id)
         if not document:
+            return None
+        return _serialize(DocumentResponse.parse_obj(document))
+
+    try:
+        cached = await response_cache.get_or_load("document", str(doc_id), load)
+        if cached is None:
             raise HTTPException(
                 status_code=404,
                 detail=f"Document with ID {doc_id} not found"
             )
-        return document
+        return _cached_response(cached, if_none_match)
     except HTTPException:
         raise
     except Exception as e:
@@ -69,17 +180,157 @@ async def get_document_by_id(doc_id: int):
             detail=f"Internal server error: {str(e)}"
         )
 
-class SearchRequest(BaseModel):
-    query: str
-    limit: int = 10  # Default limit
-
-@app.post("/search", response_model=List[dict])
-def search_documents(request: SearchRequest):
-    """Search documents in database using full-text search."""
-    results = document_repository.search_documents(request.query, request.limit)
-    if not results:
-        return []
-    return results
+class _ClosingStreamingResponse(StreamingResponse):
+    """
+    Streaming response that closes its async generator however the response
+    ends. On a client disconnect Starlette stops iterating but leaves the
+    generator suspended, holding its pooled connection until it is collected.
+    """
+
+    async def __call__(self, scope, receive, send):
+        async with aclosing(self.body_iterator):
+            await super().__call__(scope, receive, send)
+
+def _parse_range(range_header: Optional[str], length: int) -> Optional[Tuple[int, int]]:
+    """
+    Parse a single ``bytes=`` range into [start, end). Returns None to serve
+    the whole body (no header, or several ranges); raises 416 if unsatisfiable.
+    """
+    if not range_header or not range_header.startswith("bytes=") or "," in range_header:
+        return None
+    first, _, last = range_header[len("bytes="):].strip().partition("-")
+    try:
+        if first:
+            start = int(first)
+            end = int(last) + 1 if last else length
+        else:
+            start, end = max(0, length - int(last)), length
+    except ValueError:
+        return None
+    end = min(end, length)
+    if start >= length or start >= end:
+        raise HTTPException(
+            status_code=416,
+            detail="Requested range not satisfiable",
+            headers={"Content-Range": f"bytes */{length}"}
+        )
+    return start, end
+
+@app.get(
+    "/documents/{doc_id}/content",
+    response_class=StreamingResponse,
+    responses={
+        200: {"content": {"text/plain": {}}, "description": "Full document content"},
+        206: {"description": "Requested byte range of the content"},
+        404: {"description": "Document not found"},
+        416: {"description": "Range not satisfiable"}
+    }
+)
+async def get_document_content(doc_id: int, range_header: Optional[str] = Header(None, alias="Range")):
+    """
+    Stream a document's content as UTF-8 text.
+
+    Supports a single ``Range: bytes=start-end`` request (206 Partial Content);
+    the content is read from the database in chunks rather than all at once.
+    """
+    length = await async_document_repository.get_content_length(doc_id)
+    if length is None:
+        raise HTTPException(status_code=404, detail=f"Document with ID {doc_id} not found")
+
+    byte_range = _parse_range(range_header, length)
+    start, end = byte_range or (0, length)
+    headers = {"Accept-Ranges": "bytes", "Content-Length": str(end - start)}
+    if byte_range:
+        headers["Content-Range"] = f"bytes {start}-{end - 1}/{length}"
+
+    return _ClosingStreamingResponse(
+        async_document_repository.iter_content(doc_id, start, end),
+        status_code=206 if byte_range else 200,
+        media_type="text/plain; charset=utf-8",
+        headers=headers
+    )
+
+@app.post("/search", response_model=SearchPage, response_model_exclude_none=True)
+async def search_documents(request: SearchQuery, if_none_match: Optional[str] = Header(None)):
+    """
+    Search documents in database using full-text search.
+
+    Hits carry highlighted snippets instead of full content by default; use
+    ``fields`` to choose what is returned, ``cursor`` to page through results
+    and ``GET /documents/{id}/content`` for the full text.
+    """
+    async def load():
+        try:
+            page = await async_document_repository.search_page(
+                request.query,
+                request.limit,
+                fields=request.fields,
+                cursor=request.cursor,
+                max_keywords=request.max_keywords
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        return _serialize(SearchPage.parse_obj(page), exclude_none=True)
+
+    # plainto_tsquery ignores case and extra whitespace, so neither splits the cache
+    normalized = " ".join(request.query.lower().split())
+    key = json.dumps([
+        normalized, request.limit, request.fields, request.cursor, request.max_keywords
+    ])
+    cached = await response_cache.get_or_load("search", key, load)
+    return _cached_response(cached, if_none_match)
+
+async def _semantic_search(queries: List[str], limit: int, k: int) -> List[List[dict]]:
+    """Run k-NN for all queries at once and hydrate the matched sentences."""
+    try:
+        # Encoding and FAISS search are CPU-bound; keep them off the event loop
+        hits_per_query = await run_in_threadpool(semantic_searcher.search, queries, k)
+    except FileNotFoundError:
+        raise HTTPException(status_code=503, detail="Vector index has not been built yet")
+
+    all_hits = [hit for hits in hits_per_query for hit in hits]
+    sentences = await async_document_repository.get_sentences(all_hits)
+
+    return [
+        group_hits_by_document(
+            [hit for hit in hits if (hit["document_id"], hit["start"]) in sentences],
+            limit,
+            sentences
+        )
+        for hits in hits_per_query
+    ]
+
+@app.post("/search/semantic", response_model=List[SemanticSearchResult])
+async def semantic_search(request: SemanticSearchQuery):
+    """Search documents by meaning using sentence embeddings."""
+    return (await _semantic_search([request.query], request.limit, request.k))[0]
+
+@app.post("/search/semantic/batch", response_model=List[List[SemanticSearchResult]])
+async def semantic_search_batch(request: SemanticBatchSearchQuery):
+    """Run many semantic searches in one request; queries are encoded together."""
+    return await _semantic_search(request.queries, request.limit, request.k)
+
+async def _vector_document_ranking(query: str, candidates: int) -> List[int]:
+    """Document IDs ordered by their best matching sentence."""
+    hits = (await run_in_threadpool(semantic_searcher.search, [query], candidates * 5))[0]
+    return [document["id"] for document in group_hits_by_document(hits, candidates)]
+
+@app.post("/search/hybrid", response_model=List[HybridSearchResult])
+async def hybrid_search(request: HybridSearchQuery):
+    """Search documents with full-text and vector retrieval fused by reciprocal rank."""
+    try:
+        return await async_document_repository.hybrid_search(
+            request.query,
+            _vector_document_ranking,
+            limit=request.limit,
+            lexical_weight=request.lexical_weight,
+            vector_weight=request.vector_weight,
+            rrf_k=request.rrf_k,
+            candidates=request.candidates
+        )
+    except FileNotFoundError:
+        raise HTTPException(status_code=503, detail="Vector index has not been built yet")
+
 @app.exception_handler(Exception)
 async def global_exception_handler(request, exc):
     """Global exception handler."""
@@ -20,6 +20,8 @@ class ChartInfo(BaseModel):
     confidence: float = Field(..., ge=0, le=1, description="Confidence score of chart detection")
     characteristics: ChartCharacteristics
     type: str = Field(..., description="Type of the chart")
+    page_number: Optional[int] = Field(None, description="Page the chart was found on")
+    bbox: Optional[List[float]] = Field(None, description="Chart bounding box [x0, y0, x1, y1] in PDF points")
 
 class DocumentBase(BaseModel):
     """Base document model."""
@@ -39,12 +41,82 @@ class DocumentResponse(DocumentBase):
             return []
         return v
 
+SEARCH_FIELDS = ["id", "rank", "snippet", "content", "entities", "keywords", "charts"]
+
 class SearchQuery(BaseModel):
     """Search query model."""
     query: str = Field(..., min_length=1, description="Search query string")
     limit: Optional[int] = Field(10, ge=1, le=100, description="Maximum number of results to return")
+    fields: List[str] = Field(
+        ["id", "rank", "snippet", "charts"],
+        description=f"Fields to return per hit, any of {', '.join(SEARCH_FIELDS)}"
+    )
+    cursor: Optional[str] = Field(None, description="next_cursor of the previous page")
+    max_keywords: int = Field(20, ge=0, le=1000, description="Keywords returned per hit when projected")
+
+    @validator('fields')
+    def check_fields(cls, v):
+        """Only allow known fields; id is always returned."""
+        unknown = [field for field in v if field not in SEARCH_FIELDS]
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+        return ["id"] + [field for field in v if field != "id"]
 
 class SearchResult(DocumentBase):
     """Search result model."""
     rank: float = Field(..., description="Search result ranking score")
-    charts: List[ChartInfo] = Field(default_factory=list, description="Charts in the document")
\ No newline at end of file
+    charts: List[ChartInfo] = Field(default_factory=list, description="Charts in the document")
+
+class SearchHit(BaseModel):
+    """Search hit projected to the requested fields."""
+    id: int = Field(..., description="Document ID")
+    rank: Optional[float] = Field(None, description="Search result ranking score")
+    snippet: Optional[str] = Field(None, description="Matching passages, terms wrapped in <mark>")
+    content: Optional[str] = Field(None, description="Document content")
+    entities: Optional[List[Entity]] = Field(None, description="Named entities found in the document")
+    keywords: Optional[List[str]] = Field(None, description="Keywords extracted from the document")
+    charts: Optional[List[ChartInfo]] = Field(None, description="Charts in the document")
+
+class SearchPage(BaseModel):
+    """One page of search hits."""
+    results: List[SearchHit] = Field(default_factory=list, description="Search hits")
+    next_cursor: Optional[str] = Field(None, description="Cursor for the next page, omitted on the last page")
+
+class SemanticSearchQuery(BaseModel):
+    """Semantic search query model."""
+    query: str = Field(..., min_length=1, description="Natural-language search query")
+    limit: int = Field(10, ge=1, le=100, description="Maximum number of documents to return")
+    k: int = Field(50, ge=1, le=1000, description="Number of nearest sentences to retrieve")
+
+class SemanticBatchSearchQuery(BaseModel):
+    """Batch semantic search model (queries are encoded together)."""
+    queries: List[str] = Field(..., min_items=1, max_items=100, description="Search queries")
+    limit: int = Field(10, ge=1, le=100, description="Maximum number of documents per query")
+    k: int = Field(50, ge=1, le=1000, description="Number of nearest sentences per query")
+
+class SentenceMatch(BaseModel):
+    """Sentence matched by semantic search."""
+    sentence: str = Field(..., description="Matched sentence text")
+    score: float = Field(..., description="Cosine similarity to the query")
+    start: int = Field(..., description="Start offset of the sentence in the document content")
+    end: int = Field(..., description="End offset of the sentence in the document content")
+
+class SemanticSearchResult(BaseModel):
+    """Semantic search result model."""
+    id: int = Field(..., description="Document ID")
+    score: float = Field(..., description="Best sentence similarity in the document")
+    matches: List[SentenceMatch] = Field(default_factory=list, description="Matched sentences")
+
+class HybridSearchQuery(BaseModel):
+    """Hybrid (full-text + vector) search query model."""
+    query: str = Field(..., min_length=1, description="Search query string")
+    limit: int = Field(10, ge=1, le=100, description="Maximum number of results to return")
+    lexical_weight: float = Field(1.0, ge=0, description="Weight of the full-text ranking in rank fusion")
+    vector_weight: float = Field(1.0, ge=0, description="Weight of the vector ranking in rank fusion")
+    rrf_k: int = Field(60, ge=1, description="Reciprocal rank fusion constant")
+    candidates: int = Field(50, ge=1, le=1000, description="Candidates taken from each ranking before fusion")
+
+class HybridSearchResult(SearchResult):
+    """Hybrid search result model (rank is the fused score)."""
+    lexical_rank: Optional[int] = Field(None, description="Position in the full-text ranking")
+    vector_rank: Optional[int] = Field(None, description="Position in the vector ranking")
@@ -0,0 +1,88 @@
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from dotenv import load_dotenv
+
+from pipeline.vector_index import VectorIndex
+
+# Load environment variables
+load_dotenv()
+
+DEFAULT_INDEX_DIR = Path(__file__).resolve().parents[2] / "data" / "index"
+
+
+class SemanticSearcher:
+    """Query encoder and k-NN lookup against the persisted sentence vector index."""
+
+    def __init__(self):
+        """Initialize configuration; the model and index are loaded on first use."""
+        self.index_dir = Path(os.getenv("VECTOR_INDEX_DIR", DEFAULT_INDEX_DIR))
+        self.model_name = os.getenv("EMBEDDING_MODEL", "all-MiniLM-L6-v2")
+        self.nprobe = int(os.getenv("VECTOR_INDEX_NPROBE", 16))
+        self.ef_search = int(os.getenv("VECTOR_INDEX_EF_SEARCH", 64))
+        self._model = None
+        self._index = None
+        self._lock = threading.Lock()
+
+    @property
+    def model(self):
+        """SentenceTransformer, loaded once per worker process."""
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    from sentence_transformers import SentenceTransformer
+                    self._model = SentenceTransformer(self.model_name)
+        return self._model
+
+    @property
+    def index(self) -> VectorIndex:
+        """Memory-mapped vector index, reloaded when the loader saves a new version."""
+        with self._lock:
+            if self._index is None:
+                self._index = VectorIndex(self.index_dir, read_only=True)
+                self._index.apply_search_params(self.nprobe, self.ef_search)
+            elif self._index.refresh():
+                self._index.apply_search_params(self.nprobe, self.ef_search)
+            return self._index
+
+    def warm_up(self) -> None:
+        """Load the model and index ahead of the first request."""
+        self.model
+        self.index
+
+    def search(self, queries: List[str], k: int = 50) -> List[List[Dict[str, Any]]]:
+        """Encode all queries in one batch and return the k nearest sentences for each."""
+        embeddings = self.model.encode(queries, convert_to_numpy=True, show_progress_bar=False)
+        return self.index.search(embeddings, k)
+
+
+def group_hits_by_document(hits: List[Dict[str, Any]], limit: int,
+                           sentences: Optional[Dict[tuple, str]] = None) -> List[Dict[str, Any]]:
+    """
+    Group sentence hits into documents ranked by their best sentence score.
+
+    ``sentences`` maps (document_id, start) to the matched sentence text.
+    """
+    documents: Dict[int, Dict[str, Any]] = {}
+    for hit in hits:
+        document = documents.setdefault(hit["document_id"], {
+            "id": hit["document_id"],
+            "score": hit["score"],
+            "matches": [],
+        })
+        document["score"] = max(document["score"], hit["score"])
+        document["matches"].append({
+            "sentence": (sentences or {}).get((hit["document_id"], hit["start"]), ""),
+            "score": hit["score"],
+            "start": hit["start"],
+            "end": hit["end"],
+        })
+
+    ranked = sorted(documents.values(), key=lambda document: document["score"], reverse=True)
+    return ranked[:limit]
+
+
+# Create global searcher instance
+semantic_searcher = SemanticSearcher()
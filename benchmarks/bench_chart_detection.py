@@ -0,0 +1,130 @@
+"""
+Benchmark chart detection throughput (pages/sec).
+
+Compares the original per-segment loop against the vectorized detector,
+run sequentially, on a thread pool, and with the downscaled cascade.
+Pages are rasterized once up front so only detection is timed.
+
+Usage:
+    python benchmarks/bench_chart_detection.py [path/to.pdf] [--repeat N] [--output results.json]
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "pipeline"))
+os.environ.setdefault("DATABASE_URL", "postgresql://localhost/benchmark")
+
+import extract  # noqa: E402
+from config import CHART_DETECTION  # noqa: E402
+
+
+def legacy_detect(img):
+    """Chart detection as it was before vectorization (per-segment Python loop)."""
+    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+    binary = cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
+                                   cv2.THRESH_BINARY_INV, 11, 2)
+    edges = cv2.Canny(binary, 50, 150, apertureSize=3)
+    lines = cv2.HoughLinesP(edges, 1, np.pi/180, threshold=100,
+                            minLineLength=100, maxLineGap=20)
+    contours, _ = cv2.findContours(binary, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+
+    characteristics = {
+        "has_lines": lines is not None and len(lines) > 10,
+        "has_shapes": len(contours) > 5,
+        "regular_patterns": False
+    }
+    if lines is not None:
+        horizontal_lines, vertical_lines = 0, 0
+        for line in lines:
+            x1, y1, x2, y2 = line[0]
+            angle = np.abs(np.arctan2(y2 - y1, x2 - x1) * 180.0 / np.pi)
+            if angle < 5 or angle > 175:
+                horizontal_lines += 1
+            elif 85 < angle < 95:
+                vertical_lines += 1
+        characteristics["regular_patterns"] = horizontal_lines > 3 and vertical_lines > 3
+
+    return {
+        "characteristics": characteristics,
+        "confidence_score": sum(characteristics.values()) / len(characteristics)
+    }
+
+
+def run_legacy(pages):
+    return [legacy_detect(image) for _, image in pages]
+
+
+def run_current(pages, workers, cascade):
+    previous = CHART_DETECTION["CASCADE"]
+    CHART_DETECTION["CASCADE"] = cascade
+    try:
+        return extract.detect_charts_in_images(iter(pages), workers=workers)
+    finally:
+        CHART_DETECTION["CASCADE"] = previous
+
+
+def measure(name, fn, pages, repeat):
+    """Run fn(pages) ``repeat`` times and return the best pages/sec."""
+    best, result = None, None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = fn(pages)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    pages_per_sec = len(pages) / best
+    print(f"{name:<28} {best:8.3f}s  {pages_per_sec:8.2f} pages/sec")
+    return {"name": name, "seconds": best, "pages_per_sec": pages_per_sec}, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("pdf", nargs="?", default=str(ROOT / "data" / "input" / "input_data.pdf"))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--output", help="Write results as JSON to this path")
+    args = parser.parse_args()
+
+    pages = list(extract.iter_pdf_pages(args.pdf))
+    print(f"{len(pages)} pages from {args.pdf}, {args.workers} threads\n")
+
+    runs = []
+    baseline, expected = measure("legacy loop", run_legacy, pages, args.repeat)
+    runs.append(baseline)
+
+    variants = [
+        ("vectorized", 1, False),
+        (f"vectorized x{args.workers} threads", args.workers, False),
+        (f"cascade x{args.workers} threads", args.workers, True),
+    ]
+    for name, workers, cascade in variants:
+        run, records = measure(name, lambda p: run_current(p, workers, cascade), pages, args.repeat)
+        run["speedup"] = run["pages_per_sec"] / baseline["pages_per_sec"]
+        if not cascade:
+            same = all(
+                record["characteristics"] == legacy["characteristics"]
+                and record["confidence_score"] == legacy["confidence_score"]
+                for record, legacy in zip(records, expected)
+            )
+            run["matches_legacy"] = same
+            if not same:
+                print(f"  !! {name} output differs from the legacy detector")
+        runs.append(run)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"pdf": args.pdf, "pages": len(pages), "runs": runs}, f, indent=4)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+"""
+Benchmark the load stage against a local Postgres (rows/sec).
+
+Loads synthetic documents (sentences, random 384-d embeddings and charts)
+two ways over one connection:
+
+- ``legacy``: one INSERT per chart and per embedding row (vector as FLOAT[])
+- ``bulk``:   DatabaseLoader.load_document (multi-row chart insert, COPY of
+              packed float32 embeddings, one transaction per document)
+
+Everything runs in a scratch schema that is dropped afterwards. The vector
+index is not touched.
+
+Usage:
+    DATABASE_URL=postgresql://localhost/postgres python benchmarks/bench_load.py
+        [--documents 20] [--sentences 2000] [--charts 10] [--output results.json]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+SCHEMA = "bench_load"
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "pipeline"))
+os.environ.setdefault("DATABASE_URL", "postgresql://localhost/postgres")
+# Every connection (including the loader's) works inside the scratch schema
+os.environ["PGOPTIONS"] = f"{os.environ.get('PGOPTIONS', '')} -c search_path={SCHEMA}".strip()
+
+import psycopg2  # noqa: E402
+from psycopg2.extras import Json  # noqa: E402
+
+from config import DATABASE_URL  # noqa: E402
+from load import DatabaseLoader  # noqa: E402
+
+
+def make_document(rng: np.random.Generator, sentences: int, charts: int, dimension: int = 384):
+    """Synthetic processed document plus its embeddings."""
+    words = ["model", "layer", "accuracy", "dataset", "training", "result", "figure", "method"]
+    text = [
+        " ".join(rng.choice(words, size=int(rng.integers(8, 25)))).capitalize() + "."
+        for _ in range(sentences)
+    ]
+    data = {
+        "text_analysis": {
+            "sentences": text,
+            "entities": [{"text": "ImageNet", "label": "ORG"}],
+            "keywords": words,
+        },
+        "charts": [
+            {
+                "image_path": f"page_{i + 1}.png",
+                "confidence": float(rng.random()),
+                "characteristics": {"has_lines": True, "has_shapes": False, "regular_patterns": True},
+                "page_number": i + 1,
+                "bbox": None,
+            }
+            for i in range(charts)
+        ],
+    }
+    embeddings = rng.standard_normal((sentences, dimension)).astype(np.float32)
+    return data, embeddings
+
+
+def legacy_load(conn, data, embeddings) -> int:
+    """Row-at-a-time inserts, as the loader did before the bulk path."""
+    with conn.cursor() as cur:
+        cur.execute("""
+            INSERT INTO documents (content, entities, keywords) VALUES (%s, %s, %s) RETURNING id
+        """, ("\n".join(data["text_analysis"]["sentences"]),
+              Json(data["text_analysis"]["entities"]),
+              data["text_analysis"]["keywords"]))
+        document_id = cur.fetchone()[0]
+        for chart in data["charts"]:
+            cur.execute("""
+                INSERT INTO charts (document_id, image_path, confidence, characteristics, page_number, bbox)
+                VALUES (%s, %s, %s, %s, %s, %s)
+            """, (document_id, chart["image_path"], chart["confidence"],
+                  Json(chart["characteristics"]), chart["page_number"], None))
+        for i, (sentence, vector) in enumerate(zip(data["text_analysis"]["sentences"], embeddings)):
+            cur.execute("""
+                INSERT INTO legacy_embeddings (document_id, sentence_index, sentence, vector)
+                VALUES (%s, %s, %s, %s)
+            """, (document_id, i, sentence, vector.tolist()))
+    conn.commit()
+    return document_id
+
+
+def rows_in(data) -> int:
+    return 1 + len(data["charts"]) + len(data["text_analysis"]["sentences"])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--documents", type=int, default=20)
+    parser.add_argument("--sentences", type=int, default=2000)
+    parser.add_argument("--charts", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=str, default=None)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    corpus = [make_document(rng, args.sentences, args.charts) for _ in range(args.documents)]
+    total_rows = sum(rows_in(data) for data, _ in corpus)
+
+    admin = psycopg2.connect(DATABASE_URL)
+    admin.autocommit = True
+    with admin.cursor() as cur:
+        cur.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+        cur.execute(f"CREATE SCHEMA {SCHEMA}")
+
+    results = {"documents": args.documents, "rows_per_document": rows_in(corpus[0][0]), "runs": {}}
+    try:
+        loader = DatabaseLoader()
+        loader.cur.execute("""
+            CREATE TABLE legacy_embeddings (
+                id SERIAL PRIMARY KEY,
+                document_id INTEGER REFERENCES documents(id) ON DELETE CASCADE,
+                sentence_index INTEGER,
+                sentence TEXT NOT NULL,
+                vector FLOAT[]
+            )
+        """)
+        loader.conn.commit()
+
+        start = time.perf_counter()
+        for data, embeddings in corpus:
+            legacy_load(loader.conn, data, embeddings)
+        legacy_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for data, embeddings in corpus:
+            loader.load_document(data, embeddings)
+        bulk_seconds = time.perf_counter() - start
+
+        for name, seconds in (("legacy", legacy_seconds), ("bulk", bulk_seconds)):
+            results["runs"][name] = {
+                "seconds": round(seconds, 3),
+                "rows_per_sec": round(total_rows / seconds, 1),
+                "documents_per_sec": round(args.documents / seconds, 2),
+            }
+        results["speedup"] = round(legacy_seconds / bulk_seconds, 2)
+        results["embedding_storage"] = loader.embedding_format
+        loader.close()
+    finally:
+        with admin.cursor() as cur:
+            cur.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+        admin.close()
+
+    output = json.dumps(results, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output)
+
+
+if __name__ == "__main__":
+    main()
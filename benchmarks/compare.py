@@ -0,0 +1,100 @@
+"""
+Compare two benchmark results files (from run_suite.py) and flag regressions.
+
+Throughput metrics (``*_per_sec``) regress when they drop, time metrics
+(``seconds``, ``*_ms``) when they grow. A change beyond ``--threshold``
+(relative, default 10%) in the wrong direction is a regression, and the
+script exits with status 1 so it can gate CI. With ``--steps``, the
+per-step timings are compared as well. Results from different corpora are
+refused unless ``--allow-corpus-mismatch`` is given.
+
+Usage:
+    python benchmarks/compare.py baseline.json candidate.json [--threshold 0.10] [--steps]
+"""
+import argparse
+import json
+import sys
+from typing import Any, Dict, List, Optional
+
+
+def direction(metric: str) -> Optional[int]:
+    """+1 if higher is better, -1 if lower is better, None if not compared."""
+    if metric.endswith("_per_sec"):
+        return 1
+    if metric == "seconds" or metric.endswith("_ms"):
+        return -1
+    return None
+
+
+def flatten(benchmarks: Dict[str, Any], steps: bool) -> Dict[str, float]:
+    """Comparable metrics as ``benchmark.metric`` (and ``benchmark.steps.step.metric``)."""
+    values = {}
+    for name, result in benchmarks.items():
+        for metric, value in result.items():
+            if direction(metric) is not None and isinstance(value, (int, float)):
+                values[f"{name}.{metric}"] = value
+        if steps:
+            for step, timer in result.get("steps", {}).items():
+                for metric in ("seconds", "items_per_sec"):
+                    if isinstance(timer.get(metric), (int, float)):
+                        values[f"{name}.steps.{step}.{metric}"] = timer[metric]
+    return values
+
+
+def compare(baseline: Dict[str, Any], candidate: Dict[str, Any], threshold: float,
+            steps: bool = False) -> List[Dict[str, Any]]:
+    """One row per metric present in both files, with its relative change."""
+    before = flatten(baseline["benchmarks"], steps)
+    after = flatten(candidate["benchmarks"], steps)
+    rows = []
+    for key in sorted(before.keys() & after.keys()):
+        old, new = before[key], after[key]
+        change = (new - old) / old if old else 0.0
+        better = direction(key.rsplit(".", 1)[-1])
+        rows.append({
+            "metric": key,
+            "baseline": old,
+            "candidate": new,
+            "change": change,
+            "regression": change * better < -threshold,
+            "improvement": change * better > threshold,
+        })
+    return rows
+
+
+def load(path: str) -> Dict[str, Any]:
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="Relative change treated as significant (default: 0.10)")
+    parser.add_argument("--steps", action="store_true", help="Also compare per-step timings")
+    parser.add_argument("--allow-corpus-mismatch", action="store_true")
+    args = parser.parse_args()
+
+    baseline, candidate = load(args.baseline), load(args.candidate)
+    corpora = [results["meta"]["corpus"]["digest"] for results in (baseline, candidate)]
+    if corpora[0] != corpora[1] and not args.allow_corpus_mismatch:
+        sys.exit(f"Results were measured on different corpora ({corpora[0][:12]} vs {corpora[1][:12]})")
+
+    rows = compare(baseline, candidate, args.threshold, args.steps)
+    print(f"{'metric':<48} {'baseline':>12} {'candidate':>12} {'change':>9}")
+    for row in rows:
+        flag = "  REGRESSION" if row["regression"] else ("  improved" if row["improvement"] else "")
+        print(f"{row['metric']:<48} {row['baseline']:>12.4g} {row['candidate']:>12.4g} "
+              f"{row['change']:>+8.1%}{flag}")
+
+    regressions = [row for row in rows if row["regression"]]
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) beyond {args.threshold:.0%}")
+        sys.exit(1)
+    print(f"\nNo regressions beyond {args.threshold:.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+"""
+Deterministic synthetic PDF corpus for the benchmark suite.
+
+Documents are built with PyMuPDF from a seeded word generator and mix three
+page kinds, so every path of the extract stage is exercised:
+
+- ``text``:    a text layer only (skips OCR)
+- ``scanned``: an image-only page (a rendered text page, routed to OCR)
+- ``chart``:   a vector bar chart with axes and grid lines plus a text caption
+
+The same seed and profile always produce the same text and drawings. With a
+given PyMuPDF version the files are byte-identical, because the metadata
+dates are fixed and no new file ID is generated. ``corpus.json`` records each
+file's SHA-256 so results files can tell whether two runs used the same input.
+
+Usage:
+    python benchmarks/corpus.py [output_dir] [--profile small|medium|large] [--seed 0]
+"""
+import argparse
+import hashlib
+import json
+import random
+from pathlib import Path
+from typing import Any, Dict, List
+
+import fitz  # PyMuPDF
+
+# Bump when the generated content changes
+GENERATOR_VERSION = 1
+MANIFEST = "corpus.json"
+
+PAGE_WIDTH, PAGE_HEIGHT = 595, 842  # A4 in points
+MARGIN = 56
+SCAN_DPI = 150
+FIXED_DATE = "D:20250101000000Z"
+
+# (document kind, page count); "mixed" cycles text, text, chart, scanned
+PROFILES = {
+    "small": [("text", 4), ("scanned", 2), ("charts", 3), ("mixed", 8)],
+    "medium": [("text", 1), ("text", 24), ("scanned", 8), ("charts", 12), ("mixed", 32)],
+    "large": [("text", 120), ("scanned", 30), ("charts", 40), ("mixed", 160)],
+}
+MIXED_PATTERN = ["text", "text", "chart", "scanned"]
+
+WORDS = [
+    "model", "layer", "accuracy", "dataset", "training", "result", "figure", "method",
+    "network", "baseline", "loss", "gradient", "attention", "embedding", "benchmark",
+    "evaluation", "transformer", "convolution", "feature", "parameter", "inference",
+    "precision", "recall", "latency", "throughput", "architecture", "experiment",
+]
+ENTITIES = ["ImageNet", "Google", "Stanford University", "PyTorch", "BERT", "Berlin", "2019"]
+
+
+def make_sentence(rng: random.Random) -> str:
+    words = [rng.choice(WORDS) for _ in range(rng.randint(8, 20))]
+    if rng.random() < 0.3:
+        words.insert(rng.randrange(len(words)), rng.choice(ENTITIES))
+    return " ".join(words).capitalize() + "."
+
+
+def make_paragraphs(rng: random.Random, count: int) -> List[str]:
+    return [" ".join(make_sentence(rng) for _ in range(rng.randint(3, 6))) for _ in range(count)]
+
+
+def write_text(page: fitz.Page, paragraphs: List[str], top: float = MARGIN) -> None:
+    rect = fitz.Rect(MARGIN, top, PAGE_WIDTH - MARGIN, PAGE_HEIGHT - MARGIN)
+    page.insert_textbox(rect, "\n\n".join(paragraphs), fontsize=10, fontname="helv")
+
+
+def add_text_page(doc: fitz.Document, rng: random.Random) -> None:
+    page = doc.new_page(width=PAGE_WIDTH, height=PAGE_HEIGHT)
+    write_text(page, make_paragraphs(rng, 6))
+
+
+def add_scanned_page(doc: fitz.Document, rng: random.Random) -> None:
+    """Render a text page to pixels and place only the image (no text layer)."""
+    source = fitz.open()
+    add_text_page(source, rng)
+    pixmap = source[0].get_pixmap(dpi=SCAN_DPI, alpha=False)
+    source.close()
+
+    page = doc.new_page(width=PAGE_WIDTH, height=PAGE_HEIGHT)
+    page.insert_image(page.rect, stream=pixmap.tobytes("png"))
+
+
+def add_chart_page(doc: fitz.Document, rng: random.Random) -> None:
+    """Bar chart with axes and a grid drawn as vector paths, above a caption."""
+    page = doc.new_page(width=PAGE_WIDTH, height=PAGE_HEIGHT)
+    left, top, right, bottom = MARGIN + 20, MARGIN, PAGE_WIDTH - MARGIN, MARGIN + 300
+
+    shape = page.new_shape()
+    for i in range(1, 6):
+        y = bottom - (bottom - top) * i / 5
+        shape.draw_line((left, y), (right, y))
+    shape.finish(color=(0.75, 0.75, 0.75), width=0.5)
+
+    bars = rng.randint(4, 8)
+    slot = (right - left) / bars
+    for i in range(bars):
+        height = (bottom - top) * rng.uniform(0.15, 0.95)
+        x = left + i * slot + slot * 0.2
+        shape.draw_rect(fitz.Rect(x, bottom - height, x + slot * 0.6, bottom))
+    shape.finish(color=(0, 0, 0), fill=(0.25, 0.45, 0.75), width=0.5)
+
+    shape.draw_line((left, top), (left, bottom))
+    shape.draw_line((left, bottom), (right, bottom))
+    shape.finish(color=(0, 0, 0), width=1.5)
+    shape.commit()
+
+    page.insert_text((left, bottom + 20), f"Figure {page.number + 1}: {make_sentence(rng)}",
+                     fontsize=9, fontname="helv")
+    write_text(page, make_paragraphs(rng, 2), top=bottom + 40)
+
+
+PAGE_BUILDERS = {"text": add_text_page, "scanned": add_scanned_page, "chart": add_chart_page}
+
+
+def page_kinds(kind: str, pages: int) -> List[str]:
+    if kind == "mixed":
+        return [MIXED_PATTERN[i % len(MIXED_PATTERN)] for i in range(pages)]
+    return ["chart" if kind == "charts" else kind] * pages
+
+
+def build_document(path: Path, kinds: List[str], seed: int) -> None:
+    rng = random.Random(seed)
+    doc = fitz.open()
+    for kind in kinds:
+        PAGE_BUILDERS[kind](doc, rng)
+    doc.set_metadata({
+        "title": path.stem,
+        "producer": f"benchmarks/corpus.py v{GENERATOR_VERSION}",
+        "creationDate": FIXED_DATE,
+        "modDate": FIXED_DATE,
+    })
+    doc.save(str(path), garbage=4, deflate=True, no_new_id=True)
+    doc.close()
+
+
+def sha256(path: Path) -> str:
+    return hashlib.sha256(Path(path).read_bytes()).hexdigest()
+
+
+def generate(output_dir: Path, profile: str = "small", seed: int = 0) -> Dict[str, Any]:
+    """Write the corpus and its manifest to ``output_dir``; returns the manifest."""
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    documents = []
+    for index, (kind, pages) in enumerate(PROFILES[profile]):
+        path = output_dir / f"{index:02d}_{kind}_{pages}p.pdf"
+        kinds = page_kinds(kind, pages)
+        # Each document has its own stream so adding one does not change the others
+        build_document(path, kinds, seed * 1000 + index)
+        documents.append({
+            "file": path.name,
+            "kind": kind,
+            "pages": pages,
+            "page_kinds": {name: kinds.count(name) for name in PAGE_BUILDERS if name in kinds},
+            "sha256": sha256(path),
+        })
+
+    manifest = {
+        "generator_version": GENERATOR_VERSION,
+        "profile": profile,
+        "seed": seed,
+        "pymupdf": fitz.VersionBind,
+        "documents": documents,
+        "digest": hashlib.sha256("".join(d["sha256"] for d in documents).encode()).hexdigest(),
+    }
+    with open(output_dir / MANIFEST, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=4)
+    return manifest
+
+
+def load(corpus_dir: Path) -> Dict[str, Any]:
+    """Read a generated corpus manifest."""
+    with open(Path(corpus_dir) / MANIFEST, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("output_dir", nargs="?", default="benchmarks/corpus")
+    parser.add_argument("--profile", choices=sorted(PROFILES), default="small")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    manifest = generate(Path(args.output_dir), args.profile, args.seed)
+    pages = sum(document["pages"] for document in manifest["documents"])
+    print(f"{len(manifest['documents'])} documents, {pages} pages in {args.output_dir} "
+          f"(digest {manifest['digest'][:12]})")
+
+
+if __name__ == "__main__":
+    main()
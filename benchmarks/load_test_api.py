@@ -0,0 +1,121 @@
+"""
+Concurrent load test for the API.
+
+Fires requests from a pool of client threads against a running server and
+reports throughput and latency percentiles per concurrency level, so a
+blocking endpoint shows up as flat requests/sec while concurrency grows.
+Run the server with a single worker to measure per-worker throughput:
+
+    uvicorn backend.api.main:app --workers 1 --port 8000
+
+Usage:
+    python benchmarks/load_test_api.py [--url http://localhost:8000]
+        [--endpoint document|search|hybrid] [--doc-id 1] [--query "neural networks"]
+        [--concurrency 1 8 32] [--requests 500] [--output results.json]
+"""
+import argparse
+import json
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List
+
+import requests
+
+
+def make_request(session: requests.Session, args) -> requests.Response:
+    """Issue one request against the selected endpoint."""
+    if args.endpoint == "document":
+        return session.get(f"{args.url}/documents/{args.doc_id}", timeout=args.timeout)
+    if args.endpoint == "search":
+        return session.post(f"{args.url}/search", json={"query": args.query, "limit": 10},
+                            timeout=args.timeout)
+    return session.post(f"{args.url}/search/hybrid", json={"query": args.query, "limit": 10},
+                        timeout=args.timeout)
+
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def run_level(args, concurrency: int) -> Dict[str, Any]:
+    """Send ``args.requests`` requests with ``concurrency`` client threads."""
+    local = threading.local()
+    latencies: List[float] = []
+    errors = 0
+    lock = threading.Lock()
+
+    def worker(_):
+        nonlocal errors
+        if not hasattr(local, "session"):
+            local.session = requests.Session()
+        start = time.perf_counter()
+        try:
+            response = make_request(local.session, args)
+            ok = response.status_code < 400
+        except requests.RequestException:
+            ok = False
+        elapsed = time.perf_counter() - start
+        with lock:
+            if ok:
+                latencies.append(elapsed)
+            else:
+                errors += 1
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(worker, range(args.requests)))
+    wall = time.perf_counter() - start
+
+    return {
+        "concurrency": concurrency,
+        "requests": args.requests,
+        "errors": errors,
+        "seconds": round(wall, 3),
+        "requests_per_sec": round(len(latencies) / wall, 2) if wall else 0.0,
+        "latency_ms": {
+            "mean": round(1000 * statistics.mean(latencies), 2) if latencies else 0.0,
+            "p50": round(1000 * percentile(latencies, 50), 2),
+            "p95": round(1000 * percentile(latencies, 95), 2),
+            "p99": round(1000 * percentile(latencies, 99), 2),
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--endpoint", choices=["document", "search", "hybrid"], default="document")
+    parser.add_argument("--doc-id", type=int, default=1)
+    parser.add_argument("--query", default="neural networks")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--output", type=str, default=None)
+    args = parser.parse_args()
+
+    with requests.Session() as session:
+        for _ in range(args.warmup):
+            make_request(session, args)
+
+    results = {
+        "url": args.url,
+        "endpoint": args.endpoint,
+        "levels": [run_level(args, concurrency) for concurrency in args.concurrency],
+    }
+
+    output = json.dumps(results, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output)
+
+
+if __name__ == "__main__":
+    main()
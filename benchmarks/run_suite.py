@@ -0,0 +1,322 @@
+"""
+Benchmark suite: run the pipeline stages and full-text search on a synthetic corpus.
+
+Generates (or reuses) a deterministic corpus (see corpus.py) and measures:
+
+- ``chart_detection``: extract.detect_charts_in_images on pre-rasterized pages
+- ``extract``:         extract.main per document (pages/sec)
+- ``transform``:       transform.main per document (sentences/sec)
+- ``load``:            DatabaseLoader.load_data per document (rows/sec)
+- ``search``:          AsyncDocumentRepository.search_page, the API's search
+                       path over asyncpg (latency percentiles)
+
+Every benchmark reports the best of ``--repeat`` runs, as the other scripts in
+this directory do, plus the per-step breakdown recorded by pipeline/metrics.py.
+The OCR and embedding caches are disabled unless ``--warm-caches`` is given,
+so repeats measure real work.
+
+``load`` and ``search`` need a Postgres server at DATABASE_URL. A throwaway
+local instance is enough, for example
+``docker run -e POSTGRES_HOST_AUTH_METHOD=trust -p 5432:5432 postgres:16``.
+They run in a scratch schema that is dropped afterwards. Without a server
+they are reported as skipped. Compare two results files with compare.py.
+
+Usage:
+    python benchmarks/run_suite.py [--profile small] [--seed 0] [--repeat 3]
+        [--only extract transform ...] [--corpus DIR] [--output results.json]
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+SCHEMA = "bench_suite"
+BENCHMARKS = ["chart_detection", "extract", "transform", "load", "search"]
+SEARCH_QUERIES = [
+    "neural network accuracy", "transformer attention", "training loss gradient",
+    "ImageNet benchmark", "inference latency throughput", "convolution feature layer",
+]
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def configure_environment(scratch: Path, warm_caches: bool) -> None:
+    """Isolate the run (work dirs, vector index, DB schema) before pipeline modules are imported."""
+    os.environ.setdefault("DATABASE_URL", "postgresql://localhost/postgres")
+    os.environ["WORK_DIR"] = str(scratch / "work")
+    os.environ["VECTOR_INDEX_DIR"] = str(scratch / "index")
+    if not warm_caches:
+        os.environ["OCR_CACHE_ENABLED"] = "0"
+        os.environ["EMBEDDING_CACHE_ENABLED"] = "0"
+    os.environ["PGOPTIONS"] = f"{os.environ.get('PGOPTIONS', '')} -c search_path={SCHEMA}".strip()
+    sys.path.insert(0, str(ROOT / "pipeline"))
+    sys.path.insert(0, str(ROOT))
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def measure(name: str, fn: Callable[[], int], repeat: int, unit: str) -> Dict[str, Any]:
+    """
+    Run ``fn`` (returning the number of ``unit`` processed) ``repeat`` times
+    and keep the fastest run, with the step timings of that run.
+    """
+    from metrics import metrics
+
+    best = None
+    for _ in range(repeat):
+        metrics.reset()
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            items = fn()
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best["seconds"]:
+            summary = metrics.summary()
+            best = {
+                "seconds": round(elapsed, 4),
+                unit: items,
+                f"{unit}_per_sec": round(items / elapsed, 2) if elapsed else None,
+                "steps": summary["timers"],
+                "cache_hit_rates": summary["cache_hit_rates"],
+            }
+    print(f"{name:<16} {best['seconds']:9.3f}s  {best[f'{unit}_per_sec']:10.2f} {unit}/sec")
+    return best
+
+
+def bench_chart_detection(documents: List[Path], repeat: int, scratch: Path) -> Dict[str, Any]:
+    import extract
+
+    # Rasterize once so only detection is timed
+    pages = [page for path in documents for page in extract.iter_pdf_pages(path)]
+
+    def run():
+        extract.detect_charts_in_images(iter(pages), output_folder=scratch)
+        return len(pages)
+
+    return measure("chart_detection", run, repeat, "pages")
+
+
+def bench_extract(documents: List[Path], work_dirs: List[Path], repeat: int) -> Dict[str, Any]:
+    import extract
+    import fitz
+
+    def run():
+        pages = 0
+        for path, work_dir in zip(documents, work_dirs):
+            extract.main(path, work_dir)
+            with fitz.open(path) as doc:
+                pages += len(doc)
+        return pages
+
+    return measure("extract", run, repeat, "pages")
+
+
+def bench_transform(work_dirs: List[Path], repeat: int) -> Dict[str, Any]:
+    import transform
+    from artifacts import read_column
+
+    def run():
+        sentences = 0
+        for work_dir in work_dirs:
+            transform.main(work_dir)
+            sentences += len(read_column(work_dir, "sentences", "text"))
+        return sentences
+
+    return measure("transform", run, repeat, "sentences")
+
+
+def database_available() -> Optional[str]:
+    """None if Postgres at DATABASE_URL accepts connections, otherwise the reason."""
+    import psycopg2
+
+    try:
+        psycopg2.connect(os.environ["DATABASE_URL"], connect_timeout=3).close()
+    except psycopg2.OperationalError as e:
+        return str(e).strip().splitlines()[0]
+    return None
+
+
+@contextlib.contextmanager
+def scratch_schema():
+    import psycopg2
+
+    admin = psycopg2.connect(os.environ["DATABASE_URL"])
+    admin.autocommit = True
+    with admin.cursor() as cur:
+        cur.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+        cur.execute(f"CREATE SCHEMA {SCHEMA}")
+    try:
+        yield
+    finally:
+        with admin.cursor() as cur:
+            cur.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+        admin.close()
+
+
+def bench_load(documents: List[Path], work_dirs: List[Path], repeat: int) -> Dict[str, Any]:
+    from artifacts import PROCESSED_CHARTS, read_column
+    from load import DatabaseLoader
+    from orchestrator import file_digest
+
+    hashes = [file_digest(path) for path in documents]
+    rows = 0
+    for work_dir in work_dirs:
+        with open(work_dir / PROCESSED_CHARTS, "r", encoding="utf-8") as f:
+            rows += 1 + len(json.load(f)) + len(read_column(work_dir, "sentences", "text"))
+    loader = DatabaseLoader()
+
+    def run():
+        for work_dir, content_hash in zip(work_dirs, hashes):
+            # Replacing by content hash keeps repeats from piling up duplicates
+            loader.load_data(work_dir, content_hash=content_hash, replace=True)
+        return rows
+
+    try:
+        return measure("load", run, repeat, "rows")
+    finally:
+        loader.close()
+
+
+def bench_search(repeat: int, iterations: int, limit: int) -> Dict[str, Any]:
+    import asyncio
+    from backend.api.async_db import AsyncDocumentRepository
+
+    # asyncpg ignores PGOPTIONS, so the scratch schema is set on each connection
+    repository = AsyncDocumentRepository(server_settings={"search_path": SCHEMA})
+    loop = asyncio.new_event_loop()
+    latencies: List[float] = []
+
+    async def search_all():
+        for i in range(iterations):
+            query = SEARCH_QUERIES[i % len(SEARCH_QUERIES)]
+            start = time.perf_counter()
+            await repository.search_page(query, limit)
+            latencies.append(time.perf_counter() - start)
+
+    def run():
+        loop.run_until_complete(search_all())
+        return iterations
+
+    try:
+        # Warm the pool and the statement plans before timing
+        loop.run_until_complete(repository.search_page(SEARCH_QUERIES[0], limit))
+        result = measure("search", run, repeat, "queries")
+    finally:
+        loop.run_until_complete(repository.db.close())
+        loop.close()
+    # Latency percentiles over every timed query of all runs
+    result["p50_ms"] = round(percentile(latencies, 50) * 1000, 3)
+    result["p95_ms"] = round(percentile(latencies, 95) * 1000, 3)
+    result["p99_ms"] = round(percentile(latencies, 99) * 1000, 3)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--profile", default="small", help="Corpus profile (see corpus.py)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--corpus", type=str, default=None,
+                        help="Existing corpus directory (default: generate one in the scratch directory)")
+    parser.add_argument("--only", nargs="+", choices=BENCHMARKS, default=BENCHMARKS)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--search-iterations", type=int, default=200)
+    parser.add_argument("--search-limit", type=int, default=10)
+    parser.add_argument("--warm-caches", action="store_true",
+                        help="Keep the OCR and embedding caches enabled")
+    parser.add_argument("--scratch", type=str, default=None,
+                        help="Directory for work files (default: a new temporary directory)")
+    parser.add_argument("--output", type=str, default=None)
+    args = parser.parse_args()
+
+    scratch = Path(args.scratch or tempfile.mkdtemp(prefix="pdf-etl-bench-"))
+    configure_environment(scratch, args.warm_caches)
+
+    import corpus
+
+    corpus_dir = Path(args.corpus) if args.corpus else scratch / "corpus"
+    if (corpus_dir / corpus.MANIFEST).exists():
+        manifest = corpus.load(corpus_dir)
+    else:
+        manifest = corpus.generate(corpus_dir, args.profile, args.seed)
+    documents = [corpus_dir / document["file"] for document in manifest["documents"]]
+    work_dirs = [scratch / "work" / path.stem for path in documents]
+    for work_dir in work_dirs:
+        work_dir.mkdir(parents=True, exist_ok=True)
+
+    results = {
+        "meta": {
+            "commit": git_commit(),
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "repeat": args.repeat,
+            "warm_caches": args.warm_caches,
+            "corpus": {key: manifest[key] for key in ("profile", "seed", "generator_version", "pymupdf", "digest")},
+        },
+        "benchmarks": {},
+    }
+    print(f"{len(documents)} documents from {corpus_dir}, scratch {scratch}\n")
+
+    # Later stages read what earlier ones wrote, so they run in pipeline order
+    selected = [name for name in BENCHMARKS if name in args.only]
+    benchmarks = results["benchmarks"]
+    if "chart_detection" in selected:
+        benchmarks["chart_detection"] = bench_chart_detection(documents, args.repeat, scratch)
+    if "extract" in selected or {"transform", "load"} & set(selected):
+        run = bench_extract(documents, work_dirs, args.repeat if "extract" in selected else 1)
+        if "extract" in selected:
+            benchmarks["extract"] = run
+    if "transform" in selected or "load" in selected:
+        run = bench_transform(work_dirs, args.repeat if "transform" in selected else 1)
+        if "transform" in selected:
+            benchmarks["transform"] = run
+
+    if {"load", "search"} & set(selected):
+        reason = database_available()
+        if reason:
+            for name in ("load", "search"):
+                if name in selected:
+                    benchmarks[name] = {"skipped": f"no database: {reason}"}
+                    print(f"{name:<16} skipped (no database)")
+        else:
+            with scratch_schema():
+                # Search needs the loaded corpus even when load is not reported
+                run = bench_load(documents, work_dirs, args.repeat if "load" in selected else 1)
+                if "load" in selected:
+                    benchmarks["load"] = run
+                if "search" in selected:
+                    benchmarks["search"] = bench_search(args.repeat, args.search_iterations, args.search_limit)
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output)
+        print(f"\nResults written to {args.output}")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -39,6 +39,8 @@ CREATE TABLE IF NOT EXISTS charts (
     confidence FLOAT NOT NULL,
     characteristics JSONB,
     type VARCHAR(50),
+    page_number INTEGER,
+    bbox JSONB,  -- [x0, y0, x1, y1] in PDF points (region detection mode)
     created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
 );
@@ -47,18 +49,34 @@ CREATE TABLE IF NOT EXISTS charts (
 CREATE TABLE IF NOT EXISTS embeddings (
     id SERIAL PRIMARY KEY,
     document_id INTEGER REFERENCES documents(id) ON DELETE CASCADE,
+    sentence_index INTEGER,  -- Position of the sentence in the document
+    sentence TEXT,
     embedding VECTOR(384),  -- Dimension matches the BERT model output
     created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
 );
 
+-- Data version bumped by the loader on every load (API cache invalidation)
+CREATE TABLE IF NOT EXISTS data_version (
+    id BOOLEAN PRIMARY KEY DEFAULT TRUE CHECK (id),
+    version BIGINT NOT NULL DEFAULT 0
+);
+INSERT INTO data_version (id, version) VALUES (TRUE, 0) ON CONFLICT (id) DO NOTHING;
+
 -- Create indexes for better performance
 CREATE INDEX IF NOT EXISTS idx_documents_keywords ON documents USING GIN (keywords);
 CREATE INDEX IF NOT EXISTS idx_documents_entities ON documents USING GIN (entities);
 CREATE INDEX IF NOT EXISTS idx_charts_document_id ON charts(document_id);
 CREATE INDEX IF NOT EXISTS idx_embeddings_document_id ON embeddings(document_id);
 
+-- Hash of the source PDF, so batch runs skip documents already ingested
+ALTER TABLE documents ADD COLUMN IF NOT EXISTS content_hash TEXT;
+CREATE UNIQUE INDEX IF NOT EXISTS idx_documents_content_hash ON documents (content_hash);
+
 -- Create full-text search index
 ALTER TABLE documents ADD COLUMN IF NOT EXISTS document_vector tsvector;
+UPDATE documents
+SET document_vector = setweight(to_tsvector('english', COALESCE(content, '')), 'A')
+WHERE document_vector IS NULL;
 CREATE INDEX IF NOT EXISTS idx_fts_document ON documents USING GIN (document_vector);
 
 -- Create trigger to update full-text search vector
@@ -72,7 +90,7 @@ $$ LANGUAGE plpgsql;
 
 DROP TRIGGER IF EXISTS tsvector_update ON documents;
 CREATE TRIGGER tsvector_update 
-    BEFORE INSERT OR UPDATE ON documents 
+    BEFORE INSERT OR UPDATE OF content ON documents 
     FOR EACH ROW 
     EXECUTE FUNCTION documents_trigger();
 
@@ -29,6 +29,8 @@ CREATE TABLE IF NOT EXISTS public.charts (
     confidence FLOAT NOT NULL,
     characteristics JSONB,
     type VARCHAR(50),
+    page_number INTEGER,
+    bbox JSONB,  -- [x0, y0, x1, y1] in PDF points (region detection mode)
     created_at TIMESTAMPTZ DEFAULT NOW(),
     updated_at TIMESTAMPTZ DEFAULT NOW()
 );
@@ -37,18 +39,34 @@ CREATE TABLE IF NOT EXISTS public.charts (
 CREATE TABLE IF NOT EXISTS public.embeddings (
     id SERIAL PRIMARY KEY,
     document_id INTEGER REFERENCES public.documents(id) ON DELETE CASCADE,
+    sentence_index INTEGER,  -- Position of the sentence in the document
+    sentence TEXT,
     embedding VECTOR(384),  -- Requires pgvector extension
     created_at TIMESTAMPTZ DEFAULT NOW()
 );
 
+-- Data version bumped by the loader on every load (API cache invalidation)
+CREATE TABLE IF NOT EXISTS public.data_version (
+    id BOOLEAN PRIMARY KEY DEFAULT TRUE CHECK (id),
+    version BIGINT NOT NULL DEFAULT 0
+);
+INSERT INTO public.data_version (id, version) VALUES (TRUE, 0) ON CONFLICT (id) DO NOTHING;
+
 -- Create indexes for better performance
 CREATE INDEX IF NOT EXISTS idx_documents_keywords ON public.documents USING GIN (keywords);
 CREATE INDEX IF NOT EXISTS idx_documents_entities ON public.documents USING GIN (entities);
 CREATE INDEX IF NOT EXISTS idx_charts_document_id ON public.charts(document_id);
 CREATE INDEX IF NOT EXISTS idx_embeddings_document_id ON public.embeddings(document_id);
 
+-- Hash of the source PDF, so batch runs skip documents already ingested
+ALTER TABLE public.documents ADD COLUMN IF NOT EXISTS content_hash TEXT;
+CREATE UNIQUE INDEX IF NOT EXISTS idx_documents_content_hash ON public.documents (content_hash);
+
 -- Create full-text search index
 ALTER TABLE public.documents ADD COLUMN IF NOT EXISTS document_vector tsvector;
+UPDATE public.documents
+SET document_vector = setweight(to_tsvector('english', COALESCE(content, '')), 'A')
+WHERE document_vector IS NULL;
 CREATE INDEX IF NOT EXISTS idx_fts_document ON public.documents USING GIN (document_vector);
 
 -- Create trigger to update full-text search vector
@@ -62,7 +80,7 @@ $$ LANGUAGE plpgsql;
 
 DROP TRIGGER IF EXISTS tsvector_update ON public.documents;
 CREATE TRIGGER tsvector_update 
-    BEFORE INSERT OR UPDATE ON public.documents 
+    BEFORE INSERT OR UPDATE OF content ON public.documents 
     FOR EACH ROW 
     EXECUTE FUNCTION public.documents_trigger();
 
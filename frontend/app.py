@@ -1,9 +1,11 @@
+import html
+import json
 import streamlit as st
 import requests
 import pandas as pd
 from PIL import Image
 from pathlib import Path
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Tuple
 
 # API configuration
 API_URL = "http://localhost:8000"
@@ -36,18 +38,42 @@ st.markdown("""
 
 class APIClient:
     """API client for interacting with the backend."""
+
+    @staticmethod
+    def _conditional_request(method: str, url: str, **kwargs) -> Tuple[int, Any]:
+        """
+        Send a request with If-None-Match when an earlier response was cached in
+        the session and return (status code, payload). The payload is the decoded
+        JSON of a 200, or the response text otherwise; a 304 returns the cached
+        payload with status 200 (Streamlit reruns often).
+        """
+        cache = st.session_state.setdefault("api_etags", {})
+        key = f"{method} {url} {json.dumps(kwargs.get('json'), sort_keys=True)}"
+        cached = cache.get(key)
+        headers = {"If-None-Match": cached[0]} if cached else {}
+
+        response = requests.request(method, url, headers=headers, **kwargs)
+        if response.status_code == 304 and cached:
+            return 200, cached[1]
+        if response.status_code != 200:
+            return response.status_code, response.text
+
+        payload = response.json()
+        if response.headers.get("ETag"):
+            cache[key] = (response.headers["ETag"], payload)
+        return 200, payload
     
     @staticmethod
     def load_document(doc_id: int) -> Optional[Dict[str, Any]]:
         """Load document data from API."""
         try:
-            response = requests.get(f"{API_URL}/documents/{doc_id}")
-            if response.status_code == 200:
-                return response.json()
-            elif response.status_code == 404:
+            status, payload = APIClient._conditional_request("GET", f"{API_URL}/documents/{doc_id}")
+            if status == 200:
+                return payload
+            elif status == 404:
                 st.error("Document not found!")
             else:
-                st.error(f"Error loading document: {response.text}")
+                st.error(f"Error loading document: {payload}")
             return None
         except Exception as e:
             st.error(f"Failed to connect to API: {str(e)}")
@@ -57,12 +83,20 @@ class APIClient:
     def search_documents(query: str) -> Optional[list]:
         """Search documents through API based on query."""
         try:
-            response = requests.post(
+            status, payload = APIClient._conditional_request(
+                "POST",
                 f"{API_URL}/search",
-                json={"query": query, "limit": 10}  # Tidak ada min_rank
+                json={
+                    "query": query,
+                    "limit": 10,
+                    "fields": ["id", "rank", "snippet", "keywords", "charts"],
+                    "max_keywords": 15
+                }  # Tidak ada min_rank
             )
-            response.raise_for_status()  # Tangani HTTP error
-            return response.json() if response.status_code == 200 else None
+            if status != 200:  # Tangani HTTP error
+                st.error(f"Search failed ({status}): {payload}")
+                return None
+            return payload["results"]
         except requests.exceptions.RequestException as e:
             st.error(f"Failed to connect to API: {str(e)}")
             return None
@@ -142,7 +176,10 @@ class SearchInterface:
 
                 for result in results:
                     with st.expander(f"📄 Document {result.get('id', 'Unknown')}"):
-                        st.write(result.get("content", "No content available")[:300] + "...")
+                        # Snippet dari server; hanya tag <mark> yang dipertahankan
+                        snippet = html.escape(result.get("snippet") or "No content available")
+                        snippet = snippet.replace("&lt;mark&gt;", "<mark>").replace("&lt;/mark&gt;", "</mark>")
+                        st.markdown(snippet, unsafe_allow_html=True)
                         
                         # Keywords
                         keywords = result.get("keywords", [])
@@ -0,0 +1,158 @@
+"""
+Versioned columnar intermediate format shared by the pipeline stages.
+
+Tables are written as Parquet files in a document's work directory, one
+file per table, so a stage reads only the tables and columns it needs
+without parsing the whole document:
+
+- ``pages.parquet``           (extract)   per-page route and text
+- ``named_entities.parquet``  (extract)   entities with text offsets
+- ``sentences.parquet``       (transform) sentences with text offsets
+- ``entities.parquet``        (transform) entity text and label
+- ``keywords.parquet``        (transform) keyword tokens
+- ``embeddings.npy``          (transform) float32 matrix, one row per
+                                          sentence, read memory-mapped
+
+Chart records are small and stay JSON (``chart_detection.json`` from
+extract, ``charts.json`` from transform).
+
+Every Parquet file carries the format version in its schema metadata;
+readers reject files written by an incompatible version.
+"""
+import os
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+FORMAT_VERSION = 1
+_VERSION_KEY = b"pipeline.format_version"
+_TABLE_KEY = b"pipeline.table"
+
+SCHEMAS = {
+    "pages": pa.schema([
+        ("page", pa.int32()),
+        ("route", pa.string()),
+        ("text_chars", pa.int32()),
+        ("text_density", pa.float64()),
+        ("image_coverage", pa.float64()),
+        ("text", pa.large_string()),
+    ]),
+    "named_entities": pa.schema([
+        ("text", pa.string()),
+        ("label", pa.string()),
+        ("start", pa.int64()),
+        ("end", pa.int64()),
+    ]),
+    "sentences": pa.schema([
+        ("sentence_index", pa.int32()),
+        ("text", pa.string()),
+        ("start", pa.int64()),
+        ("end", pa.int64()),
+    ]),
+    "entities": pa.schema([
+        ("text", pa.string()),
+        ("label", pa.string()),
+    ]),
+    "keywords": pa.schema([
+        ("keyword", pa.string()),
+    ]),
+}
+
+EMBEDDINGS_FILE = "embeddings.npy"
+PROCESSED_CHARTS = "charts.json"
+
+
+class ArtifactVersionError(ValueError):
+    """Raised when an artifact was written by an incompatible format version."""
+
+
+def table_path(work_dir: Path, name: str) -> Path:
+    return Path(work_dir) / f"{name}.parquet"
+
+
+def write_table(work_dir: Path, name: str, columns: Dict[str, List[Any]]) -> Path:
+    """Write one table atomically, with the format version in its metadata."""
+    schema = SCHEMAS[name].with_metadata({
+        _VERSION_KEY: str(FORMAT_VERSION).encode("ascii"),
+        _TABLE_KEY: name.encode("ascii"),
+    })
+    table = pa.table({field.name: columns[field.name] for field in schema}, schema=schema)
+
+    path = table_path(work_dir, name)
+    tmp_path = path.with_suffix(".parquet.tmp")
+    pq.write_table(table, tmp_path, compression="zstd")
+    os.replace(tmp_path, path)
+    return path
+
+
+def read_table(work_dir: Path, name: str, columns: Optional[List[str]] = None) -> pa.Table:
+    """Read a table (optionally only some columns) after checking its format version."""
+    path = table_path(work_dir, name)
+    metadata = pq.read_schema(path).metadata or {}
+    version = metadata.get(_VERSION_KEY)
+    if version is None or int(version) != FORMAT_VERSION:
+        raise ArtifactVersionError(
+            f"{path} has format version {version and version.decode()}, expected {FORMAT_VERSION}"
+        )
+    return pq.read_table(path, columns=columns)
+
+
+def read_column(work_dir: Path, name: str, column: str) -> List[Any]:
+    """One column of a table as a Python list."""
+    return read_table(work_dir, name, [column]).column(column).to_pylist()
+
+
+def read_records(work_dir: Path, name: str, columns: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+    """Rows of a table as dicts."""
+    return read_table(work_dir, name, columns).to_pylist()
+
+
+def write_pages(work_dir: Path, pages: List[Dict[str, Any]]) -> Path:
+    """Per-page routing information and text (see extract.classify_pages)."""
+    return write_table(work_dir, "pages", {
+        field: [page[field] for page in pages] for field in SCHEMAS["pages"].names
+    })
+
+
+def read_document_text(work_dir: Path) -> str:
+    """Full document text, joined from the page texts exactly as extract joins them."""
+    return "\n\n".join(read_column(work_dir, "pages", "text")).strip()
+
+
+def write_entities(work_dir: Path, name: str, entities: List[Dict[str, Any]]) -> Path:
+    return write_table(work_dir, name, {
+        field: [entity[field] for entity in entities] for field in SCHEMAS[name].names
+    })
+
+
+def write_sentences(work_dir: Path, sentences: List[str], offsets: List[List[int]]) -> Path:
+    return write_table(work_dir, "sentences", {
+        "sentence_index": list(range(len(sentences))),
+        "text": sentences,
+        "start": [start for start, _ in offsets],
+        "end": [end for _, end in offsets],
+    })
+
+
+def write_keywords(work_dir: Path, keywords: List[str]) -> Path:
+    return write_table(work_dir, "keywords", {"keyword": keywords})
+
+
+def write_embeddings(work_dir: Path, embeddings: np.ndarray) -> Path:
+    """Save embeddings as a float32 .npy (atomically)."""
+    path = Path(work_dir) / EMBEDDINGS_FILE
+    tmp_path = path.with_suffix(".tmp.npy")
+    np.save(tmp_path, np.ascontiguousarray(embeddings, dtype=np.float32))
+    os.replace(tmp_path, path)
+    return path
+
+
+def read_embeddings(work_dir: Path) -> Optional[np.ndarray]:
+    """Memory-mapped embeddings, or None if the stage wrote none."""
+    path = Path(work_dir) / EMBEDDINGS_FILE
+    if not path.exists():
+        return None
+    return np.load(path, mmap_mode="r")
@@ -0,0 +1,194 @@
+"""
+Batch ingest: run extract -> transform -> load for many PDFs.
+
+Each source document gets its own work directory named after its content
+hash, so page images and intermediate files of different documents never
+collide, and re-running the same file reuses the same directory. Documents
+whose hash is already in the database are skipped, and stages with a valid
+checkpoint (see orchestrator.py) are not re-run, so a failed batch resumes
+where each document stopped.
+
+Usage:
+    python pipeline/batch.py [input_dir_or_manifest] [--workers N] [--force]
+
+A manifest is a text file with one PDF path per line (relative paths are
+resolved against the manifest's directory) or a JSON list of paths.
+"""
+import argparse
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+from config import INPUT_DIR, WORK_DIR, BATCH, OCR_WORKERS
+from logger import setup_logger
+from metrics import metrics
+from orchestrator import DocumentPipeline, file_digest
+
+# Setup logging
+logger = setup_logger("batch")
+
+
+def work_dir_for(digest: str, root: Path = WORK_DIR) -> Path:
+    """Isolated work directory of a document."""
+    return Path(root) / digest[:BATCH["HASH_PREFIX"]]
+
+
+def read_manifest(manifest: Path) -> List[Path]:
+    """PDF paths listed in a manifest (JSON list or one path per line)."""
+    text = manifest.read_text(encoding="utf-8")
+    if manifest.suffix == ".json":
+        entries = json.loads(text)
+    else:
+        entries = [line.strip() for line in text.splitlines()]
+        entries = [line for line in entries if line and not line.startswith("#")]
+    return [(manifest.parent / entry).resolve() for entry in entries]
+
+
+def discover_documents(source: Path) -> List[Path]:
+    """PDFs in an input directory (recursively) or listed in a manifest."""
+    source = Path(source)
+    if source.is_dir():
+        return sorted(path for path in source.rglob("*") if path.suffix.lower() == ".pdf")
+    return read_manifest(source)
+
+
+class BatchRunner:
+    """Process many documents with a bounded pool of concurrent documents."""
+
+    def __init__(self, workers: Optional[int] = None, work_root: Path = WORK_DIR, force: bool = False):
+        """
+        Initialize the runner.
+
+        ``workers`` documents are processed at once; the OCR process budget
+        (OCR_WORKERS) is split between them so concurrency does not multiply
+        the number of PaddleOCR processes.
+        """
+        self.workers = max(1, workers or BATCH["WORKERS"])
+        self.work_root = Path(work_root)
+        self.force = force
+        self.ocr_workers = max(1, OCR_WORKERS // self.workers)
+        self._loader = None
+        # One database connection for the whole batch; loads (and vector
+        # index saves) are serialized through it
+        self._load_lock = threading.Lock()
+
+    @property
+    def loader(self):
+        if self._loader is None:
+            from load import DatabaseLoader
+            self._loader = DatabaseLoader()
+        return self._loader
+
+    def plan(self, paths: Iterable[Path]) -> List[Dict[str, Any]]:
+        """Hash every input and mark duplicates and already-ingested documents."""
+        jobs, seen = [], {}
+        for path in paths:
+            digest = file_digest(path)
+            job = {"source": str(path), "content_hash": digest, "status": "pending"}
+            if digest in seen:
+                job["status"] = "skipped"
+                job["reason"] = f"duplicate of {seen[digest]}"
+            else:
+                seen[digest] = str(path)
+            jobs.append(job)
+
+        if not self.force:
+            pending = [job["content_hash"] for job in jobs if job["status"] == "pending"]
+            ingested = self.loader.ingested_hashes(pending) if pending else set()
+            for job in jobs:
+                if job["status"] == "pending" and job["content_hash"] in ingested:
+                    job["status"] = "skipped"
+                    job["reason"] = "already ingested"
+        return jobs
+
+    def process(self, job: Dict[str, Any]) -> Dict[str, Any]:
+        """Run the document's stages in its work directory, resuming from checkpoints."""
+        start = time.perf_counter()
+        work_dir = work_dir_for(job["content_hash"], self.work_root)
+        job["work_dir"] = str(work_dir)
+
+        try:
+            pipeline = DocumentPipeline(
+                job["source"], work_dir,
+                content_hash=job["content_hash"],
+                loader=self.loader,
+                load_lock=self._load_lock,
+                ocr_workers=self.ocr_workers,
+                force=self.force
+            )
+            stages = pipeline.run()
+            job["document_id"] = stages["load"]["result"]["document_id"]
+            job["skipped_stages"] = [name for name, stage in stages.items() if stage["skipped"]]
+            job["status"] = "loaded"
+        except Exception as e:
+            logger.error(f"Failed to ingest {job['source']}: {e}")
+            job["status"] = "failed"
+            job["error"] = str(e)
+
+        job["seconds"] = round(time.perf_counter() - start, 2)
+        return job
+
+    def run(self, paths: Iterable[Path]) -> List[Dict[str, Any]]:
+        """Ingest all documents; returns one report entry per input path."""
+        jobs = self.plan(paths)
+        pending = [job for job in jobs if job["status"] == "pending"]
+        logger.info(
+            f"{len(jobs)} documents, {len(pending)} to ingest, "
+            f"{len(jobs) - len(pending)} skipped ({self.workers} concurrent)"
+        )
+
+        if pending:
+            self.loader  # connect before the workers share it
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            for job in executor.map(self.process, pending):
+                logger.info(f"{job['status']}: {job['source']} ({job['seconds']}s)")
+        return jobs
+
+    def close(self):
+        if self._loader is not None:
+            self._loader.close()
+
+
+def main(source: Optional[Path] = None, workers: Optional[int] = None, force: bool = False):
+    """Main execution function."""
+    source = Path(source) if source else INPUT_DIR
+    if not source.exists():
+        logger.warning(f"Input not found: {source}")
+        return []
+    paths = discover_documents(source)
+    if not paths:
+        logger.warning(f"No PDF documents found in {source}")
+        return []
+
+    runner = BatchRunner(workers=workers, force=force)
+    try:
+        report = runner.run(paths)
+    finally:
+        runner.close()
+
+    runner.work_root.mkdir(parents=True, exist_ok=True)
+    report_path = runner.work_root / "batch_report.json"
+    with open(report_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=4, ensure_ascii=False)
+
+    counts = {}
+    for job in report:
+        counts[job["status"]] = counts.get(job["status"], 0) + 1
+    metrics_path = metrics.write_summary(runner.work_root / "batch_metrics.json", documents=counts)
+    logger.info(f"Batch complete: {counts}. Report: {report_path}, metrics: {metrics_path}")
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Ingest many PDFs through the ETL pipeline.")
+    parser.add_argument("source", nargs="?", default=None,
+                        help="Input directory or manifest file (default: data/input)")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Documents processed concurrently (default: BATCH_WORKERS)")
+    parser.add_argument("--force", action="store_true",
+                        help="Re-run every stage and re-ingest documents already loaded")
+    args = parser.parse_args()
+    main(args.source, args.workers, args.force)
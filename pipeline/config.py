@@ -1,4 +1,10 @@
-"""Configuration settings for the ETL pipeline."""
+"""
+Configuration settings for the ETL pipeline.
+
+Importing this module has no side effects: directories are created by the
+code that writes to them, and required settings (DATABASE_URL) are checked
+when they are first read, not at import.
+"""
 import os
 from pathlib import Path
 from dotenv import load_dotenv
@@ -12,21 +18,49 @@ DATA_DIR = BASE_DIR / "data"
 INPUT_DIR = DATA_DIR / "input"
 PROCESSED_DIR = DATA_DIR / "processed"
 LOG_DIR = BASE_DIR / "logs"
+CACHE_DIR = DATA_DIR / "cache"
+WORK_DIR = Path(os.getenv("WORK_DIR", DATA_DIR / "work"))
 
-# Ensure directories exist
-for directory in [INPUT_DIR, PROCESSED_DIR, LOG_DIR]:
-    directory.mkdir(parents=True, exist_ok=True)
 
-# Database configuration
-DATABASE_URL = os.getenv("DATABASE_URL")
-if not DATABASE_URL:
-    raise ValueError("DATABASE_URL environment variable is not set")
+def __getattr__(name):
+    """Settings validated on access (PEP 562), e.g. ``config.DATABASE_URL``."""
+    if name == "DATABASE_URL":
+        # Database configuration
+        value = os.getenv("DATABASE_URL")
+        if not value:
+            raise ValueError("DATABASE_URL environment variable is not set")
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 # OCR configuration
 OCR_LANG = "en"
 OCR_USE_ANGLE_CLS = True
 PDF_DPI = 300
 
+# OCR worker pool (each worker loads its own PaddleOCR instance once)
+OCR_WORKERS = int(os.getenv("OCR_WORKERS", os.cpu_count() or 1))
+OCR_CHUNK_SIZE = int(os.getenv("OCR_CHUNK_SIZE", 1))
+OCR_CPU_THREADS = int(os.getenv("OCR_CPU_THREADS", 1))
+
+# OCR result cache (keyed by page content + OCR settings, LRU-evicted)
+OCR_CACHE = {
+    "ENABLED": os.getenv("OCR_CACHE_ENABLED", "1") != "0",
+    "MAX_BYTES": int(os.getenv("OCR_CACHE_MAX_BYTES", 512 * 1024 * 1024)),
+}
+
+# Per-page text-layer detection: a page is sent to OCR when its text layer
+# is (nearly) empty, or when images cover most of it and the text is sparse
+TEXT_LAYER = {
+    "MIN_CHARS": 50,
+    "MIN_DENSITY": 2.0,  # characters per 100x100 pt of page area
+    "MAX_IMAGE_COVERAGE": 0.5,  # fraction of the page covered by images
+}
+
+# Optional image output (written by a background thread, off by default so
+# the default path does no image encoding at all)
+SAVE_PAGE_IMAGES = os.getenv("SAVE_PAGE_IMAGES", "0") == "1"
+SAVE_DEBUG_IMAGES = os.getenv("SAVE_DEBUG_IMAGES", "0") == "1"
+
 # Chart detection configuration
 CHART_DETECTION = {
     "CANNY_THRESHOLD1": 50,
@@ -34,8 +68,58 @@ CHART_DETECTION = {
     "HOUGH_THRESHOLD": 100,
     "MIN_LINE_LENGTH": 100,
     "MAX_LINE_GAP": 20,
+    # Threads used to analyze pages concurrently (OpenCV releases the GIL)
+    "WORKERS": int(os.getenv("CHART_DETECTION_WORKERS", os.cpu_count() or 1)),
+    # Cheap-first cascade: count contours on a downscaled page and only run
+    # full-resolution Hough on candidates. Off by default because rejected
+    # pages skip Hough and therefore report has_lines/regular_patterns=False.
+    "CASCADE": os.getenv("CHART_DETECTION_CASCADE", "0") == "1",
+    "CASCADE_SCALE": 0.25,
+    "CASCADE_MIN_CONTOURS": 3,
+}
+
+# "page" scans every rasterized page; "region" only rasterizes candidate
+# regions built from the PDF structure (embedded images, vector drawings)
+CHART_DETECTION_MODE = os.getenv("CHART_DETECTION_MODE", "page")
+CHART_REGIONS = {
+    "MIN_AREA": 5000,  # pt^2, smaller candidates are ignored
+    "MIN_DRAWING_PATHS": 5,  # vector paths needed before a cluster counts
+    "MERGE_MARGIN": 10,  # pt, drawings closer than this are clustered
 }
 
 # Model paths
 SPACY_MODEL = "en_core_web_sm"
-BERT_MODEL = "all-MiniLM-L6-v2"
\ No newline at end of file
+
+# Chunked spaCy processing: text is split on page/paragraph boundaries into
+# chunks of at most CHUNK_CHARS and parsed with nlp.pipe. Components not
+# needed for sentences, entities and keywords are disabled.
+SPACY_PIPE = {
+    "CHUNK_CHARS": int(os.getenv("SPACY_CHUNK_CHARS", 100_000)),
+    "BATCH_SIZE": int(os.getenv("SPACY_BATCH_SIZE", 4)),
+    "N_PROCESS": int(os.getenv("SPACY_N_PROCESS", 1)),
+    "DISABLE": ["tagger", "attribute_ruler", "lemmatizer"],
+}
+BERT_MODEL = "all-MiniLM-L6-v2"
+
+# Persistent sentence vector index (written by load, memory-mapped by the API).
+# Starts as an exact flat index and is rebuilt as IVF or HNSW once it holds
+# UPGRADE_THRESHOLD vectors.
+VECTOR_INDEX = {
+    "DIR": Path(os.getenv("VECTOR_INDEX_DIR", DATA_DIR / "index")),
+    "UPGRADE_THRESHOLD": int(os.getenv("VECTOR_INDEX_UPGRADE_THRESHOLD", 200_000)),
+    "UPGRADE_TYPE": os.getenv("VECTOR_INDEX_UPGRADE_TYPE", "ivf"),
+}
+
+# Sentence embedding cache (hash-keyed, memory-mapped float32 rows per model)
+EMBEDDING_CACHE = {
+    "ENABLED": os.getenv("EMBEDDING_CACHE_ENABLED", "1") != "0",
+    "DIR": CACHE_DIR / "embeddings",
+    "BATCH_SIZE": int(os.getenv("EMBEDDING_BATCH_SIZE", 64)),
+}
+
+# Batch ingest: each source PDF is processed in WORK_DIR/<content hash>;
+# WORKERS documents run concurrently and share the OCR worker budget
+BATCH = {
+    "WORKERS": int(os.getenv("BATCH_WORKERS", 2)),
+    "HASH_PREFIX": 16,  # hex characters of the SHA-256 used for work directory names
+}
@@ -0,0 +1,274 @@
+"""Sentence embedding layer with deduplication and a persistent embedding store."""
+import hashlib
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: stores are not shared between processes
+    fcntl = None
+
+# SentenceTransformer models by name, loaded on first use
+_models: Dict[str, Any] = {}
+_models_lock = threading.Lock()
+
+
+def get_sentence_model(name: str) -> Any:
+    """
+    SentenceTransformer ``name``, loaded once per process and shared by all
+    threads. sentence_transformers (and torch) are only imported here.
+    """
+    model = _models.get(name)
+    if model is None:
+        with _models_lock:
+            model = _models.get(name)
+            if model is None:
+                from sentence_transformers import SentenceTransformer
+                model = _models[name] = SentenceTransformer(name)
+    return model
+
+
+@contextmanager
+def _file_lock(path: Path) -> Iterator[None]:
+    """Exclusive inter-process lock on ``path`` (held until the block exits)."""
+    with open(path, "a") as f:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+class EmbeddingStore:
+    """
+    Persistent, hash-keyed store of float32 sentence embeddings.
+
+    Vectors are appended as raw float32 rows to ``vectors.f32`` and read
+    through a memory map; ``keys.txt`` holds one sentence hash per line
+    (line number == row).  Appends hold an exclusive lock on ``store.lock``
+    (so several processes can share a store) and write the vectors before
+    the keys; a row id is the vector's offset in ``vectors.f32``.  Rows
+    left without a key by an interrupted append, and partial key lines,
+    are truncated the next time the store is opened or appended to.  A key
+    that appears twice keeps its first row.
+    """
+
+    def __init__(self, store_dir: Path, dimension: int):
+        """Open (or create) the store in ``store_dir``."""
+        self.store_dir = Path(store_dir)
+        self.store_dir.mkdir(parents=True, exist_ok=True)
+        self.dimension = dimension
+        self.row_bytes = dimension * 4
+        self.vectors_path = self.store_dir / "vectors.f32"
+        self.keys_path = self.store_dir / "keys.txt"
+        self.lock_path = self.store_dir / "store.lock"
+        self._lock = threading.Lock()
+        self._vectors = None
+
+        meta_path = self.store_dir / "meta.json"
+        if meta_path.exists():
+            with open(meta_path, "r", encoding="utf-8") as f:
+                stored = json.load(f)["dimension"]
+            if stored != dimension:
+                raise ValueError(f"Embedding store {store_dir} has dimension {stored}, expected {dimension}")
+        else:
+            with open(meta_path, "w", encoding="utf-8") as f:
+                json.dump({"dimension": dimension, "dtype": "float32"}, f)
+
+        self._rows = {}
+        self._count = 0  # key lines read == rows they cover
+        self._keys_offset = 0  # bytes of keys.txt read so far
+        with self._lock, _file_lock(self.lock_path):
+            self._repair()
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def _read_new_keys(self) -> None:
+        """Index complete key lines appended (by any process) since the last read."""
+        if not self.keys_path.exists():
+            return
+        with open(self.keys_path, "rb") as f:
+            f.seek(self._keys_offset)
+            data = f.read()
+        end = data.rfind(b"\n") + 1
+        for line in data[:end].splitlines():
+            self._rows.setdefault(line.decode("ascii").strip(), self._count)
+            self._count += 1
+        self._keys_offset += end
+
+    def _repair(self) -> None:
+        """
+        Make ``keys.txt`` and ``vectors.f32`` cover the same complete rows.
+        Must be called with the file lock held.
+        """
+        self._read_new_keys()
+        if self.keys_path.exists() and self.keys_path.stat().st_size > self._keys_offset:
+            # Partial line of an interrupted append
+            os.truncate(self.keys_path, self._keys_offset)
+
+        size = self.vectors_path.stat().st_size if self.vectors_path.exists() else 0
+        available = size // self.row_bytes
+        if available < self._count:
+            # Keys without vectors (vectors.f32 truncated externally): keep the covered keys
+            with open(self.keys_path, "rb") as f:
+                lines = f.read().splitlines(keepends=True)[:available]
+            tmp_path = self.keys_path.with_suffix(".txt.tmp")
+            with open(tmp_path, "wb") as f:
+                f.writelines(lines)
+            os.replace(tmp_path, self.keys_path)
+            self._rows, self._count, self._keys_offset, self._vectors = {}, 0, 0, None
+            self._read_new_keys()
+        if size > self._count * self.row_bytes:
+            # Vectors whose keys were never written
+            os.truncate(self.vectors_path, self._count * self.row_bytes)
+
+    def _matrix(self) -> np.ndarray:
+        """Memory-mapped view over all stored rows (remapped after appends)."""
+        if self._vectors is None or self._vectors.shape[0] != self._count:
+            self._vectors = np.memmap(self.vectors_path, dtype=np.float32, mode="r",
+                                      shape=(self._count, self.dimension))
+        return self._vectors
+
+    def lookup(self, keys: List[str]) -> Dict[str, np.ndarray]:
+        """Return the stored vectors for the keys that are present."""
+        with self._lock:
+            # Vectors are written before their keys, so indexed rows are complete
+            self._read_new_keys()
+            rows = {key: self._rows[key] for key in keys if key in self._rows}
+            if not rows:
+                return {}
+            matrix = self._matrix()
+            return {key: np.array(matrix[row]) for key, row in rows.items()}
+
+    def add(self, keys: List[str], vectors: np.ndarray) -> None:
+        """Append new vectors; keys already in the store are skipped."""
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        with self._lock, _file_lock(self.lock_path):
+            self._repair()
+            new, seen = [], set()
+            for i, key in enumerate(keys):
+                if key not in self._rows and key not in seen:
+                    seen.add(key)
+                    new.append(i)
+            if not new:
+                return
+            with open(self.vectors_path, "ab") as f:
+                f.seek(0, os.SEEK_END)
+                first_row = f.tell() // self.row_bytes
+                if first_row != self._count:
+                    raise RuntimeError(
+                        f"Embedding store {self.store_dir} has {first_row} vectors for {self._count} keys"
+                    )
+                f.write(vectors[new].tobytes())
+            with open(self.keys_path, "a", encoding="ascii") as f:
+                f.writelines(f"{keys[i]}\n" for i in new)
+            self._read_new_keys()
+
+
+# Open stores by directory, shared by every thread of the process
+_stores: Dict[Path, EmbeddingStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_embedding_store(store_dir: Path, dimension: int) -> EmbeddingStore:
+    """
+    The process-wide EmbeddingStore for ``store_dir``. Concurrent transforms
+    (batch runner threads) share one instance and its row map; other
+    processes are serialized by the store's file lock.
+    """
+    key = Path(store_dir).resolve()
+    with _stores_lock:
+        store = _stores.get(key)
+        if store is None:
+            store = _stores[key] = EmbeddingStore(key, dimension)
+        elif store.dimension != dimension:
+            raise ValueError(f"Embedding store {key} has dimension {store.dimension}, expected {dimension}")
+        return store
+
+
+class SentenceEncoder:
+    """
+    Encode sentences with a SentenceTransformer, deduplicating within the
+    document and serving repeats from an EmbeddingStore.
+
+    Unique sentences that miss the store are sorted by length so batches
+    pad to similar lengths, then encoded with ``batch_size``.
+    """
+
+    def __init__(self, model: Any, model_name: str, store: Optional[EmbeddingStore] = None,
+                 batch_size: int = 64):
+        """Initialize the encoder."""
+        self.model = model
+        self.model_name = model_name
+        self.store = store
+        self.batch_size = batch_size
+        self.dimension = model.get_sentence_embedding_dimension()
+
+        self.sentences = 0
+        self.unique = 0
+        self.hits = 0
+        self.encoded = 0
+        self.encode_seconds = 0.0
+        self.total_seconds = 0.0
+
+    def _key(self, sentence: str) -> str:
+        return hashlib.sha1(f"{self.model_name}\0{sentence}".encode("utf-8")).hexdigest()
+
+    def encode(self, sentences: List[str]) -> np.ndarray:
+        """Return one float32 embedding row per input sentence, in input order."""
+        start = time.perf_counter()
+        unique = list(dict.fromkeys(sentences))
+        keys = [self._key(sentence) for sentence in unique]
+
+        found = self.store.lookup(keys) if self.store is not None else {}
+        vectors = dict(found)
+
+        missing = [i for i, key in enumerate(keys) if key not in found]
+        if missing:
+            missing.sort(key=lambda i: len(unique[i]))
+            encode_start = time.perf_counter()
+            encoded = self.model.encode(
+                [unique[i] for i in missing],
+                batch_size=self.batch_size,
+                convert_to_numpy=True,
+                show_progress_bar=False,
+            ).astype(np.float32)
+            self.encode_seconds += time.perf_counter() - encode_start
+            if self.store is not None:
+                self.store.add([keys[i] for i in missing], encoded)
+            for row, i in enumerate(missing):
+                vectors[keys[i]] = encoded[row]
+
+        by_sentence = {sentence: vectors[key] for sentence, key in zip(unique, keys)}
+        result = np.zeros((len(sentences), self.dimension), dtype=np.float32)
+        for row, sentence in enumerate(sentences):
+            result[row] = by_sentence[sentence]
+
+        self.sentences += len(sentences)
+        self.unique += len(unique)
+        self.hits += len(found)
+        self.encoded += len(missing)
+        self.total_seconds += time.perf_counter() - start
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        """Cache hit rate and throughput counters."""
+        return {
+            "sentences": self.sentences,
+            "unique_sentences": self.unique,
+            "cache_hits": self.hits,
+            "encoded": self.encoded,
+            "cache_hit_rate": self.hits / self.unique if self.unique else 0.0,
+            "sentences_per_sec": self.sentences / self.total_seconds if self.total_seconds else 0.0,
+            "encoded_per_sec": self.encoded / self.encode_seconds if self.encode_seconds else 0.0,
+        }
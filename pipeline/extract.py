@@ -1,96 +1,316 @@
-import os
 import json
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 import cv2
-import pdf2image
 import fitz  # PyMuPDF
 import numpy as np
-import spacy
-from paddleocr import PaddleOCR
 
-# Direktori dan path
-BASE_DIR = Path("C:/Users/wilda/OneDrive/Documents/studycase_vidavox/data")
-INPUT_DIR = BASE_DIR / "input"
-PROCESSED_DIR = BASE_DIR / "processed"
+from config import (
+    INPUT_DIR, PROCESSED_DIR,
+    PDF_DPI, TEXT_LAYER, SAVE_PAGE_IMAGES, SAVE_DEBUG_IMAGES,
+    CHART_DETECTION, CHART_DETECTION_MODE, CHART_REGIONS,
+)
+from artifacts import write_entities, write_pages
+from image_writer import BackgroundImageWriter
+from metrics import metrics
+from nlp_pass import NLP_ARTIFACT, parse_to_artifact
+from ocr import iter_cached_ocr_pages, iter_ocr_pages
+from ocr_cache import get_ocr_cache
+
+def page_label(page_number):
+    """
+    Nama halaman yang dipakai di output (dan nama file jika gambar disimpan).
+    """
+    return f"page_{page_number}.png"
 
-# Pastikan folder processed tersedia
-PROCESSED_DIR.mkdir(parents=True, exist_ok=True)
 
-# Load SpaCy NER model (bisa ganti ke model lain sesuai kebutuhan)
-nlp = spacy.load("en_core_web_sm")
+def region_label(page_number, region_index):
+    """
+    Nama region kandidat chart pada sebuah halaman.
+    """
+    return f"page_{page_number}_region_{region_index}.png"
 
 
-def detect_charts_in_images(image_paths):
+def count_line_orientations(lines):
     """
-    Deteksi apakah ada chart/tabel dalam gambar menggunakan OpenCV.
-    Metode ini mencari garis, pola grid, dan bentuk geometris.
+    Hitung jumlah segmen Hough horizontal dan vertikal sekaligus untuk seluruh
+    array lines (vektorisasi, tanpa loop Python per segmen).
     """
-    chart_data = []
+    if lines is None or len(lines) == 0:
+        return 0, 0
 
-    if not image_paths:
-        print("⚠️ Tidak ada gambar tersedia untuk deteksi grafik.")
-        return chart_data
+    segments = lines.reshape(-1, 4)
+    dx = segments[:, 2] - segments[:, 0]
+    dy = segments[:, 3] - segments[:, 1]
+    angles = np.abs(np.arctan2(dy, dx) * 180.0 / np.pi)
 
-    for image_path in image_paths:
-        img = cv2.imread(str(image_path))
-        if img is None:
-            print(f"⚠️ Gagal membaca gambar: {image_path}")
-            continue
+    horizontal_lines = int(np.count_nonzero((angles < 5) | (angles > 175)))
+    vertical_lines = int(np.count_nonzero((angles > 85) & (angles < 95)))
+    return horizontal_lines, vertical_lines
 
-        # Konversi ke grayscale
-        gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
 
-        # Threshold adaptif
-        binary = cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
-                                       cv2.THRESH_BINARY_INV, 11, 2)
+def is_chart_candidate(gray):
+    """
+    Tahap murah dari cascade: hitung kontur pada halaman yang diperkecil.
+    Hanya kandidat yang diteruskan ke Hough resolusi penuh.
+    """
+    scale = CHART_DETECTION["CASCADE_SCALE"]
+    small = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+    binary = cv2.adaptiveThreshold(small, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
+                                   cv2.THRESH_BINARY_INV, 11, 2)
+    contours, _ = cv2.findContours(binary, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    return len(contours) >= CHART_DETECTION["CASCADE_MIN_CONTOURS"]
 
-        # Canny edge detection
-        edges = cv2.Canny(binary, 50, 150, apertureSize=3)
 
-        # Deteksi garis menggunakan Hough Transform
-        lines = cv2.HoughLinesP(edges, 1, np.pi/180, threshold=100,
-                                minLineLength=100, maxLineGap=20)
+def detect_chart_in_image(img, page_number, output_folder=PROCESSED_DIR, writer=None,
+                          label=None, bbox=None):
+    """
+    Deteksi chart/tabel pada satu gambar halaman atau region (array BGR di
+    memori) menggunakan OpenCV. Gambar debug hanya disimpan jika writer
+    diberikan. bbox (koordinat PDF dalam point) ikut dicatat untuk region.
+    """
+    image_path = output_folder / (label or page_label(page_number))
 
-        # Deteksi kontur (untuk bentuk geometris)
-        contours, _ = cv2.findContours(binary, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    # Konversi ke grayscale
+    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
 
-        # Analisis karakteristik chart
-        characteristics = {
-            "has_lines": lines is not None and len(lines) > 10,
-            "has_shapes": len(contours) > 5,
-            "regular_patterns": False
+    # Cascade (opsional): halaman yang jelas bukan chart tidak diproses penuh.
+    # Record-nya berformat sama dengan hasil deteksi penuh.
+    if CHART_DETECTION["CASCADE"] and not is_chart_candidate(gray):
+        characteristics = {"has_lines": False, "has_shapes": False, "regular_patterns": False}
+        record = {
+            "image": str(image_path),
+            "page": page_number,
+            "contains_chart": "No",
+            "characteristics": characteristics,
+            "confidence_score": 0.0
         }
+        if bbox is not None:
+            record["bbox"] = [round(v, 2) for v in bbox]
+        print(f"📊 {image_path.name} → Contains Chart? False (cascade)")
+        return record
+
+    # Threshold adaptif
+    binary = cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
+                                   cv2.THRESH_BINARY_INV, 11, 2)
+
+    # Canny edge detection
+    edges = cv2.Canny(binary, CHART_DETECTION["CANNY_THRESHOLD1"],
+                      CHART_DETECTION["CANNY_THRESHOLD2"], apertureSize=3)
+
+    # Deteksi garis menggunakan Hough Transform
+    lines = cv2.HoughLinesP(edges, 1, np.pi/180, threshold=CHART_DETECTION["HOUGH_THRESHOLD"],
+                            minLineLength=CHART_DETECTION["MIN_LINE_LENGTH"],
+                            maxLineGap=CHART_DETECTION["MAX_LINE_GAP"])
+
+    # Deteksi kontur (untuk bentuk geometris)
+    contours, _ = cv2.findContours(binary, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+
+    # Analisis karakteristik chart
+    characteristics = {
+        "has_lines": lines is not None and len(lines) > 10,
+        "has_shapes": len(contours) > 5,
+        "regular_patterns": False
+    }
+
+    # Analisis pola teratur (indikasi grid atau axis)
+    if lines is not None:
+        horizontal_lines, vertical_lines = count_line_orientations(lines)
+        characteristics["regular_patterns"] = horizontal_lines > 3 and vertical_lines > 3
+
+    contains_chart = all(characteristics.values())
+
+    record = {
+        "image": str(image_path),
+        "page": page_number,
+        "contains_chart": "Yes" if contains_chart else "No",
+        "characteristics": characteristics,
+        "confidence_score": sum(characteristics.values()) / len(characteristics)
+    }
+    if bbox is not None:
+        record["bbox"] = [round(v, 2) for v in bbox]
+
+    print(f"📊 {image_path.name} → Contains Chart? {contains_chart}")
+
+    # Simpan gambar debug jika chart terdeteksi (di thread latar belakang)
+    if contains_chart and writer is not None and SAVE_DEBUG_IMAGES:
+        debug_path = output_folder / f"debug_{image_path.name}"
+        writer.submit(debug_path, edges)
+        print(f"🔍 Debug image queued: {debug_path}")
+
+    return record
+
+
+def _ordered_thread_map(fn, items, workers):
+    """
+    Jalankan fn untuk setiap item di thread pool dan hasilkan (item, hasil)
+    sesuai urutan input; paling banyak dua item per thread yang diproses
+    bersamaan sehingga items boleh berupa generator panjang.
+    """
+    if workers <= 1:
+        for item in items:
+            yield item, fn(item)
+        return
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="chart-detect") as executor:
+        pending = deque()
+        for item in items:
+            pending.append((item, executor.submit(fn, item)))
+            if len(pending) >= workers * 2:
+                item, future = pending.popleft()
+                yield item, future.result()
+        while pending:
+            item, future = pending.popleft()
+            yield item, future.result()
+
+
+def iter_chart_detection(pages, output_folder=PROCESSED_DIR, writer=None, workers=None):
+    """
+    Deteksi chart pada aliran halaman menggunakan thread pool (OpenCV melepas
+    GIL). Menghasilkan (nomor_halaman, gambar, record) sesuai urutan halaman.
+    """
+    workers = CHART_DETECTION["WORKERS"] if workers is None else workers
 
-        # Analisis pola teratur (indikasi grid atau axis)
-        if lines is not None:
-            horizontal_lines, vertical_lines = 0, 0
-            for line in lines:
-                x1, y1, x2, y2 = line[0]
-                angle = np.abs(np.arctan2(y2 - y1, x2 - x1) * 180.0 / np.pi)
-                if angle < 5 or angle > 175:
-                    horizontal_lines += 1
-                elif 85 < angle < 95:
-                    vertical_lines += 1
+    def detect(page):
+        page_number, image = page
+        with metrics.timer("extract.chart_detect", items=1):
+            return detect_chart_in_image(image, page_number, output_folder, writer)
 
-            characteristics["regular_patterns"] = horizontal_lines > 3 and vertical_lines > 3
+    for (page_number, image), record in _ordered_thread_map(detect, pages, workers):
+        yield page_number, image, record
 
-        contains_chart = all(characteristics.values())
 
-        chart_data.append({
-            "image": str(image_path),
-            "contains_chart": "Yes" if contains_chart else "No",
-            "characteristics": characteristics,
-            "confidence_score": sum(characteristics.values()) / len(characteristics)
-        })
+def detect_charts_in_images(pages, output_folder=PROCESSED_DIR, writer=None, workers=None):
+    """
+    Deteksi apakah ada chart/tabel dalam gambar menggunakan OpenCV.
+    Metode ini mencari garis, pola grid, dan bentuk geometris.
+    pages berisi (nomor_halaman, gambar) dan boleh berupa generator.
+    """
+    chart_data = [
+        record for _, _, record in iter_chart_detection(pages, output_folder, writer, workers)
+    ]
+
+    if not chart_data:
+        print("⚠️ Tidak ada gambar tersedia untuk deteksi grafik.")
+
+    return chart_data
+
+
+def _merge_rects(rects, margin):
+    """
+    Gabungkan persegi yang saling berdekatan (jarak <= margin) menjadi cluster,
+    diulang sampai tidak ada dua cluster yang berdekatan. Kedekatan dihitung
+    dari koordinat, sehingga garis (lebar/tinggi nol) juga ikut tergabung.
+    Tiap putaran memakai sort-and-sweep pada sumbu x dan union-find.
+    Mengembalikan daftar [rect, jumlah_anggota].
+    """
+    boxes = []
+    for rect in rects:
+        x0, y0, x1, y1 = fitz.Rect(rect)
+        boxes.append((min(x0, x1), min(y0, y1), max(x0, x1), max(y0, y1), 1))
+
+    while True:
+        parent = list(range(len(boxes)))
+
+        def find(i):
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        merged = False
+        active = []
+        for i in sorted(range(len(boxes)), key=lambda i: boxes[i][0]):
+            x0, y0, x1, y1, _ = boxes[i]
+            # Persegi yang sudah berakhir lebih dari margin di kiri tidak bisa bersentuhan lagi
+            active = [j for j in active if boxes[j][2] + margin >= x0]
+            for j in active:
+                if boxes[j][1] <= y1 + margin and y0 <= boxes[j][3] + margin:
+                    root_i, root_j = find(i), find(j)
+                    if root_i != root_j:
+                        parent[root_i] = root_j
+                        merged = True
+            active.append(i)
+
+        if not merged:
+            break
+
+        clusters = {}
+        for i, box in enumerate(boxes):
+            root = find(i)
+            cluster = clusters.get(root)
+            clusters[root] = box if cluster is None else (
+                min(cluster[0], box[0]), min(cluster[1], box[1]),
+                max(cluster[2], box[2]), max(cluster[3], box[3]),
+                cluster[4] + box[4],
+            )
+        boxes = list(clusters.values())
+
+    return [[fitz.Rect(x0, y0, x1, y1), count] for x0, y0, x1, y1, count in boxes]
+
+
+def find_chart_regions(page):
+    """
+    Bangun region kandidat chart dari struktur PDF tanpa rasterisasi:
+    gambar tertanam (get_image_info) dan cluster gambar vektor (get_drawings).
+    Mengembalikan daftar (bbox, sumber) dalam koordinat PDF.
+    """
+    min_area = CHART_REGIONS["MIN_AREA"]
+    regions = []
 
-        print(f"📊 {image_path} → Contains Chart? {contains_chart}")
+    for info in page.get_image_info():
+        bbox = fitz.Rect(info["bbox"]) & page.rect
+        if not bbox.is_empty and bbox.width * bbox.height >= min_area:
+            regions.append((bbox, "image"))
 
-        # Simpan gambar debug jika chart terdeteksi
-        if contains_chart:
-            debug_path = PROCESSED_DIR / f"debug_{Path(image_path).name}"
-            cv2.imwrite(str(debug_path), edges)
-            print(f"🔍 Debug image saved at: {debug_path}")
+    drawing_rects = [drawing["rect"] for drawing in page.get_drawings()]
+    for bbox, count in _merge_rects(drawing_rects, CHART_REGIONS["MERGE_MARGIN"]):
+        bbox &= page.rect
+        if (count >= CHART_REGIONS["MIN_DRAWING_PATHS"] and not bbox.is_empty
+                and bbox.width * bbox.height >= min_area):
+            regions.append((bbox, "drawing"))
 
+    return regions
+
+
+def iter_chart_regions(pdf_path, dpi=PDF_DPI):
+    """
+    Rasterisasi hanya region kandidat chart (clip pixmap).
+    Halaman tanpa kandidat tidak dirasterisasi sama sekali.
+    Menghasilkan (nomor_halaman, indeks_region, bbox, sumber, gambar BGR).
+    """
+    with fitz.open(pdf_path) as doc:
+        for page in doc:
+            for index, (bbox, source) in enumerate(find_chart_regions(page), start=1):
+                with metrics.timer("extract.rasterize", items=1):
+                    image = _pixmap_to_bgr(page.get_pixmap(dpi=dpi, clip=bbox, alpha=False))
+                yield page.number + 1, index, tuple(bbox), source, image
+
+
+def detect_charts_in_regions(pdf_path, output_folder=PROCESSED_DIR, writer=None,
+                             workers=None, dpi=PDF_DPI):
+    """
+    Deteksi chart per region (mode "region"). Setiap record membawa bbox
+    region dalam koordinat PDF untuk disimpan ke tabel charts.
+    """
+    workers = CHART_DETECTION["WORKERS"] if workers is None else workers
+
+    def detect(region):
+        page_number, index, bbox, source, image = region
+        label = region_label(page_number, index)
+        if writer is not None and SAVE_PAGE_IMAGES:
+            writer.submit(output_folder / label, image)
+        with metrics.timer("extract.chart_detect", items=1):
+            record = detect_chart_in_image(image, page_number, output_folder, writer,
+                                           label=label, bbox=bbox)
+        record["source"] = source
+        return record
+
+    chart_data = [
+        record for _, record in _ordered_thread_map(detect, iter_chart_regions(pdf_path, dpi), workers)
+    ]
+    print(f"🧩 {len(chart_data)} region kandidat chart dianalisis.")
     return chart_data
 
 
@@ -103,96 +323,280 @@ def extract_text_from_pdf(pdf_path):
     return text if text else None
 
 
-def pdf_to_images(pdf_path, output_folder=PROCESSED_DIR, dpi=300):
+def _image_coverage(page):
     """
-    Konversi PDF ke gambar (PNG) menggunakan pdf2image.
+    Hitung proporsi area halaman yang tertutup gambar (0.0 - 1.0).
     """
-    images = pdf2image.convert_from_path(pdf_path, dpi=dpi)
-    image_paths = []
+    page_area = page.rect.width * page.rect.height
+    if not page_area:
+        return 0.0
 
-    for i, image in enumerate(images):
-        image_path = output_folder / f"page_{i+1}.png"
-        image.save(image_path, "PNG")
-        image_paths.append(image_path)
+    covered = 0.0
+    for info in page.get_image_info():
+        bbox = fitz.Rect(info["bbox"]) & page.rect
+        if not bbox.is_empty:
+            covered += bbox.width * bbox.height
 
-    return image_paths
+    return min(covered / page_area, 1.0)
 
 
-def extract_text_from_images(image_paths):
+def classify_pages(pdf_path):
     """
-    Ekstraksi teks dari gambar menggunakan PaddleOCR.
+    Tentukan rute tiap halaman berdasarkan text layer PyMuPDF:
+    "text" jika teks langsung cukup padat, "ocr" jika halaman hanya berisi
+    gambar (text layer kosong, atau gambar menutupi sebagian besar halaman
+    sementara teksnya jarang).
     """
-    ocr = PaddleOCR(use_angle_cls=True, lang="en")
-    extracted_text = []
+    pages = []
 
-    for image_path in image_paths:
-        result = ocr.ocr(str(image_path), cls=True)
+    with fitz.open(pdf_path) as doc:
+        for page in doc:
+            text = page.get_text("text").strip()
+            page_area = page.rect.width * page.rect.height
+            density = len(text) / page_area * 10000 if page_area else 0.0
+            coverage = _image_coverage(page)
 
-        if not result or not result[0]:
-            extracted_text.append("[No text detected]")
-        else:
-            page_text = []
-            for line in result:
-                line_text = " ".join([word[1][0] for word in line if len(word) > 1])
-                page_text.append(line_text)
-            extracted_text.append("\n".join(page_text))
+            needs_ocr = len(text) < TEXT_LAYER["MIN_CHARS"] or (
+                coverage >= TEXT_LAYER["MAX_IMAGE_COVERAGE"]
+                and density < TEXT_LAYER["MIN_DENSITY"]
+            )
 
-    return "\n\n".join(extracted_text)
+            pages.append({
+                "page": page.number + 1,
+                "route": "ocr" if needs_ocr else "text",
+                "text_chars": len(text),
+                "text_density": round(density, 3),
+                "image_coverage": round(coverage, 3),
+                "text": text,
+            })
 
+    return pages
 
-def process_named_entities(text):
+
+def _pixmap_to_bgr(pix):
     """
-    Proses teks menggunakan SpaCy untuk Named Entity Recognition (NER).
+    Konversi pixmap PyMuPDF menjadi array BGR numpy (format OpenCV/PaddleOCR).
     """
-    doc = nlp(text)
-    return {ent.label_: ent.text for ent in doc.ents}
+    image = np.frombuffer(pix.samples, dtype=np.uint8).reshape(pix.height, pix.width, pix.n)
+    if pix.n == 1:
+        return cv2.cvtColor(image, cv2.COLOR_GRAY2BGR)
+    return cv2.cvtColor(image, cv2.COLOR_RGB2BGR)
 
 
-def main():
-    pdf_path = INPUT_DIR / "input_data.pdf"
-    output_text_path = PROCESSED_DIR / "extracted_text.json"
-    chart_detection_output = PROCESSED_DIR / "chart_detection.json"
+def iter_pdf_pages(pdf_path, dpi=PDF_DPI, page_numbers=None):
+    """
+    Rasterisasi PDF halaman demi halaman menggunakan PyMuPDF.
+    Menghasilkan (nomor_halaman, gambar BGR numpy) satu per satu,
+    sehingga hanya satu halaman yang berada di memori pada satu waktu.
+    page_numbers (opsional, mulai dari 1) membatasi halaman yang dirender.
+    """
+    with fitz.open(pdf_path) as doc:
+        numbers = range(1, len(doc) + 1) if page_numbers is None else page_numbers
+        for page_number in numbers:
+            with metrics.timer("extract.rasterize", items=1):
+                image = _pixmap_to_bgr(doc[page_number - 1].get_pixmap(dpi=dpi, alpha=False))
+            yield page_number, image
 
-    try:
-        # 1. Coba ekstraksi teks langsung
-        extracted_text = extract_text_from_pdf(pdf_path)
 
-        if extracted_text:
-            print("✅ Teks langsung ditemukan dari PDF.")
-            image_paths = []
-        else:
-            print("🖼️ PDF tidak mengandung teks langsung, konversi ke gambar...")
-            image_paths = pdf_to_images(pdf_path)
-            extracted_text = extract_text_from_images(image_paths)
+def pdf_to_images(pdf_path, output_folder=PROCESSED_DIR, dpi=PDF_DPI):
+    """
+    Konversi PDF ke gambar (PNG) secara streaming.
+    Setiap halaman langsung disimpan begitu selesai dirender dan path-nya
+    di-yield, tanpa menampung seluruh dokumen di memori.
+    """
+    for page_number, image in iter_pdf_pages(pdf_path, dpi=dpi):
+        image_path = output_folder / page_label(page_number)
+        cv2.imwrite(str(image_path), image)
+        yield image_path
 
-        # 2. Konversi PDF ke gambar tetap dijalankan untuk chart detection
-        if not image_paths:
-            image_paths = pdf_to_images(pdf_path)
 
-        # 3. Deteksi chart/tabel dari gambar
-        chart_data = detect_charts_in_images(image_paths)
+def save_pages_in_background(pages, writer, output_folder=PROCESSED_DIR):
+    """
+    Teruskan halaman apa adanya sambil mengantrekan penyimpanannya ke writer
+    latar belakang (encoding PNG tidak berjalan di jalur utama).
+    """
+    for page_number, image in pages:
+        writer.submit(output_folder / page_label(page_number), image)
+        yield page_number, image
 
-        # 4. NER - Named Entity Recognition dari teks
-        named_entities = process_named_entities(extracted_text)
 
-        # 5. Simpan hasil ke JSON
-        extracted_data = {
-            "text": extracted_text,
-            "named_entities": named_entities
-        }
+def detect_charts_while_streaming(pages, chart_data, output_folder=PROCESSED_DIR, writer=None):
+    """
+    Jalankan deteksi chart pada setiap halaman sambil meneruskan halaman
+    tersebut ke tahap berikutnya (OCR), sehingga keduanya berjalan sebagai pipeline.
+    """
+    for page_number, image, record in iter_chart_detection(pages, output_folder, writer):
+        chart_data.append(record)
+        yield page_number, image
+
+
+def select_pages_for_ocr(pages, page_routes):
+    """
+    Teruskan hanya gambar halaman dengan rute "ocr" ke tahap OCR.
+    """
+    for page, (_, image) in zip(page_routes, pages):
+        if page["route"] == "ocr":
+            yield image
+
+
+def merge_page_texts(page_routes, ocr_results):
+    """
+    Gabungkan teks langsung dan hasil OCR kembali sesuai urutan halaman.
+    ocr_results berisi hasil OCR untuk halaman berrute "ocr", berurutan.
+    Teks OCR juga disimpan ke page["text"] agar teks per halaman ikut ditulis.
+    """
+    ocr_results = iter(ocr_results)
+
+    for page in page_routes:
+        if page["route"] == "ocr":
+            page["text"] = next(ocr_results)["text"]
+
+    # Habiskan aliran OCR agar tahap sebelumnya (deteksi chart) juga
+    # memproses halaman teks setelah halaman OCR terakhir
+    extra = next(ocr_results, None)
+    if extra is not None:
+        raise ValueError("Jumlah hasil OCR melebihi jumlah halaman berrute \"ocr\"")
+
+    return "\n\n".join(page["text"] for page in page_routes).strip()
+
+
+def iter_text_from_images(image_paths, workers=None, chunksize=None, cache_counts=None):
+    """
+    Jalankan OCR pada aliran gambar, melalui cache OCR jika diaktifkan.
+    Menghasilkan hasil OCR per halaman (teks dan kotak kata) sesuai urutan.
+    Hit dan miss cache dari pemanggilan ini ditambahkan ke cache_counts.
+    Waktu "extract.ocr" adalah waktu tunggu per halaman, termasuk tahap
+    sebelumnya (rasterisasi, deteksi chart) bila berjalan sebagai pipeline.
+    """
+    cache = get_ocr_cache()
+    if cache is None:
+        results = iter_ocr_pages(image_paths, workers=workers, chunksize=chunksize)
+    else:
+        results = iter_cached_ocr_pages(
+            image_paths, cache, workers=workers, chunksize=chunksize, counts=cache_counts
+        )
+    return metrics.timed_iter("extract.ocr", results)
+
+
+def extract_text_from_images(image_paths, workers=None, chunksize=None):
+    """
+    Ekstraksi teks dari gambar menggunakan PaddleOCR.
+    Halaman dibagi ke beberapa worker (masing-masing memuat PaddleOCR sekali),
+    hasilnya dikembalikan sesuai urutan halaman. image_paths boleh berupa
+    generator; halaman hanya diambil ketika ada worker yang siap. Halaman
+    yang tidak berubah diambil dari cache OCR tanpa menjalankan PaddleOCR.
+    """
+    results = iter_text_from_images(image_paths, workers=workers, chunksize=chunksize)
+    return "\n\n".join(result["text"] for result in results)
+
+
+def process_named_entities(text, artifact_path=None):
+    """
+    Proses teks menggunakan SpaCy untuk Named Entity Recognition (NER).
+    Teks diproses per potongan (nlp.pipe) dan hasil parsing disimpan (DocBin)
+    ke artifact_path agar tahap transform tidak perlu menjalankan SpaCy lagi.
+    Semua entitas dikembalikan beserta offset karakternya.
+    """
+    with metrics.timer("extract.spacy") as timing:
+        entities = parse_to_artifact(text, artifact_path)
+        timing.items = len(entities)
+    return entities
+
+
+def main(pdf_path=None, output_dir=None, ocr_workers=None):
+    """
+    Ekstraksi satu PDF ke output_dir (default: data/input/input_data.pdf ke
+    data/processed). ocr_workers membatasi jumlah worker OCR untuk dokumen ini,
+    misalnya saat beberapa dokumen diproses bersamaan oleh batch runner.
+    """
+    pdf_path = Path(pdf_path) if pdf_path else INPUT_DIR / "input_data.pdf"
+    output_dir = Path(output_dir) if output_dir else PROCESSED_DIR
+    output_dir.mkdir(parents=True, exist_ok=True)
+    chart_detection_output = output_dir / "chart_detection.json"
+
+    try:
+        # 1. Tentukan rute tiap halaman (teks langsung atau OCR)
+        page_routes = classify_pages(pdf_path)
+        ocr_count = sum(page["route"] == "ocr" for page in page_routes)
+        metrics.increment("extract.pages", len(page_routes))
+        metrics.increment("extract.ocr_pages", ocr_count)
+        cache = get_ocr_cache()
+        # Dihitung per dokumen: penghitung milik cache dipakai bersama oleh
+        # semua dokumen yang diproses bersamaan oleh batch runner
+        cache_counts = {"hits": 0, "misses": 0}
+        print(f"📑 {len(page_routes) - ocr_count} halaman teks langsung, {ocr_count} halaman perlu OCR.")
+
+        writer = None
+        if SAVE_PAGE_IMAGES or SAVE_DEBUG_IMAGES:
+            writer = BackgroundImageWriter()
+
+        try:
+            if CHART_DETECTION_MODE == "region":
+                # 2. Deteksi chart hanya pada region kandidat dari struktur PDF
+                chart_data = detect_charts_in_regions(pdf_path, output_folder=output_dir, writer=writer)
+
+                # 3. Rasterisasi (streaming) hanya halaman yang perlu OCR
+                ocr_numbers = [page["page"] for page in page_routes if page["route"] == "ocr"]
+                pages = iter_pdf_pages(pdf_path, page_numbers=ocr_numbers)
+                if writer is not None and SAVE_PAGE_IMAGES:
+                    pages = save_pages_in_background(pages, writer, output_folder=output_dir)
+                ocr_results = iter_text_from_images(
+                    (image for _, image in pages), workers=ocr_workers, cache_counts=cache_counts
+                ) if ocr_count else []
+                extracted_text = merge_page_texts(page_routes, ocr_results)
+            else:
+                # 2. Rasterisasi halaman secara streaming (generator, satu halaman per
+                #    langkah, langsung sebagai array di memori tanpa PNG)
+                pages = iter_pdf_pages(pdf_path)
+                if writer is not None and SAVE_PAGE_IMAGES:
+                    pages = save_pages_in_background(pages, writer, output_folder=output_dir)
+
+                # 3. Deteksi chart/tabel dari semua halaman; halaman yang perlu OCR
+                #    diteruskan dari aliran yang sama ke PaddleOCR sebagai pipeline
+                if ocr_count:
+                    chart_data = []
+                    ocr_results = iter_text_from_images(select_pages_for_ocr(
+                        detect_charts_while_streaming(pages, chart_data, output_folder=output_dir, writer=writer),
+                        page_routes
+                    ), workers=ocr_workers, cache_counts=cache_counts)
+                    extracted_text = merge_page_texts(page_routes, ocr_results)
+                else:
+                    chart_data = detect_charts_in_images(pages, output_folder=output_dir, writer=writer)
+                    extracted_text = merge_page_texts(page_routes, [])
+        finally:
+            # Tutup writer juga saat deteksi atau OCR gagal, agar thread
+            # latar belakang berhenti dan antrean gambar dituntaskan
+            if writer is not None:
+                writer.close()
+                print(f"💾 {writer.written} gambar disimpan di latar belakang.")
+                for error in writer.errors:
+                    print(f"⚠️ Gagal menyimpan gambar: {error}")
+
+        if ocr_count and cache is not None:
+            hits, misses = cache_counts["hits"], cache_counts["misses"]
+            metrics.record_cache("extract.ocr_cache", hits, misses)
+            hit_rate = hits / (hits + misses) if hits + misses else 0.0
+            print(f"🗃️ Cache OCR: {hits} hit, {misses} miss "
+                  f"({hit_rate:.0%}), {cache.stats()['size_bytes'] / 1e6:.1f} MB")
+
+        # 4. NER - Named Entity Recognition dari teks
+        named_entities = process_named_entities(extracted_text, output_dir / NLP_ARTIFACT)
 
-        with open(output_text_path, "w", encoding="utf-8") as f:
-            json.dump(extracted_data, f, indent=4, ensure_ascii=False)
+        # 5. Simpan teks per halaman dan entitas (Parquet), chart (JSON)
+        pages_path = write_pages(output_dir, page_routes)
+        write_entities(output_dir, "named_entities", named_entities)
 
         with open(chart_detection_output, "w", encoding="utf-8") as f:
             json.dump(chart_data, f, indent=4, ensure_ascii=False)
 
-        print(f"✅ Teks & Named Entities disimpan di: {output_text_path}")
+        print(f"✅ Teks per halaman & Named Entities disimpan di: {pages_path.parent}")
         print(f"✅ Data Deteksi Chart disimpan di: {chart_detection_output}")
 
     except Exception as e:
         print(f"❌ Terjadi kesalahan: {e}")
+        raise
 
 
 if __name__ == "__main__":
     main()
+    metrics.write_summary(PROCESSED_DIR / "extract_metrics.json")
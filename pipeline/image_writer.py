@@ -0,0 +1,57 @@
+"""Background writer that encodes and saves images off the processing hot path."""
+import queue
+import threading
+from pathlib import Path
+from typing import Optional
+
+import cv2
+import numpy as np
+
+# Sentinel telling the writer thread to stop
+_STOP = object()
+
+
+class BackgroundImageWriter:
+    """
+    Save images to disk from a background thread.
+
+    The queue is bounded so a slow disk applies back-pressure instead of
+    letting rendered pages pile up in memory.  cv2.imwrite releases the GIL,
+    so encoding overlaps with chart detection and OCR dispatch.
+    """
+
+    def __init__(self, max_queue: int = 4):
+        """Start the writer thread."""
+        self._queue = queue.Queue(maxsize=max_queue)
+        self.written = 0
+        self.errors = []
+        self._thread = threading.Thread(target=self._run, name="image-writer", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                return
+            path, image = item
+            try:
+                if not cv2.imwrite(str(path), image):
+                    raise OSError(f"cv2.imwrite failed for {path}")
+                self.written += 1
+            except Exception as e:
+                self.errors.append(f"{path}: {e}")
+
+    def submit(self, path: Path, image: np.ndarray) -> None:
+        """Queue an image for writing (blocks while the queue is full)."""
+        self._queue.put((path, image))
+
+    def close(self, timeout: Optional[float] = None) -> None:
+        """Flush pending writes and stop the writer thread."""
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
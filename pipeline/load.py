@@ -1,24 +1,50 @@
+import csv
+import io
 import json
 from pathlib import Path
-from typing import Optional, Dict
+from typing import Any, Optional, Dict, Iterable, List, Tuple
 
+import numpy as np
 import psycopg2
-from psycopg2.extras import Json
+from psycopg2.extras import Json, execute_values
 from dotenv import load_dotenv
 
-from config import PROCESSED_DIR, DATABASE_URL
+from artifacts import PROCESSED_CHARTS, read_column, read_embeddings, read_records, table_path
+import config
+from config import PROCESSED_DIR, VECTOR_INDEX
 from logger import setup_logger
+from metrics import metrics
+from vector_index import VectorIndex
 
 # Setup logging
 logger = setup_logger("load")
 
+def content_offsets(sentences: List[str]) -> List[Tuple[int, int]]:
+    """Offsets of each sentence inside the stored content ('\n'-joined sentences)."""
+    offsets, position = [], 0
+    for sentence in sentences:
+        offsets.append((position, position + len(sentence)))
+        position += len(sentence) + 1
+    return offsets
+
+def pack_vector(vector: np.ndarray) -> str:
+    """Packed little-endian float32 bytes, in bytea hex input format."""
+    return "\\x" + np.ascontiguousarray(vector, dtype="<f4").tobytes().hex()
+
+def pgvector_literal(vector: np.ndarray) -> str:
+    """pgvector text input format, e.g. '[0.1,0.2]'."""
+    return "[" + ",".join(map(repr, np.asarray(vector, dtype=np.float32).tolist())) + "]"
+
+# Channel the API response cache listens on for invalidation
+INVALIDATION_CHANNEL = "documents_changed"
+
 class DatabaseLoader:
     """Load processed data into PostgreSQL database."""
     
     def __init__(self):
         """Initialize database connection."""
         try:
-            self.conn = psycopg2.connect(DATABASE_URL)
+            self.conn = psycopg2.connect(config.DATABASE_URL)
             self.cur = self.conn.cursor()
             self.setup_database()
             logger.info("Database connection established")
@@ -40,6 +66,15 @@ class DatabaseLoader:
                 )
             """)
             
+            # Hash of the source PDF, so batch runs skip documents already ingested
+            self.cur.execute("""
+                ALTER TABLE documents ADD COLUMN IF NOT EXISTS content_hash TEXT
+            """)
+            self.cur.execute("""
+                CREATE UNIQUE INDEX IF NOT EXISTS idx_documents_content_hash
+                ON documents (content_hash)
+            """)
+
             # Create charts table
             self.cur.execute("""
                 CREATE TABLE IF NOT EXISTS charts (
@@ -48,69 +83,372 @@ class DatabaseLoader:
                     image_path TEXT NOT NULL,
                     confidence FLOAT,
                     characteristics JSONB,
+                    page_number INTEGER,
+                    bbox JSONB,
                     created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
                 )
             """)
+
+            # Chart location columns for tables created before region detection
+            self.cur.execute("""
+                ALTER TABLE charts
+                    ADD COLUMN IF NOT EXISTS page_number INTEGER,
+                    ADD COLUMN IF NOT EXISTS bbox JSONB
+            """)
             
-            # Create embeddings table
+            # Create embeddings table (one row per sentence, vector as packed float32)
             self.cur.execute("""
                 CREATE TABLE IF NOT EXISTS embeddings (
                     id SERIAL PRIMARY KEY,
                     document_id INTEGER REFERENCES documents(id) ON DELETE CASCADE,
+                    sentence_index INTEGER,
                     sentence TEXT NOT NULL,
-                    vector FLOAT[],
+                    vector BYTEA,
                     created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
                 )
             """)
-            
+            self.migrate_embeddings_schema()
+
+            # Single-row counter bumped on every load; the API keys its
+            # response cache on it
+            self.cur.execute("""
+                CREATE TABLE IF NOT EXISTS data_version (
+                    id BOOLEAN PRIMARY KEY DEFAULT TRUE CHECK (id),
+                    version BIGINT NOT NULL DEFAULT 0
+                )
+            """)
+            self.cur.execute("""
+                INSERT INTO data_version (id, version) VALUES (TRUE, 0)
+                ON CONFLICT (id) DO NOTHING
+            """)
+
             self.conn.commit()
             logger.info("Database tables created/verified")
-            
+
+            self.migrate_search_schema()
+
         except Exception as e:
             logger.error(f"Database setup failed: {e}")
             self.conn.rollback()
             raise
-            
-    def load_data(self, data_path: Path) -> Optional[int]:
-        """Load processed data into database."""
+
+    def migrate_embeddings_schema(self):
+        """
+        Bring older embeddings tables to the current layout and pick the
+        vector column to write.
+
+        Tables created by database/db.sql keep vectors in a pgvector
+        ``embedding VECTOR(384)`` column, which is used as is. Otherwise
+        vectors go to ``vector BYTEA``; the old ``vector FLOAT[]`` column was
+        never written, so it is converted in place.
+        """
+        self.cur.execute("""
+            ALTER TABLE embeddings
+                ADD COLUMN IF NOT EXISTS sentence_index INTEGER,
+                ADD COLUMN IF NOT EXISTS sentence TEXT
+        """)
+        self.cur.execute("""
+            SELECT column_name, data_type, udt_name
+            FROM information_schema.columns
+            WHERE table_name = 'embeddings' AND table_schema = current_schema()
+        """)
+        columns = {name: (data_type, udt_name) for name, data_type, udt_name in self.cur.fetchall()}
+
+        if columns.get("embedding", (None, None))[1] == "vector":
+            self.embedding_column = "embedding"
+            self.embedding_format = "pgvector"
+            return
+
+        if columns.get("vector", (None, None))[0] == "ARRAY":
+            self.cur.execute("""
+                ALTER TABLE embeddings ALTER COLUMN vector TYPE BYTEA USING NULL
+            """)
+        elif "vector" not in columns:
+            self.cur.execute("""
+                ALTER TABLE embeddings ADD COLUMN vector BYTEA
+            """)
+        self.embedding_column = "vector"
+        self.embedding_format = "bytea"
+
+    def migrate_search_schema(self, batch_size: int = 1000):
+        """
+        Ensure documents carry a stored, GIN-indexed full-text vector.
+
+        The column is kept current by a trigger on insert and content updates,
+        so search queries never run to_tsvector over document content. Rows
+        written before the column existed are backfilled in batches, each in
+        its own transaction, before the index is created.
+        """
+        self.cur.execute("""
+            ALTER TABLE documents ADD COLUMN IF NOT EXISTS document_vector tsvector
+        """)
+
+        self.cur.execute("""
+            CREATE OR REPLACE FUNCTION documents_trigger() RETURNS trigger AS $$
+            BEGIN
+                NEW.document_vector :=
+                    setweight(to_tsvector('english', COALESCE(NEW.content, '')), 'A');
+                RETURN NEW;
+            END
+            $$ LANGUAGE plpgsql
+        """)
+
+        # Recreated rather than kept if present, so databases set up from
+        # database/db.sql end up with the same definition
+        self.cur.execute("""
+            DROP TRIGGER IF EXISTS tsvector_update ON documents
+        """)
+        self.cur.execute("""
+            CREATE TRIGGER tsvector_update
+                BEFORE INSERT OR UPDATE OF content ON documents
+                FOR EACH ROW
+                EXECUTE FUNCTION documents_trigger()
+        """)
+        self.conn.commit()
+
+        backfilled = 0
+        while True:
+            self.cur.execute("""
+                UPDATE documents
+                SET document_vector = setweight(to_tsvector('english', COALESCE(content, '')), 'A')
+                WHERE id IN (
+                    SELECT id FROM documents
+                    WHERE document_vector IS NULL
+                    LIMIT %s
+                )
+            """, (batch_size,))
+            updated = self.cur.rowcount
+            self.conn.commit()
+            if not updated:
+                break
+            backfilled += updated
+        if backfilled:
+            logger.info(f"Backfilled full-text vectors for {backfilled} documents")
+
+        self.cur.execute("""
+            CREATE INDEX IF NOT EXISTS idx_fts_document ON documents USING GIN (document_vector)
+        """)
+        self.conn.commit()
+
+    def ingested_hashes(self, content_hashes: Iterable[str]) -> set:
+        """The subset of source content hashes that already have a document."""
+        self.cur.execute("""
+            SELECT content_hash FROM documents WHERE content_hash = ANY(%s)
+        """, (list(content_hashes),))
+        hashes = {row[0] for row in self.cur.fetchall()}
+        self.conn.commit()
+        return hashes
+
+    def document_id_for(self, content_hash: str) -> Optional[int]:
+        """ID of the document loaded from the source with ``content_hash``, if any."""
+        self.cur.execute("""
+            SELECT id FROM documents WHERE content_hash = %s
+        """, (content_hash,))
+        row = self.cur.fetchone()
+        self.conn.commit()
+        return row[0] if row else None
+
+    def read_processed(self, work_dir: Path) -> Dict[str, Any]:
+        """
+        Read the transform outputs of a work directory, only the columns
+        the load needs (sentence text, entities, keywords) plus the charts.
+        """
+        with open(Path(work_dir) / PROCESSED_CHARTS, 'r', encoding='utf-8') as f:
+            charts = json.load(f)
+        return {
+            'text_analysis': {
+                'sentences': read_column(work_dir, "sentences", "text"),
+                'entities': read_records(work_dir, "entities"),
+                'keywords': read_column(work_dir, "keywords", "keyword")
+            },
+            'charts': charts
+        }
+
+    def load_data(self, work_dir: Path, content_hash: Optional[str] = None,
+                  replace: bool = False) -> Optional[int]:
+        """Load one processed document (transform outputs in ``work_dir``) into the database."""
         try:
-            with open(data_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                
+            data = self.read_processed(work_dir)
+            # Document replaced by this load, whose vectors must leave the index
+            replaced_id = self.document_id_for(content_hash) if replace and content_hash else None
+
+            embeddings = read_embeddings(work_dir)
+            if embeddings is None:
+                logger.warning(f"No embeddings found in {work_dir}, embeddings and vector index not updated")
+
+            # Rows written: the document, its charts and one embedding per sentence
+            rows = 1 + len(data['charts']) + (len(embeddings) if embeddings is not None else 0)
+            with metrics.timer("load.db_insert", items=rows):
+                document_id = self.load_document(data, embeddings, content_hash=content_hash,
+                                                 replace=replace, commit=False)
+
+            # Append sentence embeddings to the persistent vector index before
+            # committing, so a committed document always has its vectors
+            if embeddings is not None:
+                with metrics.timer("load.vector_index", items=len(embeddings)):
+                    self.index_document(document_id, embeddings, data['text_analysis']['sentences'])
+
+            try:
+                self.conn.commit()
+            except Exception:
+                if embeddings is not None:
+                    self.unindex_document(document_id)
+                raise
+            logger.info(f"Data loaded successfully. Document ID: {document_id}")
+
+            if replaced_id is not None and replaced_id != document_id:
+                self.unindex_document(replaced_id)
+            return document_id
+
+        except Exception as e:
+            logger.error(f"Data loading failed: {e}")
+            self.conn.rollback()
+            raise
+
+    def load_many(self, work_dirs: Iterable[Path]) -> Dict[Path, int]:
+        """
+        Load many processed documents over this connection, each in its own
+        transaction. A failed document is rolled back and logged; the rest
+        are still loaded. Returns the document ID of every loaded work directory.
+        """
+        loaded = {}
+        for work_dir in work_dirs:
+            try:
+                loaded[work_dir] = self.load_data(work_dir)
+            except Exception as e:
+                logger.error(f"Skipping {work_dir}: {e}")
+        return loaded
+
+    def load_document(self, data: Dict[str, Any], embeddings: Optional[np.ndarray] = None,
+                      content_hash: Optional[str] = None, replace: bool = False,
+                      commit: bool = True) -> int:
+        """
+        Insert a document, its charts and its sentence embeddings in a single
+        transaction. Charts are inserted with one multi-row statement and
+        embeddings are streamed with COPY. With ``replace``, a document
+        previously loaded from the same source (``content_hash``) is deleted
+        in the same transaction. With ``commit=False`` the transaction is
+        left open for the caller to commit.
+        """
+        sentences = data['text_analysis']['sentences']
+        if embeddings is not None and len(embeddings) != len(sentences):
+            raise ValueError(f"{len(embeddings)} embeddings for {len(sentences)} sentences")
+
+        try:
+            if replace and content_hash:
+                self.cur.execute("""
+                    DELETE FROM documents WHERE content_hash = %s
+                """, (content_hash,))
+
             # Insert document
             self.cur.execute("""
-                INSERT INTO documents (content, entities, keywords)
-                VALUES (%s, %s, %s)
+                INSERT INTO documents (content, entities, keywords, content_hash)
+                VALUES (%s, %s, %s, %s)
                 RETURNING id
             """, (
-                '\n'.join(data['text_analysis']['sentences']),
+                '\n'.join(sentences),
                 Json(data['text_analysis']['entities']),
-                data['text_analysis']['keywords']
+                data['text_analysis']['keywords'],
+                content_hash
             ))
-            
+
             document_id = self.cur.fetchone()[0]
-            
+
             # Insert charts
-            for chart in data['charts']:
-                self.cur.execute("""
-                    INSERT INTO charts (document_id, image_path, confidence, characteristics)
-                    VALUES (%s, %s, %s, %s)
-                """, (
-                    document_id,
-                    chart['image_path'],
-                    chart['confidence'],
-                    Json(chart['characteristics'])
-                ))
-                
-            self.conn.commit()
-            logger.info(f"Data loaded successfully. Document ID: {document_id}")
+            if data['charts']:
+                execute_values(self.cur, """
+                    INSERT INTO charts (document_id, image_path, confidence, characteristics, page_number, bbox)
+                    VALUES %s
+                """, [
+                    (
+                        document_id,
+                        chart['image_path'],
+                        chart['confidence'],
+                        Json(chart['characteristics']),
+                        chart.get('page_number'),
+                        Json(chart['bbox']) if chart.get('bbox') is not None else None
+                    )
+                    for chart in data['charts']
+                ])
+
+            if embeddings is not None:
+                self.copy_embeddings(document_id, sentences, embeddings)
+
+            version = self.bump_data_version()
+            if commit:
+                self.conn.commit()
+                logger.info(f"Data loaded successfully. Document ID: {document_id} (data version {version})")
             return document_id
-            
-        except Exception as e:
-            logger.error(f"Data loading failed: {e}")
+
+        except Exception:
             self.conn.rollback()
             raise
-            
+
+    def copy_embeddings(self, document_id: int, sentences: List[str], embeddings: np.ndarray,
+                        batch_rows: int = 5000):
+        """Stream one row per sentence into the embeddings table with COPY."""
+        encode = pgvector_literal if self.embedding_format == "pgvector" else pack_vector
+        sql = (
+            f"COPY embeddings (document_id, sentence_index, sentence, {self.embedding_column}) "
+            "FROM STDIN WITH (FORMAT csv)"
+        )
+
+        for batch_start in range(0, len(sentences), batch_rows):
+            buffer = io.StringIO()
+            writer = csv.writer(buffer, quoting=csv.QUOTE_ALL)
+            batch_end = min(batch_start + batch_rows, len(sentences))
+            for i in range(batch_start, batch_end):
+                writer.writerow((document_id, i, sentences[i], encode(embeddings[i])))
+            buffer.seek(0)
+            self.cur.copy_expert(sql, buffer)
+
+    def bump_data_version(self) -> int:
+        """
+        Increment the data version and notify API workers so they drop cached
+        responses. Runs inside the load transaction: the notification is only
+        delivered if the new rows commit.
+        """
+        self.cur.execute("""
+            UPDATE data_version SET version = version + 1
+            RETURNING version
+        """)
+        version = self.cur.fetchone()[0]
+        self.cur.execute("SELECT pg_notify(%s, %s)", (INVALIDATION_CHANNEL, str(version)))
+        return version
+
+    def index_document(self, document_id: int, embeddings: np.ndarray, sentences: List[str]):
+        """Add a document's sentence embeddings to the persistent vector index."""
+        try:
+            if len(embeddings) != len(sentences):
+                raise ValueError(
+                    f"{len(embeddings)} embeddings for {len(sentences)} sentences"
+                )
+            index = VectorIndex(VECTOR_INDEX["DIR"], dimension=embeddings.shape[1])
+            index.add(document_id, embeddings, content_offsets(sentences))
+            if index.maybe_upgrade(VECTOR_INDEX["UPGRADE_THRESHOLD"], VECTOR_INDEX["UPGRADE_TYPE"]):
+                logger.info(f"Vector index rebuilt as {index.kind} ({index.ntotal} vectors)")
+            index.save()
+            logger.info(f"Indexed {len(sentences)} sentence vectors for document {document_id}")
+        except Exception as e:
+            logger.error(f"Vector indexing failed for document {document_id}: {e}")
+            raise
+
+    def unindex_document(self, document_id: int):
+        """
+        Remove a deleted document's sentence vectors from the persistent
+        vector index. A failure is only logged: the API ignores hits whose
+        document no longer exists.
+        """
+        try:
+            if not (VECTOR_INDEX["DIR"] / "manifest.json").exists():
+                return
+            index = VectorIndex(VECTOR_INDEX["DIR"])
+            index.remove([document_id])
+            index.save()
+            logger.info(f"Removed the sentence vectors of document {document_id} from the index")
+        except Exception as e:
+            logger.error(f"Could not remove document {document_id} from the vector index: {e}")
+
     def close(self):
         """Close database connection."""
         try:
@@ -120,15 +458,15 @@ class DatabaseLoader:
         except Exception as e:
             logger.error(f"Error closing database connection: {e}")
 
-def main():
-    """Main execution function."""
+def main(work_dir: Optional[Path] = None):
+    """Main execution function; loads ``work_dir`` (default: PROCESSED_DIR)."""
     try:
-        data_path = PROCESSED_DIR / "processed_data.json"
-        if not data_path.exists():
-            raise FileNotFoundError(f"Processed data not found: {data_path}")
+        work_dir = Path(work_dir) if work_dir else PROCESSED_DIR
+        if not table_path(work_dir, "sentences").exists():
+            raise FileNotFoundError(f"Processed data not found in: {work_dir}")
             
         loader = DatabaseLoader()
-        document_id = loader.load_data(data_path)
+        document_id = loader.load_data(work_dir)
         
         if document_id:
             logger.info(f"Document loaded successfully with ID: {document_id}")
@@ -140,4 +478,5 @@ def main():
         raise
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
+    metrics.write_summary(PROCESSED_DIR / "load_metrics.json")
\ No newline at end of file
@@ -8,6 +8,7 @@ def setup_logger(name: str) -> logging.Logger:
     """Set up a logger with file and console handlers."""
     logger = logging.getLogger(name)
     logger.setLevel(logging.INFO)
+    LOG_DIR.mkdir(parents=True, exist_ok=True)
 
     # Create formatters
     file_formatter = logging.Formatter(
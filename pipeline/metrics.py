@@ -0,0 +1,320 @@
+"""
+Timers, counters and latency histograms shared by the pipeline and the API.
+
+Pipeline stages time their sub-steps (rasterize, OCR, chart detection, spaCy,
+encoding, DB insert) with ``metrics.timer`` and count the items they handle,
+so a run summary reports seconds, items/sec, cache hit rates and peak RSS per
+step. The API records request latencies in histograms and serves everything
+in the Prometheus text format.
+
+This module has no dependency on config.py so the backend can import it as
+``pipeline.metrics``.
+
+Profiling hooks (``profiled``) are controlled by ``PIPELINE_PROFILE``:
+
+- ``cprofile``: run the block under cProfile and dump ``<name>.prof``
+- ``py-spy``:   attach ``py-spy record`` (must be on PATH) to this process and
+                write a ``<name>.speedscope.json`` sampling profile
+"""
+import cProfile
+import json
+import os
+import re
+import shutil
+import signal
+import subprocess
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Upper bounds (seconds) of the request latency histogram buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def peak_rss_bytes() -> Dict[str, Optional[int]]:
+    """Peak resident set size of this process and of its largest child (OCR workers)."""
+    if resource is None:
+        return {"self": None, "children": None}
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    scale = 1 if sys.platform == "darwin" else 1024
+    return {
+        "self": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale,
+        "children": resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * scale,
+    }
+
+
+def _metric_name(name: str) -> str:
+    return re.sub(r"[^a-zA-Z0-9_]", "_", name)
+
+
+def _label_string(labels: Tuple[Tuple[str, str], ...]) -> str:
+    if not labels:
+        return ""
+    pairs = []
+    for key, value in labels:
+        value = str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        pairs.append(f'{key}="{value}"')
+    return "{" + ",".join(pairs) + "}"
+
+
+class _Timing:
+    """Handle yielded by ``Metrics.timer``; set ``items`` to what the block processed."""
+
+    __slots__ = ("items",)
+
+    def __init__(self, items: int = 0):
+        self.items = items
+
+
+class Histogram:
+    """Cumulative-bucket histogram with labels, rendered in the Prometheus format."""
+
+    def __init__(self, name: str, documentation: str, buckets: Iterable[float] = LATENCY_BUCKETS):
+        self.name = _metric_name(name)
+        self.documentation = documentation
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        # labels -> [bucket counts..., +Inf count], sum
+        self._series: Dict[Tuple[Tuple[str, str], ...], List[Any]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            counts = series[0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+            counts[-1] += 1
+            series[1] += value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = [(key, list(counts), total) for key, (counts, total) in self._series.items()]
+        for key, counts, total in sorted(series):
+            for bound, count in zip(self.buckets, counts):
+                bucket_labels = key + (("le", repr(float(bound))),)
+                lines.append(f"{self.name}_bucket{_label_string(bucket_labels)} {count}")
+            lines.append(f"{self.name}_bucket{_label_string(key + (('le', '+Inf'),))} {counts[-1]}")
+            lines.append(f"{self.name}_sum{_label_string(key)} {total}")
+            lines.append(f"{self.name}_count{_label_string(key)} {counts[-1]}")
+        return lines
+
+
+class Metrics:
+    """Thread-safe registry of named timers, counters and histograms."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._timers: Dict[str, Dict[str, float]] = {}
+        self._counters: Dict[str, float] = {}
+        self._histograms: Dict[str, Histogram] = {}
+        self._started = time.time()
+
+    def observe(self, name: str, seconds: float, items: int = 0) -> None:
+        """Record one timed call of ``name`` that processed ``items`` items."""
+        with self._lock:
+            timer = self._timers.get(name)
+            if timer is None:
+                timer = self._timers[name] = {"calls": 0, "seconds": 0.0, "max_seconds": 0.0, "items": 0}
+            timer["calls"] += 1
+            timer["seconds"] += seconds
+            timer["max_seconds"] = max(timer["max_seconds"], seconds)
+            timer["items"] += items
+
+    @contextmanager
+    def timer(self, name: str, items: int = 0) -> Iterator[_Timing]:
+        """
+        Time a block. The item count (pages, sentences, rows) can be given up
+        front or set on the yielded handle once known::
+
+            with metrics.timer("transform.encode") as timing:
+                embeddings = encoder.encode(sentences)
+                timing.items = len(sentences)
+        """
+        timing = _Timing(items)
+        start = time.perf_counter()
+        try:
+            yield timing
+        finally:
+            self.observe(name, time.perf_counter() - start, timing.items)
+
+    def timed_iter(self, name: str, iterable: Iterable[Any]) -> Iterator[Any]:
+        """
+        Yield from ``iterable``, timing each step as one item of ``name``.
+        In a streaming pipeline this includes the time spent in upstream
+        generators.
+        """
+        iterator = iter(iterable)
+        while True:
+            start = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            self.observe(name, time.perf_counter() - start, 1)
+            yield item
+
+    def increment(self, name: str, value: float = 1) -> None:
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def record_cache(self, name: str, hits: int, misses: int) -> None:
+        """Add cache lookups; reported as ``<name>.hits``, ``<name>.misses`` and a hit rate."""
+        self.increment(f"{name}.hits", hits)
+        self.increment(f"{name}.misses", misses)
+
+    def histogram(self, name: str, documentation: str,
+                  buckets: Iterable[float] = LATENCY_BUCKETS) -> Histogram:
+        """Get or create a histogram exported on the Prometheus endpoint."""
+        with self._lock:
+            histogram = self._histograms.get(name)
+            if histogram is None:
+                histogram = self._histograms[name] = Histogram(name, documentation, buckets)
+            return histogram
+
+    def hit_rates(self) -> Dict[str, float]:
+        with self._lock:
+            counters = dict(self._counters)
+        rates = {}
+        for key, hits in counters.items():
+            if not key.endswith(".hits"):
+                continue
+            name = key[:-len(".hits")]
+            lookups = hits + counters.get(f"{name}.misses", 0)
+            rates[name] = hits / lookups if lookups else 0.0
+        return rates
+
+    def summary(self) -> Dict[str, Any]:
+        """Timers (with items/sec), counters, cache hit rates and peak RSS."""
+        with self._lock:
+            timers = {name: dict(timer) for name, timer in self._timers.items()}
+            counters = dict(self._counters)
+        for timer in timers.values():
+            seconds = timer["seconds"]
+            timer["seconds"] = round(seconds, 4)
+            timer["max_seconds"] = round(timer["max_seconds"], 4)
+            timer["items_per_sec"] = round(timer["items"] / seconds, 2) if seconds and timer["items"] else None
+        return {
+            "started_at": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(self._started)),
+            "wall_seconds": round(time.time() - self._started, 2),
+            "timers": dict(sorted(timers.items())),
+            "counters": dict(sorted(counters.items())),
+            "cache_hit_rates": self.hit_rates(),
+            "peak_rss_bytes": peak_rss_bytes(),
+        }
+
+    def write_summary(self, path: Path, **extra: Any) -> Path:
+        """Write the run summary (plus ``extra`` fields) as JSON."""
+        path = Path(path)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({**extra, **self.summary()}, f, indent=4)
+        return path
+
+    def render_prometheus(self, prefix: str = "") -> str:
+        """All metrics in the Prometheus text exposition format."""
+        with self._lock:
+            timers = {name: dict(timer) for name, timer in self._timers.items()}
+            counters = dict(self._counters)
+            histograms = list(self._histograms.values())
+
+        lines = []
+        for histogram in histograms:
+            lines.extend(histogram.render())
+
+        if timers:
+            name = _metric_name(f"{prefix}step_seconds")
+            lines += [f"# HELP {name} Time spent in an instrumented step", f"# TYPE {name} summary"]
+            for step, timer in sorted(timers.items()):
+                labels = _label_string((("step", step),))
+                lines.append(f"{name}_sum{labels} {timer['seconds']}")
+                lines.append(f"{name}_count{labels} {timer['calls']}")
+            name = _metric_name(f"{prefix}step_items_total")
+            lines += [f"# HELP {name} Items processed by an instrumented step", f"# TYPE {name} counter"]
+            for step, timer in sorted(timers.items()):
+                lines.append(f"{name}{_label_string((('step', step),))} {timer['items']}")
+
+        for counter, value in sorted(counters.items()):
+            name = _metric_name(f"{prefix}{counter}_total")
+            lines += [f"# TYPE {name} counter", f"{name} {value}"]
+
+        rss = peak_rss_bytes()["self"]
+        if rss is not None:
+            name = _metric_name(f"{prefix}process_peak_rss_bytes")
+            lines += [f"# HELP {name} Peak resident set size", f"# TYPE {name} gauge", f"{name} {rss}"]
+        return "\n".join(lines) + "\n"
+
+    def reset(self) -> None:
+        with self._lock:
+            self._timers.clear()
+            self._counters.clear()
+            self._started = time.time()
+
+
+_cprofile_lock = threading.Lock()
+
+
+@contextmanager
+def profiled(name: str, output_dir: Path, mode: Optional[str] = None) -> Iterator[None]:
+    """
+    Profile a block if ``mode`` (default: env PIPELINE_PROFILE) is
+    ``cprofile`` or ``py-spy``; otherwise a no-op. In cprofile mode, a block
+    entered while another is being profiled is counted as
+    ``profile.skipped`` and runs unprofiled.
+    """
+    mode = (mode if mode is not None else os.getenv("PIPELINE_PROFILE", "")).lower()
+    output_dir = Path(output_dir)
+
+    if mode == "cprofile":
+        # Only one cProfile can be active per process: when batch workers
+        # overlap, the blocks started while another is profiled run unprofiled
+        if not _cprofile_lock.acquire(blocking=False):
+            metrics.increment("profile.skipped")
+            yield
+            return
+        try:
+            profiler = cProfile.Profile()
+            try:
+                profiler.enable()
+            except ValueError:  # a profiler was enabled outside this hook
+                metrics.increment("profile.skipped")
+                yield
+                return
+            try:
+                yield
+            finally:
+                profiler.disable()
+                profiler.dump_stats(str(output_dir / f"{name}.prof"))
+        finally:
+            _cprofile_lock.release()
+        return
+
+    if mode == "py-spy" and shutil.which("py-spy"):
+        sampler = subprocess.Popen([
+            "py-spy", "record", "--pid", str(os.getpid()), "--subprocesses",
+            "--format", "speedscope", "--output", str(output_dir / f"{name}.speedscope.json"),
+        ])
+        try:
+            yield
+        finally:
+            # py-spy writes its output when interrupted
+            sampler.send_signal(signal.SIGINT)
+            sampler.wait()
+        return
+
+    yield
+
+
+# Shared registry for this process
+metrics = Metrics()
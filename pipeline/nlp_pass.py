@@ -0,0 +1,212 @@
+"""
+Single spaCy pass shared by the extract and transform stages.
+
+spaCy itself is imported on first use, so importing this module (and the
+stages that use it) does not pay for loading spaCy.
+"""
+import hashlib
+import json
+import threading
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from config import SPACY_MODEL, SPACY_PIPE
+
+if TYPE_CHECKING:
+    from spacy.tokens import Doc
+
+# File name of the serialized parse inside the processed directory
+NLP_ARTIFACT = "nlp_docs.spacy"
+
+# Only what the downstream stages read: sentence boundaries and entities
+# (ORTH and SPACY are always stored by DocBin)
+DOCBIN_ATTRS = ["SENT_START", "ENT_IOB", "ENT_TYPE"]
+
+_nlp = None
+_vocab = None
+_lock = threading.Lock()
+
+
+def get_nlp():
+    """Load the spaCy pipeline once per process (thread-safe)."""
+    global _nlp
+    if _nlp is None:
+        with _lock:
+            if _nlp is None:
+                import spacy
+                _nlp = spacy.load(SPACY_MODEL)
+    return _nlp
+
+
+def _get_vocab():
+    """
+    Vocab for deserializing docs. A blank pipeline of the model's language is
+    enough (lexical attributes such as is_stop come from the language
+    defaults), so readers never load the statistical model.
+    """
+    global _vocab
+    if _vocab is None:
+        with _lock:
+            if _vocab is None:
+                import spacy
+                _vocab = spacy.blank(SPACY_MODEL.split("_")[0]).vocab
+    return _vocab
+
+
+def _text_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def split_into_chunks(text: str, max_chars: Optional[int] = None) -> Iterator[Tuple[int, str]]:
+    """
+    Split text into contiguous chunks of at most ``max_chars`` characters.
+
+    Cuts prefer page breaks (blank lines), then line breaks, then spaces, so
+    sentences are rarely split.  Yields (offset, chunk) where ``offset`` is
+    the chunk's position in the full text.
+    """
+    max_chars = max_chars or SPACY_PIPE["CHUNK_CHARS"]
+    start, length = 0, len(text)
+
+    while start < length:
+        end = min(start + max_chars, length)
+        if end < length:
+            for separator in ("\n\n", "\n", " "):
+                cut = text.rfind(separator, start, end)
+                if cut > start:
+                    end = cut + len(separator)
+                    break
+        yield start, text[start:end]
+        start = end
+
+
+def iter_docs(text: str) -> Iterator["Doc"]:
+    """
+    Parse text chunk by chunk with nlp.pipe.
+
+    Each doc records its chunk's character offset in ``user_data["offset"]``
+    so results can be mapped back to document-level positions.  Only one
+    batch of chunks is held in memory at a time.
+    """
+    docs = get_nlp().pipe(
+        ((chunk, offset) for offset, chunk in split_into_chunks(text)),
+        as_tuples=True,
+        batch_size=SPACY_PIPE["BATCH_SIZE"],
+        n_process=SPACY_PIPE["N_PROCESS"],
+        disable=SPACY_PIPE["DISABLE"],
+    )
+    for doc, offset in docs:
+        doc.user_data["offset"] = offset
+        yield doc
+
+
+def parse_text(text: str) -> List["Doc"]:
+    """Run spaCy over the text; returns the parsed chunk docs."""
+    return list(iter_docs(text))
+
+
+def _meta_path(path: Path) -> Path:
+    return Path(path).with_suffix(".json")
+
+
+def save_docs(docs: Iterable["Doc"], path: Path, text: str) -> None:
+    """
+    Serialize parsed docs to a compact DocBin file.
+
+    A small sidecar records the hash of the parsed text so readers can tell
+    whether the artifact belongs to the document they are processing.
+    """
+    from spacy.tokens import DocBin
+
+    doc_bin = DocBin(attrs=DOCBIN_ATTRS, store_user_data=True)
+    for doc in docs:
+        doc_bin.add(doc)
+    doc_bin.to_disk(path)
+
+    with open(_meta_path(path), "w", encoding="utf-8") as f:
+        json.dump({"text_sha256": _text_hash(text), "docs": len(doc_bin)}, f)
+
+
+def parse_to_artifact(text: str, path: Optional[Path] = None) -> List[Dict[str, Any]]:
+    """
+    Parse text once, save the parse to ``path`` (if given) and return the
+    named entities.  Docs are consumed one chunk at a time.
+    """
+    entities = []
+
+    def collect(docs):
+        for doc in docs:
+            entities.extend(extract_entities([doc]))
+            yield doc
+
+    if path is None:
+        for _ in collect(iter_docs(text)):
+            pass
+    else:
+        save_docs(collect(iter_docs(text)), path, text)
+    return entities
+
+
+def load_docs(path: Path, text: Optional[str] = None) -> Optional[Iterator["Doc"]]:
+    """
+    Load docs saved by save_docs as a lazy iterator.
+
+    If ``text`` is given, the docs are only returned when they were parsed
+    from exactly that text, so a stale artifact is never used for a
+    different document.
+    """
+    path = Path(path)
+    if not path.exists():
+        return None
+
+    if text is not None:
+        try:
+            with open(_meta_path(path), "r", encoding="utf-8") as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if meta.get("text_sha256") != _text_hash(text):
+            return None
+
+    from spacy.tokens import DocBin
+
+    return DocBin().from_disk(path).get_docs(_get_vocab())
+
+
+def extract_entities(docs: Iterable["Doc"]) -> List[Dict[str, Any]]:
+    """All named entities with document-level character offsets."""
+    entities = []
+    for doc in docs:
+        offset = doc.user_data.get("offset", 0)
+        for ent in doc.ents:
+            entities.append({
+                'text': ent.text,
+                'label': ent.label_,
+                'start': offset + ent.start_char,
+                'end': offset + ent.end_char
+            })
+    return entities
+
+
+def analyze_docs(docs: Iterable["Doc"]) -> Dict[str, Any]:
+    """Sentences (with document-level offsets), entities and keywords from parsed docs."""
+    sentences, sentence_offsets, entities, keywords = [], [], [], []
+
+    for doc in docs:
+        offset = doc.user_data.get("offset", 0)
+        for sent in doc.sents:
+            stripped = sent.text.strip()
+            if not stripped:
+                continue
+            start = offset + sent.start_char + (len(sent.text) - len(sent.text.lstrip()))
+            sentences.append(stripped)
+            sentence_offsets.append([start, start + len(stripped)])
+        entities.extend({'text': ent.text, 'label': ent.label_} for ent in doc.ents)
+        keywords.extend(token.text for token in doc if token.is_alpha and not token.is_stop)
+
+    return {
+        'sentences': sentences,
+        'sentence_offsets': sentence_offsets,
+        'entities': entities,
+        'keywords': keywords
+    }
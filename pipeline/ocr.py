@@ -0,0 +1,180 @@
+"""Page-parallel OCR engine backed by a pool of PaddleOCR workers."""
+import multiprocessing
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from config import (
+    OCR_LANG,
+    OCR_USE_ANGLE_CLS,
+    OCR_WORKERS,
+    OCR_CHUNK_SIZE,
+    OCR_CPU_THREADS,
+)
+
+NO_TEXT_PLACEHOLDER = "[No text detected]"
+
+# Workers are spawned rather than forked: forking copies the locks of the
+# caller's running threads (such as the image writer) into the child
+_MP_CONTEXT = multiprocessing.get_context("spawn")
+
+# PaddleOCR instance owned by the current process (one per pool worker)
+_ocr = None
+
+
+def _create_ocr():
+    """Create a PaddleOCR instance with the configured settings."""
+    from paddleocr import PaddleOCR
+
+    return PaddleOCR(
+        use_angle_cls=OCR_USE_ANGLE_CLS,
+        lang=OCR_LANG,
+        cpu_threads=OCR_CPU_THREADS,
+        show_log=False,
+    )
+
+
+def _init_worker():
+    """Load PaddleOCR once when a pool worker starts."""
+    global _ocr
+    # Keep the math libraries from oversubscribing the cores shared by the pool.
+    # A spawned worker has not imported paddle yet, so these still take effect.
+    for var in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"):
+        os.environ.setdefault(var, str(OCR_CPU_THREADS))
+    _ocr = _create_ocr()
+
+
+def parse_result(result: Any) -> Dict[str, Any]:
+    """Convert a raw PaddleOCR result into page text and word boxes."""
+    if not result or not result[0]:
+        return {"text": NO_TEXT_PLACEHOLDER, "words": []}
+
+    lines, words = [], []
+    for line in result:
+        line_words = [word for word in line if len(word) > 1]
+        lines.append(" ".join(word[1][0] for word in line_words))
+        for word in line_words:
+            words.append({
+                "text": word[1][0],
+                "confidence": float(word[1][1]),
+                "box": [[float(x), float(y)] for x, y in word[0]],
+            })
+
+    return {"text": "\n".join(lines), "words": words}
+
+
+def ocr_page(page: Any) -> Dict[str, Any]:
+    """OCR a single page (image path or image array) in the current process."""
+    global _ocr
+    if _ocr is None:
+        _ocr = _create_ocr()
+    if isinstance(page, os.PathLike):
+        page = str(page)
+    return parse_result(_ocr.ocr(page, cls=OCR_USE_ANGLE_CLS))
+
+
+def ocr_chunk(pages: List[Any]) -> List[Dict[str, Any]]:
+    """OCR a chunk of pages inside a pool worker."""
+    return [ocr_page(page) for page in pages]
+
+
+def _chunked(items: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    """Group an iterable into lists of at most ``size`` items."""
+    iterator = iter(items)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def iter_ocr_pages(
+    pages: Iterable[Any],
+    workers: Optional[int] = None,
+    chunksize: Optional[int] = None,
+) -> Iterator[Dict[str, Any]]:
+    """
+    OCR a stream of pages across a process pool, yielding results in page order.
+
+    Pages are pulled from ``pages`` only as workers free up (at most two
+    chunks per worker are in flight), so a lazily rasterized document is
+    never held in memory as a whole.  With a single worker the pages are
+    processed in the current process, which avoids the pool start-up cost.
+    """
+    workers = OCR_WORKERS if workers is None else workers
+    chunksize = max(1, OCR_CHUNK_SIZE if chunksize is None else chunksize)
+
+    if workers <= 1:
+        for page in pages:
+            yield ocr_page(page)
+        return
+
+    max_in_flight = workers * 2
+    with ProcessPoolExecutor(
+        max_workers=workers, mp_context=_MP_CONTEXT, initializer=_init_worker
+    ) as executor:
+        pending = deque()
+        for chunk in _chunked(pages, chunksize):
+            pending.append(executor.submit(ocr_chunk, chunk))
+            if len(pending) >= max_in_flight:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+
+def iter_cached_ocr_pages(
+    pages: Iterable[Any],
+    cache: Any,
+    workers: Optional[int] = None,
+    chunksize: Optional[int] = None,
+    counts: Optional[Dict[str, int]] = None,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Like iter_ocr_pages, but serve pages from ``cache`` when possible.
+
+    Only cache misses are sent to the worker pool; hits are interleaved back
+    so results are still yielded in page order. The lookups of this call are
+    added to ``counts["hits"]`` and ``counts["misses"]`` (the cache's own
+    counters are shared by every caller in the process).
+    """
+    if counts is None:
+        counts = {}
+    counts.setdefault("hits", 0)
+    counts.setdefault("misses", 0)
+    # (key, cached result or None) for every page pulled so far, in page order
+    lookups = deque()
+
+    def misses():
+        for page in pages:
+            key = cache.key_for(page)
+            result = cache.get(key)
+            lookups.append((key, result))
+            if result is None:
+                counts["misses"] += 1
+                yield page
+            else:
+                counts["hits"] += 1
+
+    for result in iter_ocr_pages(misses(), workers=workers, chunksize=chunksize):
+        while lookups[0][1] is not None:
+            yield lookups.popleft()[1]
+        key, _ = lookups.popleft()
+        cache.put(key, result)
+        yield result
+
+    while lookups:
+        yield lookups.popleft()[1]
+
+
+def ocr_pages(
+    pages: Iterable[Any],
+    workers: Optional[int] = None,
+    chunksize: Optional[int] = None,
+    cache: Any = None,
+) -> List[Dict[str, Any]]:
+    """OCR pages across a process pool and return the results in page order."""
+    if cache is not None:
+        return list(iter_cached_ocr_pages(pages, cache, workers=workers, chunksize=chunksize))
+    return list(iter_ocr_pages(pages, workers=workers, chunksize=chunksize))
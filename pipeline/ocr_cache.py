@@ -0,0 +1,135 @@
+"""Content-addressed on-disk cache for OCR results."""
+import hashlib
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+from config import CACHE_DIR, OCR_CACHE, OCR_LANG, OCR_USE_ANGLE_CLS, PDF_DPI
+
+# Bump when the cached payload layout changes so stale entries are ignored
+CACHE_FORMAT_VERSION = 1
+
+
+class OCRCache:
+    """
+    Cache OCR results (page text and word boxes) keyed by page content.
+
+    The key is a hash of the rendered page plus every setting that changes
+    the OCR output, so an unchanged page costs one hash and one file read.
+    Entries are evicted least-recently-used first (by file mtime, refreshed
+    on every hit) once the cache grows past ``max_bytes``.
+    """
+
+    def __init__(self, cache_dir: Path, max_bytes: int):
+        """Initialize the cache directory and size accounting."""
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.settings = f"v{CACHE_FORMAT_VERSION}|{OCR_LANG}|{OCR_USE_ANGLE_CLS}|{PDF_DPI}"
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._size = sum(path.stat().st_size for path in self.cache_dir.glob("*/*.json"))
+
+    def key_for(self, page: Any) -> str:
+        """Hash a rendered page (image array or image file) with the OCR settings."""
+        digest = hashlib.blake2b(self.settings.encode(), digest_size=20)
+        if isinstance(page, np.ndarray):
+            digest.update(str(page.shape).encode())
+            digest.update(np.ascontiguousarray(page).data)
+        else:
+            with open(page, "rb") as f:
+                for block in iter(lambda: f.read(1 << 20), b""):
+                    digest.update(block)
+        return digest.hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / key[:2] / f"{key}.json"
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the cached result for ``key``, or None on a miss."""
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                result = json.load(f)
+            os.utime(path)
+        except (OSError, ValueError):
+            with self._lock:
+                self.misses += 1
+            return None
+
+        with self._lock:
+            self.hits += 1
+        return result
+
+    def put(self, key: str, result: Dict[str, Any]) -> None:
+        """Store a result and evict old entries if the byte budget is exceeded."""
+        path = self._path(key)
+        path.parent.mkdir(exist_ok=True)
+        payload = json.dumps(result, ensure_ascii=False).encode("utf-8")
+
+        tmp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(payload)
+        previous = path.stat().st_size if path.exists() else 0
+        os.replace(tmp_path, path)
+
+        with self._lock:
+            self._size += len(payload) - previous
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def _evict(self) -> None:
+        """Delete least-recently-used entries until the cache fits its budget."""
+        entries = []
+        for path in self.cache_dir.glob("*/*.json"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        entries.sort()
+        self._size = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if self._size <= self.max_bytes:
+                break
+            try:
+                path.unlink()
+            except OSError:
+                continue
+            self._size -= size
+            self.evictions += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters and the current cache size."""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "size_bytes": self._size,
+        }
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_ocr_cache() -> Optional[OCRCache]:
+    """Return the process-wide OCR cache, or None if caching is disabled (thread-safe)."""
+    global _default_cache
+    if not OCR_CACHE["ENABLED"]:
+        return None
+    if _default_cache is None:
+        with _default_cache_lock:
+            if _default_cache is None:
+                _default_cache = OCRCache(CACHE_DIR / "ocr", OCR_CACHE["MAX_BYTES"])
+    return _default_cache
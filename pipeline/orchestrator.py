@@ -0,0 +1,258 @@
+"""
+Stage orchestration with fingerprinted checkpoints.
+
+Every document work directory holds a ``checkpoints.json`` recording, per
+stage, a fingerprint of what the stage consumed (input file contents plus
+the configuration that affects its output) and the size/mtime of what it
+produced. A stage is skipped while its fingerprint is unchanged and its
+outputs are intact, so re-running a failed batch resumes after the last good
+stage instead of repeating OCR. Because fingerprints hash input *contents*,
+a re-run stage whose outputs come out identical does not invalidate the
+stages after it.
+
+Used by the local batch runner (pipeline/batch.py) and the Airflow DAG
+(airflow/dag.py).
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+import config
+from artifacts import EMBEDDINGS_FILE, PROCESSED_CHARTS
+from logger import setup_logger
+from metrics import metrics, profiled
+from nlp_pass import NLP_ARTIFACT
+
+# Setup logging
+logger = setup_logger("orchestrator")
+
+# Bump when a stage's code changes what it writes, to invalidate checkpoints
+STAGE_VERSIONS = {"extract": 2, "transform": 2, "load": 2}
+
+CHECKPOINT_FILE = "checkpoints.json"
+
+# Files handed from transform to load
+TRANSFORM_OUTPUTS = [
+    "sentences.parquet", "entities.parquet", "keywords.parquet", PROCESSED_CHARTS, EMBEDDINGS_FILE,
+]
+
+
+def file_digest(path: Path, chunk_size: int = 1024 * 1024) -> str:
+    """SHA-256 of a file's contents."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _file_state(path: Path) -> Dict[str, int]:
+    stat = Path(path).stat()
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+class Stage:
+    """A pipeline stage: its input and output files and the config it depends on."""
+
+    def __init__(self, name: str, inputs: Callable[["DocumentPipeline"], List[Path]],
+                 outputs: List[str], config_keys: List[str]):
+        self.name = name
+        self.inputs = inputs
+        self.outputs = outputs
+        self.config_keys = config_keys
+
+    def config(self) -> Dict[str, Any]:
+        """Configuration values that affect this stage's output."""
+        values = {key: getattr(config, key) for key in self.config_keys}
+        if "CHART_DETECTION" in values:
+            # Thread count does not change results
+            values["CHART_DETECTION"] = {
+                key: value for key, value in values["CHART_DETECTION"].items() if key != "WORKERS"
+            }
+        return values
+
+    def fingerprint(self, pipeline: "DocumentPipeline") -> str:
+        """Hash of stage version, config and input file contents."""
+        payload = {
+            "stage": self.name,
+            "version": STAGE_VERSIONS[self.name],
+            "config": self.config(),
+            "inputs": {Path(path).name: file_digest(path) for path in self.inputs(pipeline)},
+        }
+        encoded = json.dumps(payload, sort_keys=True, default=str).encode("utf-8")
+        return hashlib.sha256(encoded).hexdigest()
+
+
+STAGES = [
+    Stage(
+        "extract",
+        inputs=lambda pipeline: [pipeline.source],
+        outputs=["pages.parquet", "named_entities.parquet", "chart_detection.json", NLP_ARTIFACT],
+        config_keys=[
+            "PDF_DPI", "OCR_LANG", "OCR_USE_ANGLE_CLS", "TEXT_LAYER", "CHART_DETECTION",
+            "CHART_DETECTION_MODE", "CHART_REGIONS", "SPACY_MODEL", "SPACY_PIPE",
+        ],
+    ),
+    Stage(
+        "transform",
+        inputs=lambda pipeline: [
+            pipeline.work_dir / name
+            for name in ("pages.parquet", "chart_detection.json", NLP_ARTIFACT)
+        ],
+        outputs=TRANSFORM_OUTPUTS,
+        config_keys=["BERT_MODEL"],
+    ),
+    Stage(
+        "load",
+        inputs=lambda pipeline: [pipeline.work_dir / name for name in TRANSFORM_OUTPUTS],
+        outputs=[],
+        config_keys=[],
+    ),
+]
+STAGE_NAMES = [stage.name for stage in STAGES]
+
+
+class Checkpoints:
+    """Per-document checkpoint file, written atomically after every stage."""
+
+    def __init__(self, work_dir: Path):
+        self.path = Path(work_dir) / CHECKPOINT_FILE
+        self._lock = threading.Lock()
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                self.data = json.load(f)
+        except (OSError, ValueError):
+            self.data = {}
+
+    def get(self, stage: str) -> Optional[Dict[str, Any]]:
+        return self.data.get(stage)
+
+    def record(self, stage: str, entry: Dict[str, Any]) -> None:
+        with self._lock:
+            self.data[stage] = entry
+            tmp_path = self.path.with_suffix(".json.tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self.data, f, indent=4)
+            os.replace(tmp_path, self.path)
+
+
+class DocumentPipeline:
+    """Run the stages for one document in its work directory, skipping valid checkpoints."""
+
+    def __init__(self, source: Path, work_dir: Path, content_hash: Optional[str] = None,
+                 loader=None, load_lock: Optional[threading.Lock] = None,
+                 ocr_workers: Optional[int] = None, force: bool = False):
+        """
+        Initialize the pipeline.
+
+        ``loader`` is a shared DatabaseLoader (a new one is opened for the load
+        stage otherwise) and ``load_lock`` serializes loads that share it.
+        ``force`` re-runs every stage regardless of checkpoints.
+        """
+        self.source = Path(source)
+        self.work_dir = Path(work_dir)
+        self.work_dir.mkdir(parents=True, exist_ok=True)
+        self.content_hash = content_hash
+        self.loader = loader
+        self.load_lock = load_lock or threading.Lock()
+        self.ocr_workers = ocr_workers
+        self.force = force
+        self.checkpoints = Checkpoints(self.work_dir)
+
+    def is_valid(self, stage: Stage, fingerprint: str) -> bool:
+        """True if the stage already ran on these inputs and its outputs are intact."""
+        entry = self.checkpoints.get(stage.name)
+        if self.force or not entry or entry.get("fingerprint") != fingerprint:
+            return False
+        for name, state in entry.get("outputs", {}).items():
+            path = self.work_dir / name
+            if not path.exists() or _file_state(path) != state:
+                return False
+        return True
+
+    @contextmanager
+    def _database(self):
+        """The shared loader (serialized by ``load_lock``), or a new one for this call."""
+        with self.load_lock:
+            if self.loader is not None:
+                yield self.loader
+                return
+            from load import DatabaseLoader
+            loader = DatabaseLoader()
+            try:
+                yield loader
+            finally:
+                loader.close()
+
+    def loaded_entry(self, entry: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        A load checkpoint entry if its document is still in the database
+        (with the document's current ID), otherwise None. The checkpoint
+        only fingerprints files, so a deleted row or a reset database would
+        otherwise go unnoticed. Without a content hash the row cannot be
+        looked up and the checkpoint is trusted.
+        """
+        if not self.content_hash:
+            return entry
+        with self._database() as loader:
+            document_id = loader.document_id_for(self.content_hash)
+        if document_id is None:
+            return None
+        return {**entry, "result": {**entry.get("result", {}), "document_id": document_id}}
+
+    def _execute(self, name: str) -> Dict[str, Any]:
+        if name == "extract":
+            import extract
+            extract.main(self.source, self.work_dir, ocr_workers=self.ocr_workers)
+            return {}
+        if name == "transform":
+            import transform
+            transform.main(self.work_dir)
+            return {}
+
+        with self._database() as loader:
+            document_id = loader.load_data(
+                self.work_dir,
+                content_hash=self.content_hash,
+                replace=self.force
+            )
+        return {"document_id": document_id}
+
+    def run_stage(self, name: str) -> Dict[str, Any]:
+        """Run one stage unless its checkpoint is valid; returns its checkpoint entry."""
+        stage = STAGES[STAGE_NAMES.index(name)]
+        fingerprint = stage.fingerprint(self)
+        entry = self.checkpoints.get(name) if self.is_valid(stage, fingerprint) else None
+        if entry is not None and name == "load":
+            entry = self.loaded_entry(entry)
+            if entry is None:
+                logger.info(f"{self.source.name}: document no longer in the database, loading again")
+        if entry is not None:
+            logger.info(f"{self.source.name}: {name} up to date, skipped")
+            metrics.increment(f"stage.{name}.skipped")
+            return {**entry, "skipped": True}
+
+        start = time.perf_counter()
+        with profiled(name, self.work_dir):
+            result = self._execute(name)
+        seconds = time.perf_counter() - start
+        metrics.observe(f"stage.{name}", seconds, 1)
+        entry = {
+            "fingerprint": fingerprint,
+            "outputs": {output: _file_state(self.work_dir / output) for output in stage.outputs},
+            "result": result,
+            "seconds": round(seconds, 2),
+            "completed_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        }
+        self.checkpoints.record(name, entry)
+        logger.info(f"{self.source.name}: {name} done in {entry['seconds']}s")
+        return {**entry, "skipped": False}
+
+    def run(self, stages: Optional[List[str]] = None) -> Dict[str, Dict[str, Any]]:
+        """Run ``stages`` (default: all) in order; stops at the first failure."""
+        return {name: self.run_stage(name) for name in (stages or STAGE_NAMES)}
@@ -1,57 +1,83 @@
 import json
 from pathlib import Path
-from typing import Dict, List, Tuple, Any
+from typing import Dict, List, Tuple, Any, Optional, Iterable
 
 import numpy as np
-import spacy
-from sentence_transformers import SentenceTransformer
-import faiss
 
-from config import PROCESSED_DIR, SPACY_MODEL, BERT_MODEL
+from artifacts import (
+    PROCESSED_CHARTS, read_document_text, write_embeddings, write_entities, write_keywords, write_sentences,
+)
+from config import PROCESSED_DIR, BERT_MODEL, EMBEDDING_CACHE
+from embeddings import SentenceEncoder, get_embedding_store, get_sentence_model
 from logger import setup_logger
+from metrics import metrics
+from nlp_pass import NLP_ARTIFACT, iter_docs, load_docs, analyze_docs
 
 # Setup logging
 logger = setup_logger("transform")
 
-# Load models
-try:
-    nlp = spacy.load(SPACY_MODEL)
-    model = SentenceTransformer(BERT_MODEL)
-    logger.info(f"Loaded models: SpaCy ({SPACY_MODEL}), BERT ({BERT_MODEL})")
-except Exception as e:
-    logger.error(f"Failed to load models: {e}")
-    raise
-
 class DataTransformer:
     """Transform and process extracted data."""
     
     def __init__(self):
-        """Initialize the transformer."""
-        self.nlp = nlp
+        """
+        Initialize the transformer. The sentence model is loaded on first use
+        (spaCy only if the shared NLP artifact is missing).
+        """
+        try:
+            model = get_sentence_model(BERT_MODEL)
+            logger.info(f"Loaded model: BERT ({BERT_MODEL})")
+        except Exception as e:
+            logger.error(f"Failed to load models: {e}")
+            raise
         self.model = model
+        store = None
+        if EMBEDDING_CACHE["ENABLED"]:
+            store = get_embedding_store(
+                EMBEDDING_CACHE["DIR"] / BERT_MODEL,
+                model.get_sentence_embedding_dimension()
+            )
+        self.encoder = SentenceEncoder(
+            model, BERT_MODEL, store=store, batch_size=EMBEDDING_CACHE["BATCH_SIZE"]
+        )
         
-    def process_text(self, text: str) -> Dict[str, Any]:
-        """Process text with NLP and generate embeddings."""
+    def process_text(self, text: str, docs: Optional[Iterable[Any]] = None) -> Dict[str, Any]:
+        """
+        Process text with NLP and generate embeddings.
+
+        ``docs`` is the spaCy parse saved by the extract stage; the text is
+        only parsed again (in chunks, via nlp.pipe) when it is not available.
+        """
         try:
-            # Process with SpaCy
-            doc = self.nlp(text)
+            # Reuse the shared SpaCy pass, or parse if there is none
+            if docs is None:
+                logger.info("No shared NLP artifact, running SpaCy")
+                docs = iter_docs(text)
             
             # Extract key information
-            processed_data = {
-                'sentences': [sent.text.strip() for sent in doc.sents],
-                'entities': [{'text': ent.text, 'label': ent.label_} for ent in doc.ents],
-                'keywords': [token.text for token in doc if token.is_alpha and not token.is_stop]
-            }
+            with metrics.timer("transform.spacy") as timing:
+                processed_data = analyze_docs(docs)
+                timing.items = len(processed_data['sentences'])
             
-            # Generate embeddings
-            embeddings = self.model.encode(processed_data['sentences'])
+            # Generate embeddings (deduplicated, cached, length-sorted batches)
+            before = self.encoder.stats()
+            with metrics.timer("transform.encode", items=len(processed_data['sentences'])):
+                embeddings = self.encoder.encode(processed_data['sentences'])
+            stats = self.encoder.stats()
+            metrics.record_cache(
+                "transform.embedding_cache",
+                stats['cache_hits'] - before['cache_hits'],
+                (stats['unique_sentences'] - before['unique_sentences'])
+                - (stats['cache_hits'] - before['cache_hits'])
+            )
+            logger.info(
+                f"Embeddings: {stats['sentences']} sentences, {stats['unique_sentences']} unique, "
+                f"cache hit rate {stats['cache_hit_rate']:.1%}, {stats['sentences_per_sec']:.1f} sentences/sec"
+            )
             
-            # Create FAISS index
-            dimension = embeddings.shape[1]
-            index = faiss.IndexFlatL2(dimension)
-            index.add(np.array(embeddings).astype('float32'))
-            
-            return processed_data, embeddings, index
+            # The persistent vector index is updated by the load stage, once
+            # the document has a database id
+            return processed_data, embeddings
             
         except Exception as e:
             logger.error(f"Error processing text: {e}")
@@ -62,12 +88,15 @@ class DataTransformer:
         try:
             processed_charts = []
             for chart in charts:
-                if chart.get('contains_chart'):
+                # chart_detection.json marks detections as "Yes"/"No"
+                if chart.get('contains_chart') in (True, 'Yes'):
                     processed_charts.append({
-                        'image_path': chart['image_path'],
-                        'confidence': chart['confidence'],
+                        'image_path': chart.get('image_path', chart.get('image')),
+                        'confidence': chart.get('confidence', chart.get('confidence_score')),
                         'type': 'chart',
-                        'characteristics': chart['characteristics']
+                        'characteristics': chart['characteristics'],
+                        'page_number': chart.get('page'),
+                        'bbox': chart.get('bbox')
                     })
             return processed_charts
             
@@ -75,29 +104,38 @@ class DataTransformer:
             logger.error(f"Error processing charts: {e}")
             raise
 
-def main():
-    """Main execution function."""
+def main(work_dir: Optional[Path] = None):
+    """Main execution function; reads and writes ``work_dir`` (default: PROCESSED_DIR)."""
+    work_dir = Path(work_dir) if work_dir else PROCESSED_DIR
     try:
-        # Load extracted data
-        with open(PROCESSED_DIR / "extracted_text.json", 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        # Load extracted text (only the page text column)
+        text = read_document_text(work_dir)
             
         transformer = DataTransformer()
         
-        # Process text and generate embeddings
-        processed_text, embeddings, vector_index = transformer.process_text(data['text'])
+        # Process text and generate embeddings (reusing extract's SpaCy parse)
+        docs = load_docs(work_dir / NLP_ARTIFACT, text=text)
+        processed_text, embeddings = transformer.process_text(text, docs)
         
+        # Load chart detection results (written separately by extract)
+        charts = []
+        chart_path = work_dir / "chart_detection.json"
+        if chart_path.exists():
+            with open(chart_path, 'r', encoding='utf-8') as f:
+                charts = json.load(f)
+
         # Process charts
-        processed_charts = transformer.process_charts(data.get('charts', []))
+        processed_charts = transformer.process_charts(charts)
         
-        # Save processed results
-        output = {
-            'text_analysis': processed_text,
-            'charts': processed_charts
-        }
-        
-        with open(PROCESSED_DIR / "processed_data.json", 'w', encoding='utf-8') as f:
-            json.dump(output, f, indent=4, ensure_ascii=False)
+        # Save processed results as columnar tables
+        write_sentences(work_dir, processed_text['sentences'], processed_text['sentence_offsets'])
+        write_entities(work_dir, "entities", processed_text['entities'])
+        write_keywords(work_dir, processed_text['keywords'])
+        with open(work_dir / PROCESSED_CHARTS, 'w', encoding='utf-8') as f:
+            json.dump(processed_charts, f, ensure_ascii=False)
+
+        # Sentence embeddings, one float32 row per sentence
+        write_embeddings(work_dir, embeddings)
             
         logger.info("Data transformation complete!")
         
@@ -106,4 +144,5 @@ def main():
         raise
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
+    metrics.write_summary(PROCESSED_DIR / "transform_metrics.json")
\ No newline at end of file
@@ -0,0 +1,434 @@
+"""
+Persistent sentence vector index shared by the load stage (writers) and the
+API (readers).
+
+Layout of an index directory:
+
+- ``manifest.json``      index type, dimension, vector count and the shards
+                         of the last save.
+- ``shard-NNNNNN.faiss`` FAISS index over L2-normalized embeddings (inner
+                         product == cosine similarity). Vector ids are
+                         insertion positions within the shard.
+- ``shard-NNNNNN.i64``   one row of int64 ``(document_id, sentence_index,
+                         start, end)`` per vector of the shard, in id order;
+                         offsets point into ``documents.content``.
+- ``index.lock``         held by writers while they change the index.
+
+Removing a document (e.g. when it is reloaded with ``--force``) records
+its id in the manifest's ``deleted`` list; searches skip its vectors and
+merges and upgrades drop them from the shards they rewrite.
+
+A save writes the vectors added since the last save as a new shard (its
+cost does not grow with the corpus) and then merges the newest shards
+while they are of similar size, which keeps the number of shards
+logarithmic in the number of vectors. Indexes saved before shards existed
+(``index.faiss`` + ``meta.i64``) are read as a single shard.
+
+This module only depends on faiss and numpy so the API can import it
+without the pipeline configuration.
+"""
+import json
+import os
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import faiss
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: one writer process at a time
+    fcntl = None
+
+META_COLUMNS = ("document_id", "sentence_index", "start", "end")
+FORMAT_VERSION = 2
+
+# The newest shard is merged into the one before it while that one holds
+# fewer than MERGE_FACTOR times as many vectors
+MERGE_FACTOR = 2
+
+
+@contextmanager
+def _file_lock(path: Path) -> Iterator[None]:
+    """Exclusive inter-process lock on ``path`` (held until the block exits)."""
+    with open(path, "a") as f:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+class VectorIndex:
+    """Sharded, append-only FAISS index with sentence metadata."""
+
+    def __init__(self, index_dir: Path, dimension: Optional[int] = None, read_only: bool = False):
+        """
+        Open the index in ``index_dir``.
+
+        Readers (``read_only=True``) memory-map every shard so API workers
+        share pages and start instantly. Writers only read the manifest:
+        ``add`` buffers vectors in memory and ``save`` appends them as a
+        new shard. ``dimension`` is required to create a new index.
+        """
+        self.index_dir = Path(index_dir)
+        self.read_only = read_only
+        self.manifest_path = self.index_dir / "manifest.json"
+        self.lock_path = self.index_dir / "index.lock"
+        self._lock = threading.RLock()
+        self._manifest_mtime = None
+        self._search_params = (16, 64)
+        self._pending_vectors: List[np.ndarray] = []
+        self._pending_meta: List[np.ndarray] = []
+        self._pending_deleted: set = set()
+        # (manifest entry, FAISS index, metadata rows) per shard, loaded for search
+        self.shards: Optional[List[Tuple[Dict[str, Any], Any, np.ndarray]]] = None
+        # FAISS search parameters per loaded shard (None: nothing to skip)
+        self._shard_params: List[Any] = []
+
+        if not read_only:
+            self.index_dir.mkdir(parents=True, exist_ok=True)
+
+        if self.manifest_path.exists():
+            self.manifest = self._read_manifest()
+        elif read_only:
+            raise FileNotFoundError(f"Vector index not found: {self.manifest_path}")
+        elif dimension is None:
+            raise ValueError("dimension is required to create a new vector index")
+        else:
+            self.manifest = {
+                "format_version": FORMAT_VERSION,
+                "kind": "flat",
+                "dimension": dimension,
+                "ntotal": 0,
+                "shards": [],
+                "next_shard": 0,
+                "deleted": [],
+            }
+
+        if read_only:
+            self._load()
+
+    @property
+    def dimension(self) -> int:
+        return self.manifest["dimension"]
+
+    @property
+    def kind(self) -> str:
+        return self.manifest["kind"]
+
+    @property
+    def ntotal(self) -> int:
+        return self.manifest["ntotal"] + sum(len(rows) for rows in self._pending_meta)
+
+    def _read_manifest(self) -> Dict[str, Any]:
+        with open(self.manifest_path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        if "shards" not in manifest:
+            # Saved before shards existed: one index file and one metadata file
+            manifest["shards"] = [{
+                "index": "index.faiss",
+                "meta": "meta.i64",
+                "kind": manifest["kind"],
+                "ntotal": manifest["ntotal"],
+            }] if manifest["ntotal"] else []
+            manifest["next_shard"] = 0
+        manifest.setdefault("deleted", [])
+        return manifest
+
+    def _read_index(self, path: Path):
+        """Read an index file, memory-mapped for readers when supported."""
+        if not path.exists():
+            raise FileNotFoundError(f"Vector index shard not found: {path}")
+        if not self.read_only:
+            return faiss.read_index(str(path))
+
+        for flag_name in ("IO_FLAG_MMAP_IFC", "IO_FLAG_MMAP"):
+            flag = getattr(faiss, flag_name, None)
+            if flag is None:
+                continue
+            try:
+                return faiss.read_index(str(path), flag)
+            except RuntimeError:
+                continue
+        return faiss.read_index(str(path))
+
+    def _read_shard(self, entry: Dict[str, Any]) -> Tuple[Any, np.ndarray]:
+        """The FAISS index and metadata rows of one shard."""
+        index = self._read_index(self.index_dir / entry["index"])
+        meta_path = self.index_dir / entry["meta"]
+        shape = (entry["ntotal"], len(META_COLUMNS))
+        if self.read_only:
+            meta = np.memmap(meta_path, dtype=np.int64, mode="r", shape=shape)
+        else:
+            meta = np.fromfile(meta_path, dtype=np.int64, count=shape[0] * shape[1]).reshape(shape)
+        return index, meta
+
+    def _load(self, attempts: int = 3):
+        """Load every shard of the current manifest."""
+        for attempt in range(attempts):
+            mtime = self.manifest_path.stat().st_mtime
+            manifest = self._read_manifest()
+            try:
+                shards = [(entry, *self._read_shard(entry)) for entry in manifest["shards"]]
+            except FileNotFoundError:
+                # A writer merged shards after we read the manifest
+                if attempt == attempts - 1:
+                    raise
+                continue
+            self.manifest, self.shards, self._manifest_mtime = manifest, shards, mtime
+            self.apply_search_params(*self._search_params)
+            return
+
+    def refresh(self) -> bool:
+        """Reload if a writer saved a newer version; returns True if reloaded."""
+        with self._lock:
+            try:
+                mtime = self.manifest_path.stat().st_mtime
+            except OSError:
+                return False
+            if mtime == self._manifest_mtime:
+                return False
+            self._load()
+            return True
+
+    def apply_search_params(self, nprobe: int = 16, ef_search: int = 64) -> None:
+        """
+        Set query-time accuracy knobs for approximate index types, and the
+        selectors that skip the vectors of removed documents.
+        """
+        self._search_params = (nprobe, ef_search)
+        deleted = np.array(self.manifest["deleted"], dtype=np.int64)
+        self._shard_params = []
+        for entry, index, meta in self.shards or []:
+            if entry["kind"] == "ivf":
+                faiss.extract_index_ivf(index).nprobe = nprobe
+            elif entry["kind"] == "hnsw":
+                index.hnsw.efSearch = ef_search
+
+            removed = np.flatnonzero(np.isin(meta[:, 0], deleted)).astype(np.int64)
+            if not len(removed):
+                self._shard_params.append(None)
+                continue
+            removed_ids = faiss.IDSelectorBatch(removed)
+            selector = faiss.IDSelectorNot(removed_ids)
+            # Search parameters replace the index's own knobs, so repeat them
+            if entry["kind"] == "ivf":
+                params = faiss.SearchParametersIVF(sel=selector, nprobe=nprobe)
+            elif entry["kind"] == "hnsw":
+                params = faiss.SearchParametersHNSW(sel=selector, efSearch=ef_search)
+            else:
+                params = faiss.SearchParameters(sel=selector)
+            # The SWIG wrappers do not keep the selectors alive
+            params.referenced_objects = [removed_ids, selector]
+            self._shard_params.append(params)
+
+    def add(self, document_id: int, embeddings: np.ndarray, offsets: Sequence[Sequence[int]]) -> None:
+        """Buffer one document's sentence embeddings and their content offsets until ``save``."""
+        if self.read_only:
+            raise RuntimeError("Vector index opened read-only")
+        if len(embeddings) != len(offsets):
+            raise ValueError("Each embedding needs a (start, end) offset")
+        if not len(embeddings):
+            return
+
+        vectors = np.ascontiguousarray(embeddings, dtype=np.float32).copy()
+        if vectors.shape[1] != self.dimension:
+            raise ValueError(f"Embedding dimension {vectors.shape[1]} != index dimension {self.dimension}")
+        faiss.normalize_L2(vectors)
+        rows = np.array(
+            [(document_id, i, start, end) for i, (start, end) in enumerate(offsets)],
+            dtype=np.int64,
+        )
+        with self._lock:
+            self._pending_vectors.append(vectors)
+            self._pending_meta.append(rows)
+
+    def remove(self, document_ids: Iterable[int]) -> None:
+        """Drop the vectors of ``document_ids`` from searches, from the next ``save`` on."""
+        if self.read_only:
+            raise RuntimeError("Vector index opened read-only")
+        with self._lock:
+            self._pending_deleted.update(int(document_id) for document_id in document_ids)
+
+    def _write_shard(self, manifest: Dict[str, Any], index, meta: np.ndarray, kind: str) -> Dict[str, Any]:
+        """Write a new shard file pair and return its manifest entry."""
+        name = f"shard-{manifest['next_shard']:06d}"
+        manifest["next_shard"] += 1
+        faiss.write_index(index, str(self.index_dir / f"{name}.faiss"))
+        np.ascontiguousarray(meta, dtype=np.int64).tofile(self.index_dir / f"{name}.i64")
+        return {"index": f"{name}.faiss", "meta": f"{name}.i64", "kind": kind, "ntotal": len(meta)}
+
+    def _write_manifest(self, manifest: Dict[str, Any], shards: List[Dict[str, Any]],
+                        deleted: Iterable[int]) -> None:
+        """Atomically replace the manifest; readers switch to ``shards`` on refresh."""
+        manifest = dict(
+            manifest,
+            format_version=FORMAT_VERSION,
+            kind=shards[0]["kind"] if shards else "flat",
+            ntotal=sum(entry["ntotal"] for entry in shards),
+            shards=shards,
+            deleted=sorted(deleted),
+        )
+        tmp_manifest = self.manifest_path.with_suffix(".json.tmp")
+        with open(tmp_manifest, "w", encoding="utf-8") as f:
+            json.dump(manifest, f)
+        os.replace(tmp_manifest, self.manifest_path)
+        self.manifest = manifest
+        self.shards = None
+        self._manifest_mtime = self.manifest_path.stat().st_mtime
+
+    def _remove_shards(self, shards: List[Dict[str, Any]]) -> None:
+        """Delete the files of shards no longer listed in the manifest."""
+        for entry in shards:
+            for name in (entry["index"], entry["meta"]):
+                try:
+                    os.remove(self.index_dir / name)
+                except FileNotFoundError:
+                    pass
+
+    def save(self) -> None:
+        """
+        Append the vectors added since the last save as a new shard and merge
+        it into the shards before it while they are of similar size, and
+        record the documents removed since the last save.
+
+        Runs under the index file lock, so concurrent writers (batch workers,
+        Airflow tasks) never lose each other's shards. Shards are written
+        before the manifest that lists them, so readers never see ids
+        without metadata.
+        """
+        if self.read_only:
+            raise RuntimeError("Vector index opened read-only")
+        with self._lock, _file_lock(self.lock_path):
+            if not self._pending_meta and not self._pending_deleted:
+                return
+            manifest = self._read_manifest() if self.manifest_path.exists() else self.manifest
+            if manifest["dimension"] != self.dimension:
+                raise ValueError(f"Index dimension changed on disk to {manifest['dimension']}")
+
+            deleted = set(manifest["deleted"]) | self._pending_deleted
+            shards = list(manifest["shards"])
+            merged = []
+            if self._pending_meta:
+                vectors = np.vstack(self._pending_vectors)
+                meta = np.vstack(self._pending_meta)
+                index, kind = None, "flat"
+                while shards and shards[-1]["ntotal"] < MERGE_FACTOR * len(meta):
+                    previous = shards.pop()
+                    merged.append(previous)
+                    previous_index, previous_meta = self._read_shard(previous)
+                    if previous["kind"] != "flat":
+                        # Only the first shard is ever rebuilt as IVF/HNSW,
+                        # which cannot drop vectors: keep its rows as they are
+                        vectors, meta = self._without(deleted, vectors, meta)
+                        previous_index.add(vectors)
+                        index, kind = previous_index, previous["kind"]
+                        meta = np.vstack([previous_meta, meta])
+                        break
+                    vectors = np.vstack([previous_index.reconstruct_n(0, previous["ntotal"]), vectors])
+                    meta = np.vstack([previous_meta, meta])
+
+                if index is None:
+                    vectors, meta = self._without(deleted, vectors, meta)
+                    if not shards:
+                        # Every saved vector was rewritten without the removed documents
+                        deleted = set()
+                    if len(meta):
+                        index = faiss.IndexFlatIP(self.dimension)
+                        index.add(vectors)
+                if index is not None:
+                    shards.append(self._write_shard(manifest, index, meta, kind))
+
+            self._write_manifest(manifest, shards, deleted)
+            self._remove_shards(merged)
+            self._pending_vectors, self._pending_meta = [], []
+            self._pending_deleted = set()
+
+    @staticmethod
+    def _without(deleted: set, vectors: np.ndarray, meta: np.ndarray):
+        """The vectors and metadata rows that do not belong to removed documents."""
+        if not deleted:
+            return vectors, meta
+        keep = ~np.isin(meta[:, 0], np.array(sorted(deleted), dtype=np.int64))
+        return vectors[keep], meta[keep]
+
+    def maybe_upgrade(self, threshold: int, kind: str = "ivf", hnsw_m: int = 32) -> bool:
+        """
+        Rebuild the saved flat shards as a single IVF or HNSW shard once they
+        hold at least ``threshold`` vectors, without the vectors of removed
+        documents. Vector order is otherwise preserved.
+        """
+        if self.read_only:
+            return False
+
+        with self._lock, _file_lock(self.lock_path):
+            if not self.manifest_path.exists():
+                return False
+            manifest = self._read_manifest()
+            if manifest["kind"] != "flat" or manifest["ntotal"] < threshold:
+                return False
+
+            shards = manifest["shards"]
+            parts = [self._read_shard(entry) for entry in shards]
+            vectors, meta = self._without(
+                set(manifest["deleted"]),
+                np.vstack([index.reconstruct_n(0, entry["ntotal"]) for entry, (index, _) in zip(shards, parts)]),
+                np.vstack([rows for _, rows in parts]),
+            )
+            if not len(meta):
+                self._write_manifest(manifest, [], deleted=())
+                self._remove_shards(shards)
+                return True
+            if kind == "hnsw":
+                index = faiss.IndexHNSWFlat(self.dimension, hnsw_m, faiss.METRIC_INNER_PRODUCT)
+            elif kind == "ivf":
+                nlist = max(1, int(4 * np.sqrt(len(vectors))))
+                quantizer = faiss.IndexFlatIP(self.dimension)
+                index = faiss.IndexIVFFlat(quantizer, self.dimension, nlist, faiss.METRIC_INNER_PRODUCT)
+                index.train(vectors)
+            else:
+                raise ValueError(f"Unknown index type: {kind}")
+            index.add(vectors)
+            self._write_manifest(manifest, [self._write_shard(manifest, index, meta, kind)], deleted=())
+            self._remove_shards(shards)
+        return True
+
+    def search(self, queries: np.ndarray, k: int = 10) -> List[List[Dict[str, Any]]]:
+        """
+        k-NN search for a batch of query embeddings.
+
+        Returns, per query, hits ordered by cosine similarity with the
+        document id, sentence index and content offsets of the sentence.
+        """
+        queries = np.ascontiguousarray(np.atleast_2d(queries), dtype=np.float32).copy()
+        faiss.normalize_L2(queries)
+        with self._lock:
+            if self.shards is None and self.manifest_path.exists():
+                self._load()
+            shards = self.shards or []
+            shard_params = self._shard_params
+
+        results = [[] for _ in range(len(queries))]
+        for (_, index, meta), params in zip(shards, shard_params):
+            count = min(index.ntotal, len(meta))
+            if not count:
+                continue
+            scores, ids = index.search(queries, min(k, count), params=params)
+            for hits, query_scores, query_ids in zip(results, scores, ids):
+                for score, vector_id in zip(query_scores, query_ids):
+                    if vector_id < 0 or vector_id >= count:
+                        continue
+                    row = meta[vector_id]
+                    hits.append({
+                        "document_id": int(row[0]),
+                        "sentence_index": int(row[1]),
+                        "start": int(row[2]),
+                        "end": int(row[3]),
+                        "score": float(score),
+                    })
+        return [sorted(hits, key=lambda hit: hit["score"], reverse=True)[:k] for hits in results]
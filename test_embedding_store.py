@@ -0,0 +1,119 @@
+"""
+Row alignment of the persistent sentence embedding store (pipeline/embeddings.py).
+
+Run with ``python -m pytest test_embedding_store.py``.
+"""
+import multiprocessing
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parent
+sys.path.insert(0, str(ROOT / "pipeline"))
+
+from embeddings import EmbeddingStore, get_embedding_store  # noqa: E402
+
+DIMENSION = 4
+
+
+def vectors_for(keys):
+    """A distinct, recognizable vector per key."""
+    return np.array([[float(int(key[1:]))] * DIMENSION for key in keys], dtype=np.float32)
+
+
+def assert_maps_correctly(store, keys):
+    found = store.lookup(keys)
+    assert sorted(found) == sorted(keys)
+    for key, vector in zip(keys, vectors_for(keys)):
+        np.testing.assert_array_equal(found[key], vector)
+
+
+def test_reopen_after_interrupted_append(tmp_path):
+    store = EmbeddingStore(tmp_path, DIMENSION)
+    keys = ["k1", "k2", "k3"]
+    store.add(keys, vectors_for(keys))
+
+    # An append that wrote its vectors but only part of its keys
+    with open(tmp_path / "vectors.f32", "ab") as f:
+        f.write(vectors_for(["k90", "k91"]).tobytes())
+    with open(tmp_path / "keys.txt", "a", encoding="ascii") as f:
+        f.write("k9")
+
+    reopened = EmbeddingStore(tmp_path, DIMENSION)
+    assert len(reopened) == 3
+    assert (tmp_path / "vectors.f32").stat().st_size == 3 * DIMENSION * 4
+    assert_maps_correctly(reopened, keys)
+
+    more = ["k4", "k5"]
+    reopened.add(more, vectors_for(more))
+    assert_maps_correctly(EmbeddingStore(tmp_path, DIMENSION), keys + more)
+
+
+def test_duplicate_keys_keep_alignment(tmp_path):
+    store = EmbeddingStore(tmp_path, DIMENSION)
+    store.add(["k1", "k2", "k1"], vectors_for(["k1", "k2", "k1"]))
+    assert len(store) == 2
+
+    # A key written twice (e.g. by an older version) still occupies its row
+    with open(tmp_path / "vectors.f32", "ab") as f:
+        f.write(vectors_for(["k2"]).tobytes())
+    with open(tmp_path / "keys.txt", "a", encoding="ascii") as f:
+        f.write("k2\n")
+
+    reopened = EmbeddingStore(tmp_path, DIMENSION)
+    reopened.add(["k3"], vectors_for(["k3"]))
+    assert_maps_correctly(EmbeddingStore(tmp_path, DIMENSION), ["k1", "k2", "k3"])
+
+
+def test_appends_from_another_store_are_seen(tmp_path):
+    first = EmbeddingStore(tmp_path, DIMENSION)
+    second = EmbeddingStore(tmp_path, DIMENSION)
+    first.add(["k1"], vectors_for(["k1"]))
+    second.add(["k2"], vectors_for(["k2"]))
+    first.add(["k3"], vectors_for(["k3"]))
+    assert_maps_correctly(second, ["k1", "k2", "k3"])
+    assert_maps_correctly(first, ["k1", "k2", "k3"])
+
+
+def add_range(store_dir, start, count, batch=7):
+    """Add keys k<start>..k<start+count-1> in small batches, overlapping other writers."""
+    store = EmbeddingStore(store_dir, DIMENSION)
+    keys = [f"k{i}" for i in range(start, start + count)]
+    for offset in range(0, count, batch):
+        chunk = keys[offset:offset + batch]
+        # Every writer also re-adds a shared key
+        store.add(chunk + ["k0"], vectors_for(chunk + ["k0"]))
+
+
+def test_threads_share_one_store(tmp_path):
+    assert get_embedding_store(tmp_path, DIMENSION) is get_embedding_store(tmp_path / ".", DIMENSION)
+
+    def add(start):
+        store = get_embedding_store(tmp_path, DIMENSION)
+        keys = [f"k{i}" for i in range(start, start + 50)]
+        for offset in range(0, 50, 5):
+            chunk = keys[offset:offset + 5]
+            store.add(chunk + ["k0"], vectors_for(chunk + ["k0"]))
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        list(executor.map(add, [1, 51, 101, 151]))
+
+    keys = ["k0"] + [f"k{i}" for i in range(1, 201)]
+    assert_maps_correctly(EmbeddingStore(tmp_path, DIMENSION), keys)
+
+
+def test_processes_append_concurrently(tmp_path):
+    context = multiprocessing.get_context("spawn")
+    workers = [context.Process(target=add_range, args=(tmp_path, 1 + i * 100, 100)) for i in range(4)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+        assert worker.exitcode == 0
+
+    store = EmbeddingStore(tmp_path, DIMENSION)
+    keys = ["k0"] + [f"k{i}" for i in range(1, 401)]
+    assert len(store) == len(keys)
+    assert_maps_correctly(store, keys)
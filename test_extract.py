@@ -0,0 +1,146 @@
+"""
+Page routing and chart detection in the extract stage (pipeline/extract.py).
+
+Run with ``python -m pytest test_extract.py``.
+"""
+import sys
+from pathlib import Path
+
+import fitz
+import numpy as np
+
+ROOT = Path(__file__).resolve().parent
+sys.path.insert(0, str(ROOT / "pipeline"))
+
+import extract  # noqa: E402
+
+
+def fake_ocr(images):
+    for image in images:
+        yield {"text": f"ocr {int(image[0, 0, 0])}"}
+
+
+def test_chart_detection_sees_text_pages_after_last_ocr_page(tmp_path):
+    routes = ["text", "ocr", "text", "text", "text"]
+    page_routes = [
+        {"page": number, "route": route, "text": f"text {number}" if route == "text" else ""}
+        for number, route in enumerate(routes, start=1)
+    ]
+    pages = (
+        (number, np.full((64, 64, 3), number, dtype=np.uint8))
+        for number in range(1, len(routes) + 1)
+    )
+
+    chart_data = []
+    ocr_results = fake_ocr(extract.select_pages_for_ocr(
+        extract.detect_charts_while_streaming(pages, chart_data, output_folder=tmp_path),
+        page_routes
+    ))
+    text = extract.merge_page_texts(page_routes, ocr_results)
+
+    assert [record["page"] for record in chart_data] == [1, 2, 3, 4, 5]
+    assert text == "text 1\n\nocr 2\n\ntext 3\n\ntext 4\n\ntext 5"
+
+
+def test_merge_rejects_extra_ocr_results():
+    page_routes = [{"page": 1, "route": "ocr", "text": ""}]
+    try:
+        extract.merge_page_texts(page_routes, [{"text": "a"}, {"text": "b"}])
+    except ValueError:
+        return
+    raise AssertionError("extra OCR results were ignored")
+
+
+def test_line_only_chart_becomes_one_region():
+    with fitz.open() as doc:
+        page = doc.new_page(width=600, height=800)
+        # Axes, horizontal gridlines and tick marks: every path is a line
+        # with zero width or height
+        page.draw_line((100, 100), (100, 400))
+        page.draw_line((100, 400), (500, 400))
+        for y in range(130, 400, 60):
+            page.draw_line((100, y), (500, y))
+        for x in range(150, 500, 80):
+            page.draw_line((x, 400), (x, 406))
+        # A separate, far away cluster stays its own region
+        for y in range(600, 700, 20):
+            page.draw_line((100, y), (300, y))
+        page.draw_line((100, 600), (100, 700))
+
+        regions = [bbox for bbox, source in extract.find_chart_regions(page) if source == "drawing"]
+
+    assert len(regions) == 2
+    chart = max(regions, key=lambda bbox: bbox.width * bbox.height)
+    assert (chart.x0, chart.y0, chart.x1) == (100, 100, 500)
+    assert chart.y1 >= 400
+
+
+def test_merge_rects_joins_points_inside_the_cluster_bounds():
+    # Axis lines plus markers that are only inside the axes' bounding box,
+    # not near any single axis line
+    rects = [fitz.Rect(0, 0, 0, 100), fitz.Rect(0, 100, 100, 100), fitz.Rect(50, 40, 52, 42)]
+    clusters = extract._merge_rects(rects, margin=5)
+    assert [(tuple(rect), count) for rect, count in clusters] == [((0, 0, 100, 100), 3)]
+
+
+def test_cascade_rejection_keeps_the_record_format(monkeypatch):
+    blank = np.full((200, 200, 3), 255, dtype=np.uint8)
+    monkeypatch.setitem(extract.CHART_DETECTION, "CASCADE", False)
+    full = extract.detect_chart_in_image(blank, 1)
+    monkeypatch.setitem(extract.CHART_DETECTION, "CASCADE", True)
+    rejected = extract.detect_chart_in_image(blank, 1)
+
+    assert rejected.keys() == full.keys()
+    assert rejected["characteristics"].keys() == full["characteristics"].keys()
+    assert rejected["contains_chart"] == "No"
+
+
+def test_image_writer_is_closed_when_detection_fails(tmp_path, monkeypatch):
+    pdf_path = tmp_path / "doc.pdf"
+    with fitz.open() as doc:
+        doc.new_page().insert_text((72, 72), "A page with a text layer. " * 20)
+        doc.save(pdf_path)
+
+    writers = []
+
+    class RecordingWriter(extract.BackgroundImageWriter):
+        def __init__(self):
+            super().__init__()
+            writers.append(self)
+
+    def failing_detection(*args, **kwargs):
+        raise RuntimeError("detection failed")
+
+    monkeypatch.setattr(extract, "BackgroundImageWriter", RecordingWriter)
+    monkeypatch.setattr(extract, "SAVE_PAGE_IMAGES", True)
+    monkeypatch.setattr(extract, "CHART_DETECTION_MODE", "page")
+    monkeypatch.setattr(extract, "detect_charts_in_images", failing_detection)
+
+    try:
+        extract.main(pdf_path, tmp_path / "out")
+    except RuntimeError:
+        pass
+    else:
+        raise AssertionError("the detection error was swallowed")
+    assert len(writers) == 1 and not writers[0]._thread.is_alive()
+
+
+def test_ocr_cache_lookups_are_counted_per_call(tmp_path, monkeypatch):
+    import ocr
+    from ocr_cache import OCRCache
+
+    monkeypatch.setattr(ocr, "ocr_page", lambda page: {"text": f"ocr {int(page[0, 0, 0])}", "words": []})
+    cache = OCRCache(tmp_path, max_bytes=1 << 20)
+    pages = [np.full((4, 4, 3), value, dtype=np.uint8) for value in (1, 2)]
+
+    first, second = {}, {}
+    assert len(list(ocr.iter_cached_ocr_pages(pages, cache, workers=1, counts=first))) == 2
+    # Interleaved with another caller of the same cache
+    lookups = ocr.iter_cached_ocr_pages(pages, cache, workers=1, counts=second)
+    next(lookups)
+    list(ocr.iter_cached_ocr_pages(pages[:1], cache, workers=1))
+    list(lookups)
+
+    assert first == {"hits": 0, "misses": 2}
+    assert second == {"hits": 2, "misses": 0}
+    assert cache.stats()["hits"] == 3
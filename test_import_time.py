@@ -0,0 +1,69 @@
+"""
+Import-time budget for the pipeline modules.
+
+Importing a stage must not load models or validate the database settings,
+so CLI startup and tools that only need one function stay fast. Each check
+runs in a fresh interpreter without DATABASE_URL.
+
+Run with ``python -m pytest test_import_time.py`` (or ``python test_import_time.py``).
+IMPORT_TIME_BUDGET (seconds, default 2.0) sets the threshold.
+"""
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent
+BUDGET = float(os.getenv("IMPORT_TIME_BUDGET", 2.0))
+
+# Modules that must only be imported when a model is actually used
+HEAVY_MODULES = ["spacy", "sentence_transformers", "torch", "paddleocr"]
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+seconds = time.perf_counter() - start
+print(json.dumps({{
+    "seconds": seconds,
+    "loaded": [name for name in {heavy!r} if name in sys.modules],
+}}))
+"""
+
+
+def import_in_subprocess(module: str) -> dict:
+    env = {key: value for key, value in os.environ.items() if key != "DATABASE_URL"}
+    env["PYTHONPATH"] = os.pathsep.join([str(ROOT), str(ROOT / "pipeline")])
+    result = subprocess.run(
+        [sys.executable, "-c", PROBE.format(module=module, heavy=HEAVY_MODULES)],
+        cwd=ROOT, env=env, capture_output=True, text=True
+    )
+    assert result.returncode == 0, f"import {module} failed:\n{result.stderr}"
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def check_module(module: str) -> None:
+    probe = import_in_subprocess(module)
+    assert not probe["loaded"], f"import {module} loaded {probe['loaded']}"
+    assert probe["seconds"] < BUDGET, (
+        f"import {module} took {probe['seconds']:.2f}s (budget {BUDGET:.2f}s)"
+    )
+
+
+def test_import_transform():
+    check_module("pipeline.transform")
+
+
+def test_import_extract():
+    check_module("pipeline.extract")
+
+
+def test_import_config_without_database_url():
+    check_module("pipeline.config")
+
+
+if __name__ == "__main__":
+    for test in (test_import_transform, test_import_extract, test_import_config_without_database_url):
+        test()
+        print(f"✅ {test.__name__}")
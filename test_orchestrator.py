@@ -0,0 +1,63 @@
+"""
+Checkpointed stage runs (pipeline/orchestrator.py).
+
+Run with ``python -m pytest test_orchestrator.py``.
+"""
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent
+sys.path.insert(0, str(ROOT / "pipeline"))
+
+from orchestrator import TRANSFORM_OUTPUTS, DocumentPipeline  # noqa: E402
+
+
+class FakeLoader:
+    """Stands in for DatabaseLoader: documents by content hash."""
+
+    def __init__(self):
+        self.documents = {}
+        self.loads = 0
+        self.next_id = 1
+
+    def document_id_for(self, content_hash):
+        return self.documents.get(content_hash)
+
+    def load_data(self, work_dir, content_hash=None, replace=False):
+        self.loads += 1
+        self.documents[content_hash] = self.next_id
+        self.next_id += 1
+        return self.documents[content_hash]
+
+
+def make_pipeline(tmp_path, loader):
+    source = tmp_path / "doc.pdf"
+    source.write_bytes(b"%PDF-1.4")
+    work_dir = tmp_path / "work"
+    work_dir.mkdir()
+    for name in TRANSFORM_OUTPUTS:
+        (work_dir / name).write_bytes(name.encode())
+    return DocumentPipeline(source, work_dir, content_hash="abc", loader=loader)
+
+
+def test_load_checkpoint_skips_while_document_exists(tmp_path):
+    loader = FakeLoader()
+    pipeline = make_pipeline(tmp_path, loader)
+
+    first = pipeline.run_stage("load")
+    second = pipeline.run_stage("load")
+    assert not first["skipped"] and second["skipped"]
+    assert second["result"]["document_id"] == first["result"]["document_id"]
+    assert loader.loads == 1
+
+
+def test_load_reruns_when_document_was_deleted(tmp_path):
+    loader = FakeLoader()
+    pipeline = make_pipeline(tmp_path, loader)
+    pipeline.run_stage("load")
+
+    loader.documents.clear()  # row deleted / database reset
+    again = pipeline.run_stage("load")
+    assert not again["skipped"]
+    assert loader.loads == 2
+    assert again["result"]["document_id"] == loader.documents["abc"]
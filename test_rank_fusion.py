@@ -0,0 +1,47 @@
+"""
+Hydration of hybrid search results (backend/api/fusion.py).
+
+Run with ``python -m pytest test_rank_fusion.py``.
+"""
+import asyncio
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent
+sys.path.insert(0, str(ROOT))
+
+from backend.api.fusion import fuse_rankings  # noqa: E402
+
+
+def repository(existing):
+    """get_documents over the ids in ``existing``; records every requested batch."""
+    batches = []
+
+    async def get_documents(doc_ids):
+        batches.append(list(doc_ids))
+        return {doc_id: {"id": doc_id} for doc_id in doc_ids if doc_id in existing}
+
+    return get_documents, batches
+
+
+def test_vector_hit_without_row_is_replaced():
+    # Document 7 is still in the vector index but was deleted from the database
+    fusion = fuse_rankings([1, 2, 3, 4], [7, 1, 5])
+    get_documents, batches = repository({1, 2, 3, 4, 5})
+
+    results = asyncio.run(fusion.hydrate(get_documents, limit=3))
+
+    assert [result["id"] for result in results] == [1, 2, 3]
+    assert 7 not in [result["id"] for result in results]
+    assert batches[0] == fusion.ranked_ids[:3] and len(batches) == 2
+
+
+def test_hydrates_only_the_top_candidates():
+    fusion = fuse_rankings([1, 2, 3, 4, 5, 6], [6, 5])
+    get_documents, batches = repository(set(range(1, 7)))
+
+    results = asyncio.run(fusion.hydrate(get_documents, limit=2))
+
+    assert [result["id"] for result in results] == fusion.ranked_ids[:2]
+    assert batches == [fusion.ranked_ids[:2]]
+    assert results[0]["lexical_rank"] is not None and "rank" in results[0]
@@ -0,0 +1,74 @@
+"""
+Invalidation listener of the API response cache (backend/api/cache.py).
+
+Run with ``python -m pytest test_response_cache.py``.
+"""
+import asyncio
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent
+sys.path.insert(0, str(ROOT))
+
+from backend.api.cache import MemoryStore, ResponseCache  # noqa: E402
+
+
+class FakeDatabase:
+    """Stands in for AsyncDatabaseConnection: LISTEN fails ``failures`` times."""
+
+    def __init__(self, failures=0):
+        self.failures = failures
+        self.version = 1
+        self.listens = 0
+        self.on_lost = None
+
+    async def fetch_data_version(self):
+        return self.version
+
+    async def listen(self, channel, on_notify, on_lost=None):
+        self.listens += 1
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("database unavailable")
+        self.on_lost = on_lost
+
+
+def test_listener_reconnects_with_backoff():
+    async def scenario():
+        db = FakeDatabase(failures=2)
+        cache = ResponseCache(MemoryStore(), reconnect_delay=0.01, max_reconnect_delay=0.02)
+        await cache.start_invalidation(db)
+        assert not cache.listening
+
+        for _ in range(100):
+            if cache.listening:
+                break
+            await asyncio.sleep(0.01)
+        assert cache.listening and db.listens == 3
+
+        # Connection dropped while a load bumped the version
+        db.version = 2
+        db.on_lost()
+        assert not cache.listening
+        for _ in range(100):
+            if cache.listening:
+                break
+            await asyncio.sleep(0.01)
+        assert cache.listening and cache.version == 2 and cache.reconnects == 2
+        await cache.stop_invalidation()
+
+    asyncio.run(scenario())
+
+
+def test_no_reconnect_after_shutdown():
+    async def scenario():
+        db = FakeDatabase()
+        cache = ResponseCache(MemoryStore(), reconnect_delay=0.01)
+        await cache.start_invalidation(db)
+        await cache.stop_invalidation()
+
+        db.on_lost()
+        await asyncio.sleep(0.05)
+        assert not cache.listening and db.listens == 1
+
+    asyncio.run(scenario())
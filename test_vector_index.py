@@ -0,0 +1,162 @@
+"""
+Sharded saves of the sentence vector index (pipeline/vector_index.py).
+
+Run with ``python -m pytest test_vector_index.py``.
+"""
+import json
+import multiprocessing
+import sys
+from pathlib import Path
+
+import faiss
+import numpy as np
+
+ROOT = Path(__file__).resolve().parent
+sys.path.insert(0, str(ROOT / "pipeline"))
+
+from vector_index import VectorIndex  # noqa: E402
+
+DIMENSION = 16
+
+
+def document_vectors(document_id, count):
+    """Reproducible random vectors for one document."""
+    return np.random.default_rng(document_id).standard_normal((count, DIMENSION)).astype(np.float32)
+
+
+def save_document(index_dir, document_id, count):
+    index = VectorIndex(index_dir, dimension=DIMENSION)
+    index.add(document_id, document_vectors(document_id, count), [(i, i + 1) for i in range(count)])
+    index.save()
+
+
+def assert_finds(index_dir, documents):
+    """Every sentence of every document is its own nearest neighbour."""
+    reader = VectorIndex(index_dir, read_only=True)
+    assert reader.ntotal == sum(documents.values())
+    for document_id, count in documents.items():
+        for sentence_index, hits in enumerate(reader.search(document_vectors(document_id, count), k=1)):
+            assert (hits[0]["document_id"], hits[0]["sentence_index"]) == (document_id, sentence_index)
+
+
+def test_save_appends_a_shard_without_rewriting_the_index(tmp_path):
+    save_document(tmp_path, 1, 100)
+    first_shard = VectorIndex(tmp_path).manifest["shards"][0]
+    first_mtime = (tmp_path / first_shard["index"]).stat().st_mtime_ns
+
+    save_document(tmp_path, 2, 10)
+    shards = VectorIndex(tmp_path).manifest["shards"]
+    assert shards[0] == first_shard
+    assert (tmp_path / first_shard["index"]).stat().st_mtime_ns == first_mtime
+    assert len(shards) == 2
+    assert_finds(tmp_path, {1: 100, 2: 10})
+
+
+def test_shards_stay_logarithmic(tmp_path):
+    documents = {document_id: 5 for document_id in range(1, 65)}
+    for document_id, count in documents.items():
+        save_document(tmp_path, document_id, count)
+
+    manifest = VectorIndex(tmp_path).manifest
+    assert len(manifest["shards"]) <= 7
+    assert sorted(path.name for path in tmp_path.glob("shard-*")) == sorted(
+        name for entry in manifest["shards"] for name in (entry["index"], entry["meta"])
+    )
+    assert_finds(tmp_path, documents)
+
+
+def test_reader_sees_new_shards_after_refresh(tmp_path):
+    save_document(tmp_path, 1, 20)
+    reader = VectorIndex(tmp_path, read_only=True)
+    save_document(tmp_path, 2, 3)
+    assert reader.refresh()
+    assert reader.ntotal == 23
+    assert reader.search(document_vectors(2, 3)[:1], k=1)[0][0]["document_id"] == 2
+
+
+def test_upgrade_keeps_sentence_metadata(tmp_path):
+    documents = {1: 40, 2: 30, 3: 30}
+    for document_id, count in documents.items():
+        save_document(tmp_path, document_id, count)
+
+    index = VectorIndex(tmp_path)
+    assert index.maybe_upgrade(threshold=100, kind="hnsw")
+    assert index.kind == "hnsw" and len(index.manifest["shards"]) == 1
+
+    save_document(tmp_path, 4, 10)
+    assert_finds(tmp_path, {**documents, 4: 10})
+
+
+def test_reads_index_saved_before_shards(tmp_path):
+    vectors = document_vectors(1, 8)
+    faiss.normalize_L2(vectors)
+    flat = faiss.IndexFlatIP(DIMENSION)
+    flat.add(vectors)
+    faiss.write_index(flat, str(tmp_path / "index.faiss"))
+    np.array([(1, i, i, i + 1) for i in range(8)], dtype=np.int64).tofile(tmp_path / "meta.i64")
+    with open(tmp_path / "manifest.json", "w", encoding="utf-8") as f:
+        json.dump({"format_version": 1, "kind": "flat", "dimension": DIMENSION, "ntotal": 8}, f)
+
+    assert_finds(tmp_path, {1: 8})
+    save_document(tmp_path, 2, 8)
+    assert_finds(tmp_path, {1: 8, 2: 8})
+
+
+def save_range(index_dir, start, count):
+    for document_id in range(start, start + count):
+        save_document(index_dir, document_id, 3)
+
+
+def test_processes_save_concurrently(tmp_path):
+    context = multiprocessing.get_context("spawn")
+    workers = [context.Process(target=save_range, args=(tmp_path, 1 + i * 20, 20)) for i in range(4)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+        assert worker.exitcode == 0
+
+    assert_finds(tmp_path, {document_id: 3 for document_id in range(1, 81)})
+
+
+def remove_document(index_dir, document_id):
+    index = VectorIndex(index_dir)
+    index.remove([document_id])
+    index.save()
+
+
+def found_documents(index_dir, document_id, count):
+    reader = VectorIndex(index_dir, read_only=True)
+    return {hit["document_id"] for hits in reader.search(document_vectors(document_id, count), k=5) for hit in hits}
+
+
+def test_removed_document_is_not_found(tmp_path):
+    save_document(tmp_path, 1, 50)
+    save_document(tmp_path, 2, 10)
+    remove_document(tmp_path, 1)
+
+    assert found_documents(tmp_path, 1, 50) == {2}
+    assert VectorIndex(tmp_path).manifest["deleted"] == [1]
+
+
+def test_merges_drop_removed_vectors(tmp_path):
+    save_document(tmp_path, 1, 10)
+    remove_document(tmp_path, 1)
+    # Same size as the saved shard: merged with it, without document 1
+    save_document(tmp_path, 2, 10)
+
+    manifest = VectorIndex(tmp_path).manifest
+    assert manifest["ntotal"] == 10 and manifest["deleted"] == []
+    assert_finds(tmp_path, {2: 10})
+
+
+def test_removed_document_is_skipped_by_upgraded_index(tmp_path):
+    for document_id in (1, 2, 3):
+        save_document(tmp_path, document_id, 40)
+    VectorIndex(tmp_path).maybe_upgrade(threshold=100, kind="hnsw")
+    remove_document(tmp_path, 2)
+
+    assert found_documents(tmp_path, 2, 40) <= {1, 3}
+    upgraded = VectorIndex(tmp_path, read_only=True)
+    assert upgraded.kind == "hnsw"
+    assert upgraded.search(document_vectors(1, 40), k=1)[0][0]["document_id"] == 1